@@ -1,13 +1,42 @@
 """
 Script para adicionar imagens reais aos imóveis
 Baixa imagens do Unsplash e salva localmente
+
+Cada URL é baixada uma única vez por execução e os arquivos são gravados
+em UPLOAD_DIR/media com o hash do conteúdo no nome, então imóveis que usam
+a mesma foto (e novas execuções do script) compartilham o mesmo arquivo.
 """
+import io
 import os
 import requests
 from sqlalchemy.orm import Session
 from app.db.session import engine
 from app.models.imovel import Imovel, ImovelImagem
-from app.core.config import settings
+from app.services.dedup_service import buscar_duplicata, calcular_hashes, campos_da_duplicata
+from app.services.image_processing import caminho_por_hash, media_dir, url_local
+
+
+def armazenar_download(db: Session, conteudo: bytes) -> dict:
+    """Campos de armazenamento da imagem, reaproveitando uma já cadastrada ou gravada"""
+    hashes = calcular_hashes(io.BytesIO(conteudo))
+    existente = buscar_duplicata(db, hashes)
+    if existente:
+        return campos_da_duplicata(existente)
+
+    file_path = caminho_por_hash(media_dir(), conteudo, "jpg")
+    if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(conteudo)
+
+    imagem_url = url_local(file_path)
+    return {
+        "imagem_url": imagem_url,
+        "storage_key": imagem_url[len("/uploads/"):],
+        "conteudo_hash": hashes["conteudo_hash"],
+        "phash": hashes["phash"],
+    }
+
 
 def adicionar_imagens_reais():
     """Baixa e adiciona imagens reais aos imóveis"""
@@ -49,14 +78,12 @@ def adicionar_imagens_reais():
         }
 
         total_imagens = 0
+        # URL -> campos de armazenamento (cada foto é baixada uma vez por execução)
+        armazenadas = {}
 
         for imovel in imoveis:
             print(f"Processando: {imovel.titulo}")
 
-            # Cria diretório de uploads para o imóvel
-            upload_dir = os.path.join(settings.UPLOAD_DIR, "imoveis", str(imovel.id))
-            os.makedirs(upload_dir, exist_ok=True)
-
             # Pega as imagens do tipo correspondente
             tipo_imovel = imovel.tipo_imovel.value
             imagens_urls = imagens_por_tipo.get(tipo_imovel, imagens_por_tipo["casa"])
@@ -68,31 +95,25 @@ def adicionar_imagens_reais():
                 url = imagens_urls[i % len(imagens_urls)]
 
                 try:
-                    # Baixa a imagem
-                    response = requests.get(url, timeout=10)
-                    response.raise_for_status()
-
-                    # Salva a imagem localmente
-                    filename = f"imagem_{i + 1}.jpg"
-                    file_path = os.path.join(upload_dir, filename)
+                    if url in armazenadas:
+                        print(f"  ✓ Imagem {i + 1} reaproveitada")
+                    else:
+                        # Baixa a imagem
+                        response = requests.get(url, timeout=10)
+                        response.raise_for_status()
 
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-
-                    # Cria registro no banco com caminho relativo
-                    imagem_url = f"/uploads/imoveis/{imovel.id}/{filename}"
+                        armazenadas[url] = armazenar_download(db, response.content)
+                        print(f"  ✓ Imagem {i + 1} baixada e salva")
 
                     db_imagem = ImovelImagem(
                         imovel_id=imovel.id,
-                        imagem_url=imagem_url,
+                        **armazenadas[url],
                         ordem=i,
                         principal=(i == 0)  # Primeira imagem é principal
                     )
                     db.add(db_imagem)
                     total_imagens += 1
 
-                    print(f"  ✓ Imagem {i + 1} baixada e salva")
-
                 except Exception as e:
                     print(f"  ✗ Erro ao baixar imagem {i + 1}: {e}")
 
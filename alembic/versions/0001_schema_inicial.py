@@ -0,0 +1,151 @@
+"""schema inicial (equivalente ao antigo Base.metadata.create_all)
+
+Bancos já criados pelo create_all devem ser marcados com
+`alembic stamp 0001` antes do primeiro `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+tipo_imovel = sa.Enum("casa", "apartamento", "terreno", "comercial", name="tipoimovel")
+tipo_negocio = sa.Enum("venda", "aluguel", name="tiponegocio")
+lead_status = sa.Enum(
+    "novo", "contatado", "visitaAgendada", "negociacao", "convertido", "perdido",
+    name="leadstatus",
+)
+visita_status = sa.Enum("agendada", "confirmada", "realizada", "cancelada", name="visitastatus")
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "imoveis",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("titulo", sa.String(200), nullable=False),
+        sa.Column("descricao", sa.Text(), nullable=False),
+        sa.Column("tipo_imovel", tipo_imovel, nullable=False),
+        sa.Column("tipo_negocio", tipo_negocio, nullable=False),
+        sa.Column("preco_venda", sa.Float()),
+        sa.Column("valor_aluguel", sa.Float()),
+        sa.Column("area_total", sa.Float(), nullable=False),
+        sa.Column("area_construida", sa.Float()),
+        sa.Column("quartos", sa.Integer(), nullable=False),
+        sa.Column("banheiros", sa.Integer(), nullable=False),
+        sa.Column("vagas_garagem", sa.Integer(), nullable=False),
+        sa.Column("rua", sa.String(200), nullable=False),
+        sa.Column("numero", sa.String(20), nullable=False),
+        sa.Column("complemento", sa.String(100)),
+        sa.Column("bairro", sa.String(100), nullable=False),
+        sa.Column("cidade", sa.String(100), nullable=False),
+        sa.Column("estado", sa.String(2), nullable=False),
+        sa.Column("cep", sa.String(10), nullable=False),
+        sa.Column("piscina", sa.Boolean()),
+        sa.Column("aceita_pets", sa.Boolean()),
+        sa.Column("mobiliado", sa.Boolean()),
+        sa.Column("destaque", sa.Boolean()),
+        sa.Column("criado_em", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("atualizado_em", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_imoveis_id", "imoveis", ["id"])
+
+    op.create_table(
+        "imovel_imagens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "imovel_id",
+            sa.Integer(),
+            sa.ForeignKey("imoveis.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("imagem_url", sa.String(500), nullable=False),
+        sa.Column("ordem", sa.Integer()),
+        sa.Column("principal", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_imovel_imagens_id", "imovel_imagens", ["id"])
+
+    op.create_table(
+        "leads",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(200), nullable=False),
+        sa.Column("email", sa.String(200), nullable=False),
+        sa.Column("telefone", sa.String(20), nullable=False),
+        sa.Column("mensagem", sa.Text()),
+        sa.Column("origem", sa.String(50)),
+        sa.Column("status", lead_status),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_leads_id", "leads", ["id"])
+
+    op.create_table(
+        "visitas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "imovel_id",
+            sa.Integer(),
+            sa.ForeignKey("imoveis.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id", ondelete="CASCADE")),
+        sa.Column("nome_cliente", sa.String(200), nullable=False),
+        sa.Column("email_cliente", sa.String(200), nullable=False),
+        sa.Column("telefone_cliente", sa.String(20), nullable=False),
+        sa.Column("data_hora", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", visita_status),
+        sa.Column("observacoes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_visitas_id", "visitas", ["id"])
+
+    op.create_table(
+        "configuracoes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome_empresa", sa.String(200), nullable=False),
+        sa.Column("email", sa.String(200), nullable=False),
+        sa.Column("telefone", sa.String(20), nullable=False),
+        sa.Column("whatsapp", sa.String(20), nullable=False),
+        sa.Column("site", sa.String(200)),
+        sa.Column("endereco", sa.Text(), nullable=False),
+        sa.Column("sobre", sa.Text()),
+        sa.Column("notificacao_email", sa.Boolean()),
+        sa.Column("notificacao_sms", sa.Boolean()),
+        sa.Column("notificacao_whatsapp", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_configuracoes_id", "configuracoes", ["id"])
+
+
+def downgrade():
+    op.drop_table("configuracoes")
+    op.drop_table("visitas")
+    op.drop_table("leads")
+    op.drop_table("imovel_imagens")
+    op.drop_table("imoveis")
+    op.drop_table("users")
+
+    bind = op.get_bind()
+    for enum in (visita_status, lead_status, tipo_negocio, tipo_imovel):
+        enum.drop(bind, checkfirst=True)
@@ -0,0 +1,39 @@
+"""contadores do dashboard e rollups diários
+
+Cria contadores (totais do dashboard ajustados a cada escrita, em vez de
+COUNT(*) sobre as tabelas) e estatisticas_diarias (rollups diários de
+leads e visitas por métrica, dia e dimensão, lidos pelo analytics).
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "contadores",
+        sa.Column("chave", sa.String(100), primary_key=True),
+        sa.Column("valor", sa.Integer(), nullable=False),
+        sa.Column("atualizado_em", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "estatisticas_diarias",
+        sa.Column("metrica", sa.String(50), primary_key=True),
+        sa.Column("dia", sa.Date(), primary_key=True),
+        sa.Column("dimensao", sa.String(50), primary_key=True),
+        sa.Column("valor", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("estatisticas_diarias")
+    op.drop_table("contadores")
@@ -0,0 +1,66 @@
+"""índices compostos e parciais para os filtros mais usados
+
+Os índices são criados com CONCURRENTLY no PostgreSQL para não travar
+escritas em tabelas já populadas.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+# (nome, tabela, colunas, condição do índice parcial)
+INDICES = [
+    ("ix_imoveis_criado_em", "imoveis", ["criado_em"], None),
+    ("ix_imoveis_destaque_criado_em", "imoveis", ["destaque", "criado_em"], "destaque = true"),
+    (
+        "ix_imoveis_negocio_tipo_preco_venda",
+        "imoveis",
+        ["tipo_negocio", "tipo_imovel", "preco_venda"],
+        None,
+    ),
+    (
+        "ix_imoveis_negocio_tipo_valor_aluguel",
+        "imoveis",
+        ["tipo_negocio", "tipo_imovel", "valor_aluguel"],
+        "tipo_negocio = 'aluguel'",
+    ),
+    ("ix_imovel_imagens_imovel_id", "imovel_imagens", ["imovel_id"], None),
+    ("ix_leads_status_created_at", "leads", ["status", "created_at"], None),
+    ("ix_leads_created_at", "leads", ["created_at"], None),
+    ("ix_visitas_status_data_hora", "visitas", ["status", "data_hora"], None),
+    ("ix_visitas_data_hora", "visitas", ["data_hora"], None),
+    ("ix_visitas_imovel_id", "visitas", ["imovel_id"], None),
+    ("ix_visitas_lead_id", "visitas", ["lead_id"], None),
+]
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade():
+    postgresql = _is_postgresql()
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, condicao in INDICES:
+            op.create_index(
+                nome,
+                tabela,
+                colunas,
+                postgresql_where=sa.text(condicao) if condicao else None,
+                postgresql_concurrently=postgresql,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    postgresql = _is_postgresql()
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=postgresql, if_exists=True)
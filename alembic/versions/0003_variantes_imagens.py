@@ -0,0 +1,21 @@
+"""variantes redimensionadas das imagens (pipeline local)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("imovel_imagens", sa.Column("variantes", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("imovel_imagens", "variantes")
@@ -0,0 +1,25 @@
+"""chave de armazenamento e dimensões das imagens
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("imovel_imagens", sa.Column("storage_key", sa.String(300), nullable=True))
+    op.add_column("imovel_imagens", sa.Column("largura", sa.Integer(), nullable=True))
+    op.add_column("imovel_imagens", sa.Column("altura", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("imovel_imagens", "altura")
+    op.drop_column("imovel_imagens", "largura")
+    op.drop_column("imovel_imagens", "storage_key")
@@ -0,0 +1,23 @@
+"""placeholder (LQIP) e cor dominante das imagens
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("imovel_imagens", sa.Column("placeholder", sa.Text(), nullable=True))
+    op.add_column("imovel_imagens", sa.Column("cor_dominante", sa.String(7), nullable=True))
+
+
+def downgrade():
+    op.drop_column("imovel_imagens", "cor_dominante")
+    op.drop_column("imovel_imagens", "placeholder")
@@ -0,0 +1,38 @@
+"""hashes exato e perceptual das imagens (deduplicação de uploads)
+
+Imagens antigas ficam sem hash até rodar `backfill_hashes.py`.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("imovel_imagens", sa.Column("conteudo_hash", sa.String(64), nullable=True))
+    op.add_column("imovel_imagens", sa.Column("phash", sa.String(16), nullable=True))
+
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for coluna in ("conteudo_hash", "phash"):
+            op.create_index(
+                f"ix_imovel_imagens_{coluna}",
+                "imovel_imagens",
+                [coluna],
+                postgresql_concurrently=postgresql,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    op.drop_index("ix_imovel_imagens_phash", table_name="imovel_imagens")
+    op.drop_index("ix_imovel_imagens_conteudo_hash", table_name="imovel_imagens")
+    op.drop_column("imovel_imagens", "phash")
+    op.drop_column("imovel_imagens", "conteudo_hash")
@@ -0,0 +1,37 @@
+"""latitude, longitude e geohash dos imóveis
+
+Imóveis existentes recebem coordenadas com `python backfill_coordenadas.py`.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("imoveis", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("imoveis", sa.Column("longitude", sa.Float(), nullable=True))
+    op.add_column("imoveis", sa.Column("geohash", sa.String(12), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_imoveis_geohash",
+            "imoveis",
+            ["geohash"],
+            postgresql_concurrently=op.get_bind().dialect.name == "postgresql",
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_imoveis_geohash", table_name="imoveis")
+    op.drop_column("imoveis", "geohash")
+    op.drop_column("imoveis", "longitude")
+    op.drop_column("imoveis", "latitude")
@@ -0,0 +1,34 @@
+"""agregados por célula de geohash para o agrupamento do mapa
+
+Preencha com `python backfill_mapa.py` depois de aplicar.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "mapa_celulas",
+        sa.Column("precisao", sa.Integer(), primary_key=True),
+        sa.Column("celula", sa.String(12), primary_key=True),
+        sa.Column("tipo_negocio", sa.String(20), primary_key=True),
+        sa.Column("tipo_imovel", sa.String(20), primary_key=True),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column("soma_lat", sa.Float(), nullable=False),
+        sa.Column("soma_lng", sa.Float(), nullable=False),
+        sa.Column("preco_min", sa.Float(), nullable=True),
+        sa.Column("preco_max", sa.Float(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("mapa_celulas")
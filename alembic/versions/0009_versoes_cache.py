@@ -0,0 +1,35 @@
+"""versões dos caches em memória e índice de atualizado_em dos imóveis
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "versoes",
+        sa.Column("chave", sa.String(100), primary_key=True),
+        sa.Column("valor", sa.Integer(), nullable=False),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_imoveis_atualizado_em",
+            "imoveis",
+            ["atualizado_em"],
+            postgresql_concurrently=op.get_bind().dialect.name == "postgresql",
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_imoveis_atualizado_em", table_name="imoveis")
+    op.drop_table("versoes")
@@ -0,0 +1,59 @@
+"""preço por m² dos imóveis e estatísticas por segmento de mercado
+
+Preencha com `python backfill_preco_m2.py` depois de aplicar.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("imoveis", sa.Column("preco_m2", sa.Float(), nullable=True))
+
+    op.create_table(
+        "estatisticas_preco_m2",
+        sa.Column("cidade", sa.String(100), primary_key=True),
+        sa.Column("bairro", sa.String(100), primary_key=True),
+        sa.Column("tipo_negocio", sa.String(20), primary_key=True),
+        sa.Column("tipo_imovel", sa.String(20), primary_key=True),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column("media", sa.Float(), nullable=True),
+        sa.Column("p10", sa.Float(), nullable=True),
+        sa.Column("p25", sa.Float(), nullable=True),
+        sa.Column("mediana", sa.Float(), nullable=True),
+        sa.Column("p75", sa.Float(), nullable=True),
+        sa.Column("p90", sa.Float(), nullable=True),
+        sa.Column("atualizado_em", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    concorrente = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_imoveis_preco_m2",
+            "imoveis",
+            ["preco_m2"],
+            postgresql_concurrently=concorrente,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_imoveis_segmento_preco_m2",
+            "imoveis",
+            ["cidade", "tipo_negocio", "tipo_imovel", "bairro", "preco_m2"],
+            postgresql_concurrently=concorrente,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_imoveis_segmento_preco_m2", table_name="imoveis")
+    op.drop_index("ix_imoveis_preco_m2", table_name="imoveis")
+    op.drop_table("estatisticas_preco_m2")
+    op.drop_column("imoveis", "preco_m2")
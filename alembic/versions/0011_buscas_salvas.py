@@ -0,0 +1,50 @@
+"""buscas salvas e fila de alertas de novos imóveis
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "buscas_salvas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(200), nullable=False),
+        sa.Column("email", sa.String(200), nullable=False),
+        sa.Column("filtros", sa.JSON(), nullable=False),
+        sa.Column("ativa", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_buscas_salvas_id", "buscas_salvas", ["id"])
+    op.create_index("ix_buscas_salvas_email", "buscas_salvas", ["email"])
+
+    op.create_table(
+        "alertas_busca",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("busca_id", sa.Integer(), sa.ForeignKey("buscas_salvas.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("imovel_id", sa.Integer(), sa.ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("enviado_em", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("busca_id", "imovel_id", name="uq_alertas_busca_busca_imovel"),
+    )
+    op.create_index("ix_alertas_busca_id", "alertas_busca", ["id"])
+    op.create_index("ix_alertas_busca_imovel_id", "alertas_busca", ["imovel_id"])
+    op.create_index(
+        "ix_alertas_busca_pendentes",
+        "alertas_busca",
+        ["created_at"],
+        postgresql_where=sa.text("enviado_em IS NULL"),
+    )
+
+
+def downgrade():
+    op.drop_table("alertas_busca")
+    op.drop_table("buscas_salvas")
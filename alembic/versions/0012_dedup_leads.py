@@ -0,0 +1,52 @@
+"""chaves normalizadas de contato dos leads para deduplicação
+
+Leads existentes recebem as chaves (e são mesclados) com `python dedupe_leads.py`.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("leads", sa.Column("email_normalizado", sa.String(200), nullable=True))
+    op.add_column("leads", sa.Column("telefone_normalizado", sa.String(20), nullable=True))
+    op.add_column("leads", sa.Column("quantidade_contatos", sa.Integer(), nullable=False, server_default="1"))
+    # Sem default na criação: as linhas antigas ficam NULL (vale created_at) em vez do momento da migração
+    op.add_column("leads", sa.Column("ultimo_contato_em", sa.DateTime(timezone=True), nullable=True))
+    # Em lote: o SQLite não tem ALTER COLUMN (a tabela é recriada); no PostgreSQL vira um ALTER simples
+    with op.batch_alter_table("leads") as batch_op:
+        batch_op.alter_column("ultimo_contato_em", server_default=sa.func.now())
+
+    concorrente = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_leads_email_normalizado",
+            "leads",
+            ["email_normalizado"],
+            postgresql_concurrently=concorrente,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_leads_telefone_normalizado",
+            "leads",
+            ["telefone_normalizado"],
+            postgresql_concurrently=concorrente,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_leads_telefone_normalizado", table_name="leads")
+    op.drop_index("ix_leads_email_normalizado", table_name="leads")
+    op.drop_column("leads", "ultimo_contato_em")
+    op.drop_column("leads", "quantidade_contatos")
+    op.drop_column("leads", "telefone_normalizado")
+    op.drop_column("leads", "email_normalizado")
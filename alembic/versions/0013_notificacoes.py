@@ -0,0 +1,48 @@
+"""outbox de notificações (e-mail, SMS, WhatsApp)
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+canal_notificacao = sa.Enum("email", "sms", "whatsapp", name="canalnotificacao")
+status_notificacao = sa.Enum("pendente", "enviada", "falhou", name="statusnotificacao")
+
+
+def upgrade():
+    op.create_table(
+        "notificacoes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("canal", canal_notificacao, nullable=False),
+        sa.Column("destinatario", sa.String(200), nullable=False),
+        sa.Column("assunto", sa.String(300), nullable=True),
+        sa.Column("corpo", sa.Text(), nullable=False),
+        sa.Column("origem", sa.String(50), nullable=True),
+        sa.Column("status", status_notificacao, nullable=False, server_default="pendente"),
+        sa.Column("tentativas", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("disponivel_em", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("ultimo_erro", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("enviada_em", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_notificacoes_id", "notificacoes", ["id"])
+    op.create_index(
+        "ix_notificacoes_pendentes",
+        "notificacoes",
+        ["disponivel_em"],
+        postgresql_where=sa.text("status = 'pendente'"),
+    )
+
+
+def downgrade():
+    op.drop_table("notificacoes")
+    bind = op.get_bind()
+    for enum in (status_notificacao, canal_notificacao):
+        enum.drop(bind, checkfirst=True)
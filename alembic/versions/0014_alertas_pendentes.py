@@ -0,0 +1,25 @@
+"""fila durável de imóveis a comparar com as buscas salvas
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "alertas_pendentes",
+        sa.Column("imovel_id", sa.Integer(), primary_key=True),
+        sa.Column("marcado_em", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("alertas_pendentes")
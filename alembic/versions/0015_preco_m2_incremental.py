@@ -0,0 +1,34 @@
+"""soma e versão das estatísticas de preço por m² (manutenção incremental)
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015"
+down_revision = "0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("estatisticas_preco_m2", sa.Column("soma", sa.Float(), nullable=False, server_default="0"))
+    op.add_column("estatisticas_preco_m2", sa.Column("versao", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column(
+        "estatisticas_preco_m2",
+        sa.Column("quantis_pendentes", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    # A média gravada foi arredondada: os segmentos ficam pendentes e o
+    # primeiro recálculo (ou `python backfill_preco_m2.py --so-estatisticas`) acerta a soma
+    op.execute(
+        "UPDATE estatisticas_preco_m2 SET soma = COALESCE(media, 0) * quantidade, "
+        "quantis_pendentes = TRUE"
+    )
+
+
+def downgrade():
+    op.drop_column("estatisticas_preco_m2", "quantis_pendentes")
+    op.drop_column("estatisticas_preco_m2", "versao")
+    op.drop_column("estatisticas_preco_m2", "soma")
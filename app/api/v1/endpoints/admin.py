@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from app.db.session import get_db
 from app.core.deps import get_current_user
 from app.models.imovel import Imovel
@@ -12,6 +11,8 @@ from app.models.configuracao import Configuracao
 from app.models.user import User
 from app.schemas.visita import Visita as VisitaSchema, VisitaCreate, VisitaUpdate
 from app.schemas.configuracao import Configuracao as ConfiguracaoSchema, ConfiguracaoUpdate
+from app.services import contadores_service, notificacoes_service, rollups_service, versoes_service
+from app.services.configuracao_service import cache_configuracao
 
 router = APIRouter()
 
@@ -22,27 +23,50 @@ def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    total_imoveis = db.query(func.count(Imovel.id)).scalar()
-    total_leads = db.query(func.count(Lead.id)).scalar()
-    visitas_agendadas = (
-        db.query(func.count(Visita.id))
-        .filter(Visita.status == VisitaStatus.agendada)
-        .scalar()
-    )
-    conversoes = (
-        db.query(func.count(Lead.id))
-        .filter(Lead.status == LeadStatus.convertido)
-        .scalar()
-    )
+    # Uma única leitura da tabela de contadores (mantida incrementalmente)
+    contadores = contadores_service.obter_contadores(db)
 
     return {
-        "total_imoveis": total_imoveis or 0,
-        "total_leads": total_leads or 0,
-        "visitas_agendadas": visitas_agendadas or 0,
-        "conversoes": conversoes or 0,
+        "total_imoveis": contadores.get(contadores_service.IMOVEIS, 0),
+        "total_leads": contadores.get(contadores_service.LEADS, 0),
+        "visitas_agendadas": contadores.get(
+            contadores_service.chave_visita_status(VisitaStatus.agendada), 0
+        ),
+        "conversoes": contadores.get(
+            contadores_service.chave_lead_status(LeadStatus.convertido), 0
+        ),
     }
 
 
+@router.post("/stats/reconciliar/")
+def reconciliar_stats(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    divergencias = contadores_service.reconciliar(db)
+    return {"divergencias": divergencias}
+
+
+# Analytics (servido a partir dos rollups diários)
+@router.get("/analytics/")
+def get_analytics(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    data_fim = data_fim or rollups_service.dia_utc(None)
+    data_inicio = data_inicio or data_fim - timedelta(days=29)
+
+    if data_inicio > data_fim:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_inicio deve ser anterior a data_fim",
+        )
+
+    return rollups_service.consultar(db, data_inicio, data_fim)
+
+
 # Visitas Management
 @router.get("/visitas/", response_model=List[VisitaSchema])
 def list_visitas(
@@ -85,6 +109,11 @@ def create_visita(
 
     db_visita = Visita(**visita.dict())
     db.add(db_visita)
+    contadores_service.registrar_visita_status(db, None, VisitaStatus.agendada)
+    rollups_service.registrar_visita(
+        db, None, (rollups_service.dia_utc(db_visita.data_hora), VisitaStatus.agendada)
+    )
+    notificacoes_service.notificar_visita(db, db_visita, imovel)
     db.commit()
     db.refresh(db_visita)
 
@@ -123,10 +152,18 @@ def update_visita(
             detail="Visita não encontrada",
         )
 
+    status_anterior = db_visita.status
+    dia_anterior = rollups_service.dia_utc(db_visita.data_hora)
     update_data = visita_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_visita, field, value)
 
+    contadores_service.registrar_visita_status(db, status_anterior, db_visita.status)
+    rollups_service.registrar_visita(
+        db,
+        (dia_anterior, status_anterior),
+        (rollups_service.dia_utc(db_visita.data_hora), db_visita.status),
+    )
     db.commit()
     db.refresh(db_visita)
 
@@ -148,6 +185,10 @@ def delete_visita(
         )
 
     db.delete(db_visita)
+    contadores_service.registrar_visita_status(db, db_visita.status, None)
+    rollups_service.registrar_visita(
+        db, (rollups_service.dia_utc(db_visita.data_hora), db_visita.status), None
+    )
     db.commit()
 
     return None
@@ -159,7 +200,9 @@ def get_configuracoes(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    config = db.query(Configuracao).first()
+    # Lida do banco: o admin vê na hora o que outro worker acabou de gravar
+    # (o cache em memória fica para o endpoint público)
+    config = db.query(Configuracao).order_by(Configuracao.id).first()
 
     if not config:
         # Retorna configuração padrão se não existir
@@ -177,7 +220,7 @@ def update_configuracoes(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    config = db.query(Configuracao).first()
+    config = db.query(Configuracao).order_by(Configuracao.id).first()
 
     if not config:
         # Cria nova configuração se não existir
@@ -189,7 +232,8 @@ def update_configuracoes(
         for field, value in update_data.items():
             setattr(config, field, value)
 
+    # Os outros workers recarregam o cache ao ver a versão nova
+    versoes_service.incrementar(db, versoes_service.CONFIGURACAO)
     db.commit()
-    db.refresh(config)
 
-    return config
+    return cache_configuracao.carregar(db).admin
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 from app.db.session import get_db
-from app.core.security import verify_password, create_access_token, create_refresh_token, decode_token, get_password_hash
+from app.core.security import create_access_token, create_refresh_token, decode_token, password_hasher
 from app.schemas.user import Token, TokenRefresh, LoginRequest, UserCreate, User as UserSchema
 from app.models.user import User
 import logging
@@ -12,12 +13,15 @@ router = APIRouter()
 
 
 @router.post("/register/", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserCreate,
     db: Session = Depends(get_db),
 ):
+    # Acesso ao banco é síncrono: roda no threadpool; o bcrypt roda no pool de processos
     # Verificar se o username já existe
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == user_data.username).first()
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,7 +29,9 @@ def register(
         )
 
     # Verificar se o email já existe
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == user_data.email).first()
+    )
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -33,29 +39,34 @@ def register(
         )
 
     # Criar novo usuário
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
         hashed_password=hashed_password,
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    def _save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+
+    await run_in_threadpool(_save)
 
     return new_user
 
 
 @router.post("/token/", response_model=Token)
-def login(
+async def login(
     credentials: LoginRequest,
     db: Session = Depends(get_db),
 ):
     try:
         logger.info(f"Login attempt for username: {credentials.username}")
 
-        user = db.query(User).filter(User.username == credentials.username).first()
+        user = await run_in_threadpool(
+            lambda: db.query(User).filter(User.username == credentials.username).first()
+        )
 
         if not user:
             logger.warning(f"User not found: {credentials.username}")
@@ -65,7 +76,10 @@ def login(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        if not verify_password(credentials.password, user.hashed_password):
+        valid, new_hash = await password_hasher.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not valid:
             logger.warning(f"Invalid password for user: {credentials.username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,6 +87,12 @@ def login(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        # Atualiza o hash se o custo do bcrypt mudou (BCRYPT_ROUNDS)
+        if new_hash:
+            logger.info(f"Upgrading password hash for user: {user.username}")
+            user.hashed_password = new_hash
+            await run_in_threadpool(db.commit)
+
         logger.info(f"Creating tokens for user: {user.username}")
         access_token = create_access_token(
             data={"user_id": user.id, "username": user.username, "email": user.email}
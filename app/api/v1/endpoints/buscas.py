@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_db
+from app.core.deps import get_current_user
+from app.models.busca_salva import BuscaSalva
+from app.models.user import User
+from app.schemas.busca_salva import BuscaSalva as BuscaSalvaSchema, BuscaSalvaCreate
+from app.services import buscas_service, versoes_service
+
+router = APIRouter()
+
+
+@router.post("/", response_model=BuscaSalvaSchema, status_code=status.HTTP_201_CREATED)
+def create_busca(
+    busca: BuscaSalvaCreate,
+    db: Session = Depends(get_db),
+):
+    """Salva os filtros da listagem para receber alertas de novos imóveis que os satisfaçam"""
+    db_busca = BuscaSalva(
+        nome=busca.nome,
+        email=busca.email,
+        filtros=buscas_service.normalizar_filtros(busca.filtros.dict()),
+    )
+    db.add(db_busca)
+    versoes_service.incrementar(db, versoes_service.BUSCAS_SALVAS)
+    db.commit()
+    db.refresh(db_busca)
+
+    return db_busca
+
+
+@router.get("/", response_model=List[BuscaSalvaSchema])
+def list_buscas(
+    skip: int = 0,
+    limit: int = 100,
+    email: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    query = db.query(BuscaSalva)
+
+    if email:
+        query = query.filter(BuscaSalva.email == email)
+
+    return query.order_by(BuscaSalva.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.delete("/{busca_id}/", status_code=status.HTTP_204_NO_CONTENT)
+def delete_busca(
+    busca_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    db_busca = db.query(BuscaSalva).filter(BuscaSalva.id == busca_id).first()
+
+    if not db_busca:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Busca não encontrada",
+        )
+
+    db.delete(db_busca)
+    versoes_service.incrementar(db, versoes_service.BUSCAS_SALVAS)
+    db.commit()
+
+    return None
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from app.schemas.configuracao import ConfiguracaoPublica
+from app.services.configuracao_service import cache_configuracao
+
+router = APIRouter()
+
+# O navegador reutiliza por um minuto e depois revalida com If-None-Match (304 sem corpo)
+CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=86400"
+
+
+@router.get("/", response_model=ConfiguracaoPublica)
+def get_configuracao_publica(request: Request):
+    """Dados de contato da empresa, servidos do cache em memória com ETag"""
+    entrada = cache_configuracao.obter()
+    if entrada.publica is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Configurações não encontradas",
+        )
+
+    headers = {"etag": entrada.etag, "cache-control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or entrada.etag in tags or f"W/{entrada.etag}" in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=entrada.publica, media_type="application/json", headers=headers)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import List, Optional
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, and_, func
+from typing import Dict, List, Optional
+from app.db.session import SessionLocal, get_db
 from app.core.deps import get_current_user
 from app.models.imovel import Imovel, ImovelImagem
 from app.models.user import User
@@ -11,17 +11,43 @@ from app.schemas.imovel import (
     ImovelCreate,
     ImovelUpdate,
 )
+import asyncio
 import os
-import shutil
+import uuid
+import aiofiles.os
 from datetime import datetime
 from app.core.config import settings
+from app.core.uploads import save_upload, validate_upload_size
+from app.services.image_processing import image_pipeline, analisar_imagem, ImagemInvalida, VARIANTES
+from app.services.responsive_images import get_srcset, srcset_attr
 from app.services.cloudinary_service import cloudinary_service
+from starlette.concurrency import run_in_threadpool
+from app.models.visita import Visita
+from app.services import (
+    autocomplete_service,
+    buscas_service,
+    contadores_service,
+    dedup_service,
+    geolocalizacao,
+    mapa_service,
+    mercado_service,
+    rollups_service,
+    versoes_service,
+)
+from app.services.autocomplete_service import indice_autocomplete
+from app.services.similares_service import indice_similares
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Máximo de imóveis em /similares/
+SIMILARES_MAX = 24
+
+# Máximo de ids por chamada de /batch/
+BATCH_MAX = 50
+
 
 def get_imovel_preco(imovel: Imovel) -> float:
     if imovel.tipo_negocio.value == "venda":
@@ -30,29 +56,61 @@ def get_imovel_preco(imovel: Imovel) -> float:
         return imovel.valor_aluguel or 0
 
 
-def get_imagem_principal(imovel: Imovel) -> Optional[str]:
+def get_imagem_url(imagem: ImovelImagem, variante: Optional[str] = None) -> str:
+    """
+    URL da menor versão com pelo menos a largura da variante pedida
+    (card/gallery/full); sem variante, a imagem original
+    """
+    if not variante:
+        return imagem.imagem_url
+
+    srcset = get_srcset(imagem)
+    largura_alvo = VARIANTES[variante]
+    return next(
+        (item["url"] for item in srcset if item["largura"] and item["largura"] >= largura_alvo),
+        srcset[-1]["url"],
+    )
+
+
+def get_imagem_principal_obj(imovel: Imovel) -> Optional[ImovelImagem]:
     imagem_principal = next(
         (img for img in imovel.imagens if img.principal), None
     )
     if imagem_principal:
-        return imagem_principal.imagem_url
+        return imagem_principal
     elif imovel.imagens:
-        return imovel.imagens[0].imagem_url
+        return imovel.imagens[0]
     return None
 
 
-def serialize_imovel(imovel: Imovel) -> dict:
+def get_imagem_principal(imovel: Imovel, variante: Optional[str] = None) -> Optional[str]:
+    imagem = get_imagem_principal_obj(imovel)
+    return get_imagem_url(imagem, variante) if imagem else None
+
+
+def serialize_imovel(imovel: Imovel, variante_imagem: Optional[str] = None) -> dict:
+    """
+    Serializa um imóvel; em listagens use variante_imagem="card" para que
+    imagem_principal aponte para a versão reduzida
+    """
+    data = ImovelSchema.from_orm(imovel).dict()
+    for imagem, imagem_data in zip(imovel.imagens, data["imagens"]):
+        imagem_data["srcset"] = get_srcset(imagem)
+
+    principal = get_imagem_principal_obj(imovel)
     return {
-        **ImovelSchema.from_orm(imovel).dict(),
+        **data,
         "preco": get_imovel_preco(imovel),
-        "imagem_principal": get_imagem_principal(imovel),
+        "imagem_principal": get_imagem_url(principal, variante_imagem) if principal else None,
+        "imagem_principal_srcset": srcset_attr(get_srcset(principal)) if principal else None,
+        # Exibidos no card enquanto a imagem carrega
+        "imagem_principal_placeholder": principal.placeholder if principal else None,
+        "imagem_principal_cor": principal.cor_dominante if principal else None,
     }
 
 
-@router.get("/", response_model=dict)
-def list_imoveis(
-    skip: int = 0,
-    limit: int = 12,
+def filtrar_imoveis(
+    query,
     tipo_negocio: Optional[str] = None,
     tipo_imovel: Optional[str] = None,
     cidade: Optional[str] = None,
@@ -61,6 +119,8 @@ def list_imoveis(
     preco_venda__lte: Optional[float] = None,
     area_total__gte: Optional[float] = None,
     area_total__lte: Optional[float] = None,
+    preco_m2__gte: Optional[float] = None,
+    preco_m2__lte: Optional[float] = None,
     quartos: Optional[int] = None,
     banheiros: Optional[int] = None,
     vagas_garagem: Optional[int] = None,
@@ -68,13 +128,8 @@ def list_imoveis(
     aceita_pets: Optional[bool] = None,
     mobiliado: Optional[bool] = None,
     search: Optional[str] = None,
-    ordering: str = "-criado_em",
-    page: int = 1,
-    db: Session = Depends(get_db),
 ):
-    query = db.query(Imovel)
-
-    # Filtros
+    """Aplica os filtros de listagem (compartilhados por list_imoveis e clusters)"""
     if tipo_negocio:
         query = query.filter(Imovel.tipo_negocio == tipo_negocio)
     if tipo_imovel:
@@ -91,6 +146,10 @@ def list_imoveis(
         query = query.filter(Imovel.area_total >= area_total__gte)
     if area_total__lte:
         query = query.filter(Imovel.area_total <= area_total__lte)
+    if preco_m2__gte:
+        query = query.filter(Imovel.preco_m2 >= preco_m2__gte)
+    if preco_m2__lte:
+        query = query.filter(Imovel.preco_m2 <= preco_m2__lte)
     if quartos:
         query = query.filter(Imovel.quartos >= quartos)
     if banheiros:
@@ -113,8 +172,99 @@ def list_imoveis(
             )
         )
 
+    return query
+
+
+@router.get("/", response_model=dict)
+def list_imoveis(
+    skip: int = 0,
+    limit: int = 12,
+    tipo_negocio: Optional[str] = None,
+    tipo_imovel: Optional[str] = None,
+    cidade: Optional[str] = None,
+    bairro: Optional[str] = None,
+    preco_venda__gte: Optional[float] = None,
+    preco_venda__lte: Optional[float] = None,
+    area_total__gte: Optional[float] = None,
+    area_total__lte: Optional[float] = None,
+    preco_m2__gte: Optional[float] = None,
+    preco_m2__lte: Optional[float] = None,
+    quartos: Optional[int] = None,
+    banheiros: Optional[int] = None,
+    vagas_garagem: Optional[int] = None,
+    piscina: Optional[bool] = None,
+    aceita_pets: Optional[bool] = None,
+    mobiliado: Optional[bool] = None,
+    search: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=geolocalizacao.RAIO_MAXIMO_KM),
+    bbox: Optional[str] = None,
+    ordering: Optional[str] = None,
+    page: int = 1,
+    db: Session = Depends(get_db),
+):
+    """
+    Lista imóveis com filtros e paginação
+
+    Busca geográfica: `lat`/`lng` com `radius_km` (padrão geolocalizacao.RAIO_PADRAO_KM)
+    e/ou `bbox=lng_min,lat_min,lng_max,lat_max` (área visível do mapa).
+    Com `lat`/`lng` a ordenação padrão é `distancia` e cada resultado traz
+    `distancia_km`. Preço por m²: `preco_m2__gte`/`preco_m2__lte` e
+    `ordering=preco_m2` ou `-preco_m2`.
+    """
+    query = db.query(Imovel)
+
+    ponto = None
+    if (lat is None) != (lng is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe lat e lng juntos",
+        )
+    if lat is not None:
+        ponto = (lat, lng)
+        query = query.filter(
+            geolocalizacao.filtro_raio(lat, lng, radius_km or geolocalizacao.RAIO_PADRAO_KM)
+        )
+    elif radius_km is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="radius_km exige lat e lng",
+        )
+    if bbox:
+        query = query.filter(geolocalizacao.filtro_retangulo(*geolocalizacao.parse_bbox(bbox)))
+
+    query = filtrar_imoveis(
+        query,
+        tipo_negocio=tipo_negocio,
+        tipo_imovel=tipo_imovel,
+        cidade=cidade,
+        bairro=bairro,
+        preco_venda__gte=preco_venda__gte,
+        preco_venda__lte=preco_venda__lte,
+        area_total__gte=area_total__gte,
+        area_total__lte=area_total__lte,
+        preco_m2__gte=preco_m2__gte,
+        preco_m2__lte=preco_m2__lte,
+        quartos=quartos,
+        banheiros=banheiros,
+        vagas_garagem=vagas_garagem,
+        piscina=piscina,
+        aceita_pets=aceita_pets,
+        mobiliado=mobiliado,
+        search=search,
+    )
+
     # Ordenação
-    if ordering.startswith("-"):
+    ordering = ordering or ("distancia" if ponto else "-criado_em")
+    if ordering == "distancia":
+        if not ponto:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ordenação por distância exige lat e lng",
+            )
+        query = query.order_by(geolocalizacao.distancia_quadrada_expr(*ponto), Imovel.id)
+    elif ordering.startswith("-"):
         order_field = ordering[1:]
         query = query.order_by(getattr(Imovel, order_field).desc())
     else:
@@ -128,7 +278,12 @@ def list_imoveis(
     imoveis = query.offset(offset).limit(limit).all()
 
     # Serialização
-    results = [serialize_imovel(imovel) for imovel in imoveis]
+    results = [serialize_imovel(imovel, variante_imagem="card") for imovel in imoveis]
+    if ponto:
+        for imovel, result in zip(imoveis, results):
+            result["distancia_km"] = round(
+                geolocalizacao.distancia_km(*ponto, imovel.latitude, imovel.longitude), 2
+            )
 
     # Calcula URLs de próxima e anterior
     next_page = page + 1 if offset + limit < total_count else None
@@ -155,7 +310,174 @@ def list_destaques(
         .all()
     )
 
-    return [serialize_imovel(imovel) for imovel in imoveis]
+    return [serialize_imovel(imovel, variante_imagem="card") for imovel in imoveis]
+
+
+@router.get("/clusters/", response_model=dict)
+def list_clusters(
+    bbox: str,
+    zoom: int = Query(..., ge=0, le=22),
+    tipo_negocio: Optional[str] = None,
+    tipo_imovel: Optional[str] = None,
+    cidade: Optional[str] = None,
+    bairro: Optional[str] = None,
+    preco_venda__gte: Optional[float] = None,
+    preco_venda__lte: Optional[float] = None,
+    area_total__gte: Optional[float] = None,
+    area_total__lte: Optional[float] = None,
+    preco_m2__gte: Optional[float] = None,
+    preco_m2__lte: Optional[float] = None,
+    quartos: Optional[int] = None,
+    banheiros: Optional[int] = None,
+    vagas_garagem: Optional[int] = None,
+    piscina: Optional[bool] = None,
+    aceita_pets: Optional[bool] = None,
+    mobiliado: Optional[bool] = None,
+    search: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Agrupa os imóveis da área visível do mapa (`bbox=lng_min,lat_min,lng_max,lat_max`)
+
+    Cada cluster traz centroide, quantidade e faixa de preço por tipo de
+    negócio. Só com filtros de tipo a resposta vem dos agregados por célula;
+    com os demais filtros é calculada sobre os imóveis da área.
+    """
+    retangulo = geolocalizacao.parse_bbox(bbox)
+    precisao = mapa_service.precisao_do_zoom(zoom)
+
+    outros_filtros = dict(
+        cidade=cidade,
+        bairro=bairro,
+        preco_venda__gte=preco_venda__gte,
+        preco_venda__lte=preco_venda__lte,
+        area_total__gte=area_total__gte,
+        area_total__lte=area_total__lte,
+        preco_m2__gte=preco_m2__gte,
+        preco_m2__lte=preco_m2__lte,
+        quartos=quartos,
+        banheiros=banheiros,
+        vagas_garagem=vagas_garagem,
+        piscina=piscina,
+        aceita_pets=aceita_pets,
+        mobiliado=mobiliado,
+        search=search,
+    )
+
+    if any(valor is not None for valor in outros_filtros.values()):
+        fonte = "imoveis"
+        query = filtrar_imoveis(
+            db.query(Imovel), tipo_negocio=tipo_negocio, tipo_imovel=tipo_imovel, **outros_filtros
+        )
+        clusters = mapa_service.clusters_filtrados(query, retangulo, precisao)
+    else:
+        fonte = "agregados"
+        clusters = mapa_service.clusters_agregados(
+            db, retangulo, precisao, tipo_negocio=tipo_negocio, tipo_imovel=tipo_imovel
+        )
+
+    return {
+        "zoom": zoom,
+        "precisao": precisao,
+        "fonte": fonte,
+        "total": sum(cluster["quantidade"] for cluster in clusters),
+        "clusters": clusters,
+    }
+
+
+@router.get("/autocomplete/", response_model=List[dict])
+def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=autocomplete_service.LIMITE_MAXIMO),
+    db: Session = Depends(get_db),
+):
+    """
+    Sugestões de cidade, bairro e palavras do título que começam com `q`
+
+    Ignora acentos e maiúsculas; ordenadas pela quantidade de imóveis.
+    Respondidas de um índice em memória, sem consultar o banco.
+    """
+    return indice_autocomplete.sugestoes(db, q, limit)
+
+
+@router.get("/estatisticas/preco-m2/", response_model=List[dict])
+def get_estatisticas_preco_m2(
+    cidade: Optional[str] = None,
+    bairro: Optional[str] = None,
+    tipo_negocio: Optional[str] = None,
+    tipo_imovel: Optional[str] = None,
+    por_bairro: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Preço por m² por segmento: quantidade, média, p10, p25, mediana, p75 e p90
+
+    Sem `bairro`, uma linha por cidade/tipo (ou uma por bairro com
+    `por_bairro=true`). Lido da tabela mantida a cada escrita de imóvel;
+    reconstrução: `python backfill_preco_m2.py`.
+    """
+    return mercado_service.consultar(
+        db,
+        cidade=cidade,
+        bairro=bairro,
+        tipo_negocio=tipo_negocio,
+        tipo_imovel=tipo_imovel,
+        por_bairro=por_bairro,
+    )
+
+
+def _parse_ids(valores: List[str]) -> List[int]:
+    """Ids em "3,1,2" e/ou repetidos (ids=3&ids=1), sem duplicatas e na ordem pedida"""
+    ids = []
+    for valor in valores:
+        for parte in valor.split(","):
+            parte = parte.strip()
+            if not parte:
+                continue
+            try:
+                ids.append(int(parte))
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Id inválido: '{parte}'",
+                )
+    return list(dict.fromkeys(ids))
+
+
+@router.get("/batch/", response_model=dict)
+def get_imoveis_batch(
+    ids: List[str] = Query(..., description="Ids separados por vírgula, ex: 12,7,31"),
+    db: Session = Depends(get_db),
+):
+    """
+    Vários imóveis de uma vez (favoritos, comparação), na ordem dos ids
+
+    Duas consultas, qualquer que seja a quantidade: imóveis e imagens
+    (selectinload). Ids que não existem vêm em `nao_encontrados`.
+    """
+    imovel_ids = _parse_ids(ids)
+    if not imovel_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe ao menos um id",
+        )
+    if len(imovel_ids) > BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No máximo {BATCH_MAX} imóveis por chamada",
+        )
+
+    imoveis = {
+        imovel.id: imovel
+        for imovel in db.query(Imovel)
+        .options(selectinload(Imovel.imagens))
+        .filter(Imovel.id.in_(imovel_ids))
+    }
+
+    return {
+        "imoveis": [serialize_imovel(imoveis[imovel_id]) for imovel_id in imovel_ids if imovel_id in imoveis],
+        "nao_encontrados": [imovel_id for imovel_id in imovel_ids if imovel_id not in imoveis],
+    }
 
 
 @router.get("/{imovel_id}/", response_model=dict)
@@ -174,6 +496,36 @@ def get_imovel(
     return serialize_imovel(imovel)
 
 
+@router.get("/{imovel_id}/similares/", response_model=List[dict])
+def list_similares(
+    imovel_id: int,
+    limit: int = Query(6, ge=1, le=SIMILARES_MAX),
+    db: Session = Depends(get_db),
+):
+    """Imóveis mais parecidos (preço, área, cômodos, tipo, localização e comodidades)"""
+    vizinhos = indice_similares.similares(db, imovel_id, limit)
+
+    if vizinhos is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Imóvel não encontrado",
+        )
+
+    imoveis = {
+        imovel.id: imovel
+        for imovel in db.query(Imovel)
+        .options(selectinload(Imovel.imagens))
+        .filter(Imovel.id.in_([vizinho_id for vizinho_id, _ in vizinhos]))
+    }
+
+    # Removidos por outro worker ainda não sincronizados ficam de fora
+    return [
+        {**serialize_imovel(imoveis[vizinho_id], "card"), "distancia_similaridade": round(distancia, 4)}
+        for vizinho_id, distancia in vizinhos
+        if vizinho_id in imoveis
+    ]
+
+
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 def create_imovel(
     imovel: ImovelCreate,
@@ -181,9 +533,20 @@ def create_imovel(
     db: Session = Depends(get_db),
 ):
     db_imovel = Imovel(**imovel.dict())
+    geolocalizacao.atualizar_localizacao(db_imovel)
+    mercado_service.calcular_preco_m2(db_imovel)
     db.add(db_imovel)
+    contadores_service.incrementar(db, contadores_service.IMOVEIS, 1)
+    db.flush()
+    mapa_service.registrar(db, None, mapa_service.posicao(db_imovel))
+    segmentos_mercado = mercado_service.registrar(db, None, mercado_service.posicao(db_imovel))
+    versoes_service.incrementar(db, versoes_service.IMOVEIS)
+    buscas_service.marcar_pendente(db, db_imovel.id)
     db.commit()
+    mercado_service.agendar_quantis(segmentos_mercado)
     db.refresh(db_imovel)
+    indice_similares.atualizar(db_imovel)
+    indice_autocomplete.registrar(None, autocomplete_service.termos(db_imovel))
 
     return serialize_imovel(db_imovel)
 
@@ -203,12 +566,30 @@ def update_imovel(
             detail="Imóvel não encontrado",
         )
 
+    posicao_anterior = mapa_service.posicao(db_imovel)
+    mercado_anterior = mercado_service.posicao(db_imovel)
+    termos_anteriores = autocomplete_service.termos(db_imovel)
+    cep_anterior = db_imovel.cep
+
     update_data = imovel_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_imovel, field, value)
 
+    # Novo CEP sem coordenadas explícitas: as coordenadas acompanham o CEP
+    cep_alterado = db_imovel.cep != cep_anterior and not {"latitude", "longitude"} & update_data.keys()
+    geolocalizacao.atualizar_localizacao(db_imovel, cep_alterado=cep_alterado)
+    mercado_service.calcular_preco_m2(db_imovel)
+
+    db.flush()
+    mapa_service.registrar(db, posicao_anterior, mapa_service.posicao(db_imovel))
+    segmentos_mercado = mercado_service.registrar(db, mercado_anterior, mercado_service.posicao(db_imovel))
+    versoes_service.incrementar(db, versoes_service.IMOVEIS)
+    buscas_service.marcar_pendente(db, db_imovel.id)
     db.commit()
+    mercado_service.agendar_quantis(segmentos_mercado)
     db.refresh(db_imovel)
+    indice_similares.atualizar(db_imovel)
+    indice_autocomplete.registrar(termos_anteriores, autocomplete_service.termos(db_imovel))
 
     return serialize_imovel(db_imovel)
 
@@ -227,8 +608,20 @@ def delete_imovel(
             detail="Imóvel não encontrado",
         )
 
+    posicao_anterior = mapa_service.posicao(db_imovel)
+    mercado_anterior = mercado_service.posicao(db_imovel)
+    termos_anteriores = autocomplete_service.termos(db_imovel)
+    contadores_service.registrar_remocao_imovel(db, imovel_id)
+    rollups_service.descontar_visitas_em_cascata(db, Visita.imovel_id == imovel_id)
     db.delete(db_imovel)
+    db.flush()
+    mapa_service.registrar(db, posicao_anterior, None)
+    segmentos_mercado = mercado_service.registrar(db, mercado_anterior, None)
+    versoes_service.incrementar(db, versoes_service.IMOVEIS)
     db.commit()
+    mercado_service.agendar_quantis(segmentos_mercado)
+    indice_similares.remover(imovel_id)
+    indice_autocomplete.registrar(termos_anteriores, None)
 
     return None
 
@@ -255,6 +648,155 @@ def toggle_destaque(
     return serialize_imovel(db_imovel)
 
 
+def _analisar_upload(file: UploadFile) -> dict:
+    try:
+        file.file.seek(0)
+        return analisar_imagem(file.file)
+    except ImagemInvalida as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Arquivo de imagem inválido: {str(e)}",
+        )
+    finally:
+        file.file.seek(0)
+
+
+async def _armazenar_objeto(imovel_id: int, file: UploadFile) -> dict:
+    """
+    Envia um arquivo ao armazenamento configurado (Cloudinary ou local)
+
+    Returns:
+        Dict com imagem_url, variantes (None no Cloudinary), storage_key, largura,
+        altura, placeholder e cor_dominante (campos de ImovelImagem)
+    """
+    # Sufixo aleatório evita colisão entre uploads no mesmo segundo (ex: lote)
+    nome_base = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    if settings.USE_CLOUDINARY:
+        # Upload para Cloudinary
+        logger.info(f"Fazendo upload de imagem para Cloudinary - Imóvel ID: {imovel_id}")
+
+        # Placeholder e cor dominante calculados localmente antes do envio
+        # (decodificação reduzida, em thread)
+        placeholder = await run_in_threadpool(_analisar_upload, file)
+
+        result = await cloudinary_service.upload_image(
+            file=file,
+            folder=f"imobiliaria/imoveis/{imovel_id}",
+            public_id=f"imovel_{imovel_id}_{nome_base}"
+        )
+
+        logger.info(f"Upload para Cloudinary concluído: {result['public_id']}")
+        return {
+            "imagem_url": result["secure_url"],
+            "variantes": None,
+            "storage_key": result["public_id"],
+            "largura": result.get("width"),
+            "altura": result.get("height"),
+            **placeholder,
+        }
+
+    # Upload local (fallback)
+    logger.info(f"Fazendo upload local - Imóvel ID: {imovel_id}")
+
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    await aiofiles.os.makedirs(tmp_dir, exist_ok=True)
+
+    file_extension = os.path.splitext(file.filename or "")[1]
+    file_path = os.path.join(tmp_dir, f"{nome_base}{file_extension}")
+
+    # Escrita assíncrona em blocos, com limite de tamanho
+    await save_upload(file, file_path)
+
+    # Variantes card/gallery/full em WebP e JPEG, sem metadados, gravadas em
+    # UPLOAD_DIR/media com o hash do conteúdo no nome; o original é descartado
+    processada = await image_pipeline.processar(file_path)
+
+    full = processada["variantes"]["full"]
+    return {
+        "imagem_url": full["jpeg"],
+        "variantes": processada["variantes"],
+        "storage_key": full["jpeg"][len("/uploads/"):],
+        "largura": full["largura"],
+        "altura": full["altura"],
+        "placeholder": processada["placeholder"],
+        "cor_dominante": processada["cor_dominante"],
+    }
+
+
+# Uploads em andamento por conteudo_hash: envios simultâneos do mesmo arquivo
+# (ex: repetido no mesmo lote) esperam o primeiro em vez de armazenar de novo
+_uploads_em_andamento: Dict[str, asyncio.Future] = {}
+
+
+def _buscar_duplicata(imovel_id: int, hashes: dict) -> Optional[dict]:
+    # Sessão própria: no upload em lote várias buscas rodam em threads ao mesmo tempo
+    with SessionLocal() as db:
+        existente = dedup_service.buscar_duplicata(db, hashes, imovel_id)
+        return dedup_service.campos_da_duplicata(existente) if existente else None
+
+
+async def armazenar_imagem(imovel_id: int, file: UploadFile) -> dict:
+    """
+    Armazena um upload reaproveitando o objeto de uma imagem idêntica já salva
+
+    O arquivo é identificado pelo SHA-256 (cópia exata) e, com
+    DEDUP_PERCEPTUAL, pelo dHash (mesma foto recomprimida, só entre fotos
+    deste imóvel). Em caso de duplicata nada é gravado nem enviado: a
+    nova linha aponta para as mesmas URLs/variantes da existente.
+
+    Returns:
+        Campos de ImovelImagem (ver _armazenar_objeto), incluindo
+        conteudo_hash e phash do arquivo enviado
+    """
+    await validate_upload_size(file)
+    hashes = await run_in_threadpool(dedup_service.calcular_hashes, file.file)
+    novos_hashes = {"conteudo_hash": hashes["conteudo_hash"], "phash": hashes["phash"]}
+
+    em_andamento = _uploads_em_andamento.get(hashes["conteudo_hash"])
+    if em_andamento is not None:
+        return {**await asyncio.shield(em_andamento), **novos_hashes}
+
+    duplicata = await run_in_threadpool(_buscar_duplicata, imovel_id, hashes)
+    if duplicata:
+        logger.info(
+            f"Imagem duplicada ({hashes['conteudo_hash'][:12]}) reaproveitada - Imóvel ID: {imovel_id}"
+        )
+        return {**duplicata, **novos_hashes}
+
+    futuro = asyncio.get_running_loop().create_future()
+    _uploads_em_andamento[hashes["conteudo_hash"]] = futuro
+    try:
+        armazenada = {**await _armazenar_objeto(imovel_id, file), **novos_hashes}
+        futuro.set_result(armazenada)
+        return armazenada
+    except Exception as e:
+        futuro.set_exception(e)
+        # Evita "exception was never retrieved" quando ninguém mais esperava
+        futuro.exception()
+        raise
+    except BaseException:
+        futuro.cancel()
+        raise
+    finally:
+        _uploads_em_andamento.pop(hashes["conteudo_hash"], None)
+
+
+def serialize_imagem(db_imagem: ImovelImagem) -> dict:
+    return {
+        "id": db_imagem.id,
+        "imagem_url": db_imagem.imagem_url,
+        "largura": db_imagem.largura,
+        "altura": db_imagem.altura,
+        "variantes": db_imagem.variantes,
+        "srcset": get_srcset(db_imagem),
+        "placeholder": db_imagem.placeholder,
+        "cor_dominante": db_imagem.cor_dominante,
+        "ordem": db_imagem.ordem,
+        "principal": db_imagem.principal,
+    }
+
+
 @router.post("/{imovel_id}/upload_imagem/")
 async def upload_imagem(
     imovel_id: int,
@@ -264,7 +806,10 @@ async def upload_imagem(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    db_imovel = db.query(Imovel).filter(Imovel.id == imovel_id).first()
+    # Handler assíncrono: tudo que bloqueia (banco, disco, SDK) roda fora do event loop
+    db_imovel = await run_in_threadpool(
+        lambda: db.query(Imovel).filter(Imovel.id == imovel_id).first()
+    )
 
     if not db_imovel:
         raise HTTPException(
@@ -273,70 +818,158 @@ async def upload_imagem(
         )
 
     try:
-        if settings.USE_CLOUDINARY:
-            # Upload para Cloudinary
-            logger.info(f"Fazendo upload de imagem para Cloudinary - Imóvel ID: {imovel_id}")
-
-            # Gera public_id único
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            public_id = f"imovel_{imovel_id}_{timestamp}"
-
-            result = await cloudinary_service.upload_image(
-                file=file,
-                folder=f"imobiliaria/imoveis/{imovel_id}",
-                public_id=public_id
+        armazenada = await armazenar_imagem(imovel_id, file)
+
+        def _save_imagem():
+            # Se for principal, remove principal de outras imagens
+            if principal:
+                db.query(ImovelImagem).filter(
+                    ImovelImagem.imovel_id == imovel_id
+                ).update({"principal": False})
+
+            # Cria registro no banco
+            db_imagem = ImovelImagem(
+                imovel_id=imovel_id,
+                **armazenada,
+                ordem=ordem,
+                principal=principal,
             )
+            db.add(db_imagem)
+            db.commit()
+            db.refresh(db_imagem)
+            return db_imagem
 
-            imagem_url = result["secure_url"]
-            cloudinary_public_id = result["public_id"]
+        db_imagem = await run_in_threadpool(_save_imagem)
 
-            logger.info(f"Upload para Cloudinary concluído: {cloudinary_public_id}")
-        else:
-            # Upload local (fallback)
-            logger.info(f"Fazendo upload local - Imóvel ID: {imovel_id}")
+        return serialize_imagem(db_imagem)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao fazer upload de imagem: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao fazer upload da imagem: {str(e)}"
+        )
+
+
+@router.post("/{imovel_id}/upload_imagens/")
+async def upload_imagens(
+    imovel_id: int,
+    files: List[UploadFile] = File(...),
+    principal_index: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload de várias imagens em uma requisição
+
+    Os arquivos são armazenados em paralelo (até BATCH_UPLOAD_CONCURRENCY por
+    vez) e todas as linhas de ImovelImagem são gravadas em uma única transação.
+    `ordem` continua a partir da última imagem do imóvel, na ordem dos arquivos.
+    `principal_index` escolhe a principal; sem ele, o primeiro arquivo enviado
+    com sucesso vira principal apenas se o imóvel ainda não tiver uma.
+    Falhas são reportadas por arquivo, sem abortar o lote.
+    """
+    if len(files) > settings.MAX_BATCH_UPLOAD_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Envie no máximo {settings.MAX_BATCH_UPLOAD_FILES} arquivos por vez",
+        )
+    if principal_index is not None and not 0 <= principal_index < len(files):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="principal_index fora do intervalo de arquivos enviados",
+        )
 
-            upload_dir = os.path.join(settings.UPLOAD_DIR, "imoveis", str(imovel_id))
-            os.makedirs(upload_dir, exist_ok=True)
+    def _load_estado():
+        db_imovel = db.query(Imovel).filter(Imovel.id == imovel_id).first()
+        if not db_imovel:
+            return None, 0, False
+        max_ordem = (
+            db.query(func.max(ImovelImagem.ordem))
+            .filter(ImovelImagem.imovel_id == imovel_id)
+            .scalar()
+        )
+        tem_principal = db.query(
+            db.query(ImovelImagem)
+            .filter(ImovelImagem.imovel_id == imovel_id, ImovelImagem.principal == True)
+            .exists()
+        ).scalar()
+        return db_imovel, (max_ordem + 1 if max_ordem is not None else 0), tem_principal
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_extension = os.path.splitext(file.filename)[1]
-            filename = f"{timestamp}{file_extension}"
-            file_path = os.path.join(upload_dir, filename)
+    db_imovel, proxima_ordem, tem_principal = await run_in_threadpool(_load_estado)
 
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+    if not db_imovel:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Imóvel não encontrado",
+        )
 
-            imagem_url = f"/uploads/imoveis/{imovel_id}/{filename}"
-            cloudinary_public_id = None
+    semaforo = asyncio.Semaphore(settings.BATCH_UPLOAD_CONCURRENCY)
+
+    async def _armazenar(file: UploadFile):
+        async with semaforo:
+            try:
+                return await armazenar_imagem(imovel_id, file)
+            except HTTPException as e:
+                return {"erro": e.detail, "status_code": e.status_code}
+            except Exception as e:
+                logger.error(f"Erro ao enviar {file.filename}: {str(e)}", exc_info=True)
+                return {"erro": f"Erro ao fazer upload da imagem: {str(e)}", "status_code": 500}
+
+    armazenadas = await asyncio.gather(*[_armazenar(file) for file in files])
+
+    # Índices dos arquivos enviados com sucesso, na ordem original
+    sucesso = [i for i, item in enumerate(armazenadas) if "erro" not in item]
+    if principal_index is not None and principal_index in sucesso:
+        indice_principal = principal_index
+    elif principal_index is None and not tem_principal and sucesso:
+        indice_principal = sucesso[0]
+    else:
+        indice_principal = None
 
-        # Se for principal, remove principal de outras imagens
-        if principal:
+    def _save_imagens():
+        if indice_principal is not None:
             db.query(ImovelImagem).filter(
                 ImovelImagem.imovel_id == imovel_id
             ).update({"principal": False})
 
-        # Cria registro no banco
-        db_imagem = ImovelImagem(
-            imovel_id=imovel_id,
-            imagem_url=imagem_url,
-            ordem=ordem,
-            principal=principal,
-        )
-        db.add(db_imagem)
+        novas = {}
+        for posicao, i in enumerate(sucesso):
+            novas[i] = ImovelImagem(
+                imovel_id=imovel_id,
+                **armazenadas[i],
+                ordem=proxima_ordem + posicao,
+                principal=(i == indice_principal),
+            )
+        db.add_all(novas.values())
         db.commit()
-        db.refresh(db_imagem)
+        return {i: serialize_imagem(imagem) for i, imagem in novas.items()}
 
-        return {
-            "id": db_imagem.id,
-            "imagem_url": db_imagem.imagem_url,
-            "ordem": db_imagem.ordem,
-            "principal": db_imagem.principal,
-        }
-    except HTTPException:
-        raise
+    try:
+        salvas = await run_in_threadpool(_save_imagens) if sucesso else {}
     except Exception as e:
-        logger.error(f"Erro ao fazer upload de imagem: {str(e)}", exc_info=True)
+        await run_in_threadpool(db.rollback)
+        logger.error(f"Erro ao gravar imagens do lote: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao fazer upload da imagem: {str(e)}"
+            detail=f"Erro ao gravar as imagens: {str(e)}"
         )
+
+    resultados = []
+    for i, file in enumerate(files):
+        if i in salvas:
+            resultados.append({"arquivo": file.filename, "ok": True, "imagem": salvas[i]})
+        else:
+            resultados.append({
+                "arquivo": file.filename,
+                "ok": False,
+                "erro": armazenadas[i]["erro"],
+                "status_code": armazenadas[i]["status_code"],
+            })
+
+    return {
+        "enviadas": len(salvas),
+        "falhas": len(files) - len(salvas),
+        "resultados": resultados,
+    }
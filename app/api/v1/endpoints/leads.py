@@ -3,9 +3,11 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.session import get_db
 from app.core.deps import get_current_user
-from app.models.lead import Lead
+from app.models.lead import Lead, LeadStatus
 from app.models.user import User
+from app.models.visita import Visita
 from app.schemas.lead import Lead as LeadSchema, LeadCreate, LeadUpdate
+from app.services import contadores_service, leads_service, notificacoes_service, rollups_service
 
 router = APIRouter()
 
@@ -15,8 +17,29 @@ def create_contato(
     lead: LeadCreate,
     db: Session = Depends(get_db),
 ):
+    """
+    Registra um contato; se a mesma pessoa (e-mail ou telefone) tem um lead
+    aberto com contato recente, o contato é mesclado nele
+
+    O aviso à imobiliária é gravado na mesma transação e enviado pelo
+    notificacoes_worker.py.
+    """
     db_lead = Lead(**lead.dict())
+    leads_service.atualizar_chaves(db_lead)
+
+    existente = leads_service.buscar_duplicado(db, db_lead)
+    if existente:
+        leads_service.mesclar_contato(existente, db_lead)
+        notificacoes_service.notificar_lead(db, existente, repetido=True)
+        db.commit()
+        db.refresh(existente)
+        return existente
+
     db.add(db_lead)
+    contadores_service.incrementar(db, contadores_service.LEADS, 1)
+    contadores_service.registrar_lead_status(db, None, LeadStatus.novo)
+    rollups_service.registrar_lead(db, rollups_service.dia_utc(None), None, LeadStatus.novo)
+    notificacoes_service.notificar_lead(db, db_lead)
     db.commit()
     db.refresh(db_lead)
 
@@ -72,10 +95,15 @@ def update_lead(
             detail="Lead não encontrado",
         )
 
+    status_anterior = db_lead.status
     update_data = lead_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_lead, field, value)
 
+    contadores_service.registrar_lead_status(db, status_anterior, db_lead.status)
+    rollups_service.registrar_lead(
+        db, rollups_service.dia_utc(db_lead.created_at), status_anterior, db_lead.status
+    )
     db.commit()
     db.refresh(db_lead)
 
@@ -96,6 +124,11 @@ def delete_lead(
             detail="Lead não encontrado",
         )
 
+    contadores_service.registrar_remocao_lead(db, db_lead)
+    rollups_service.registrar_lead(
+        db, rollups_service.dia_utc(db_lead.created_at), db_lead.status, None
+    )
+    rollups_service.descontar_visitas_em_cascata(db, Visita.lead_id == lead_id)
     db.delete(db_lead)
     db.commit()
 
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, imoveis, leads, admin
+from app.api.v1.endpoints import auth, imoveis, leads, admin, buscas, configuracoes
 
 api_router = APIRouter()
 
@@ -7,3 +7,5 @@ api_router.include_router(auth.router, tags=["auth"])
 api_router.include_router(imoveis.router, prefix="/imoveis", tags=["imoveis"])
 api_router.include_router(leads.router, prefix="/leads", tags=["leads"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(buscas.router, prefix="/buscas", tags=["buscas"])
+api_router.include_router(configuracoes.router, prefix="/configuracoes", tags=["configuracoes"])
@@ -9,29 +9,87 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api"
 
     DATABASE_URL: str
+    # Pool por processo: com N workers o total de conexões é N * (POOL_SIZE + MAX_OVERFLOW)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Hash de senhas (bcrypt)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # Processos dedicados ao bcrypt
+    PASSWORD_HASH_QUEUE_SIZE: int = 32  # Operações aguardando antes de recusar (503)
+
     UPLOAD_DIR: str = "uploads"
-    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB por arquivo
+    MAX_UPLOAD_REQUEST_SIZE: int = 11 * 1024 * 1024  # Corpo multipart inteiro (arquivo + campos)
+    UPLOAD_CHUNK_SIZE: int = 256 * 1024  # Bloco de leitura/escrita dos uploads
+    MAX_BATCH_UPLOAD_FILES: int = 40  # Arquivos por requisição em upload_imagens
+    MAX_BATCH_UPLOAD_REQUEST_SIZE: int = 200 * 1024 * 1024  # Corpo multipart do upload em lote
+    BATCH_UPLOAD_CONCURRENCY: int = 4  # Arquivos processados/enviados ao mesmo tempo por lote
+    IMAGE_PROCESS_WORKERS: int = 2  # Processos para gerar variantes das imagens locais
 
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME: Optional[str] = None
     CLOUDINARY_API_KEY: Optional[str] = None
     CLOUDINARY_API_SECRET: Optional[str] = None
     USE_CLOUDINARY: bool = False  # Se True, usa Cloudinary; se False, usa armazenamento local
+    CLOUDINARY_FAKE: bool = False  # Substitui o Cloudinary por um armazenamento falso em memória (testes)
+
+    # Uploads para o armazenamento remoto (fora do event loop)
+    UPLOAD_MAX_CONCURRENCY: int = 4
+    UPLOAD_TIMEOUT_SECONDS: float = 30.0
+    UPLOAD_MAX_RETRIES: int = 3
+    UPLOAD_RETRY_BACKOFF_SECONDS: float = 0.5
+
+    # Deduplicação de imagens (arquivos idênticos sempre; perceptual só com a flag)
+    DEDUP_PERCEPTUAL: bool = False  # Reaproveita fotos visualmente idênticas (mesmo dHash) do mesmo imóvel
+
+    # Geolocalização (coordenadas pelo CEP, base offline)
+    CEP_DATASET_PATH: Optional[str] = None  # CSV prefixo,latitude,longitude (padrão: app/data/cep_coordenadas.csv)
+
+    # Imóveis semelhantes (índice em memória em cada worker)
+    SIMILARES_SYNC_SEGUNDOS: float = 2.0  # Intervalo mínimo entre verificações de escritas de outros workers
+
+    # Autocomplete de endereços (índice em memória em cada worker)
+    AUTOCOMPLETE_SYNC_SEGUNDOS: float = 30.0  # Intervalo mínimo entre remontagens por escritas de outros workers
+
+    # Leads (deduplicação por e-mail/telefone normalizados)
+    LEAD_DEDUP_JANELA_DIAS: int = 30  # Contato repetido dentro do prazo é mesclado no lead aberto (0 desliga)
+
+    # Configuração da empresa (cache em memória do endpoint público)
+    CONFIGURACAO_SYNC_SEGUNDOS: float = 5.0  # Intervalo mínimo entre verificações de alterações feitas por outros workers
+
+    # Notificações (tabela notificacoes, drenada por notificacoes_worker.py)
+    SMTP_HOST: Optional[str] = None  # Sem host o e-mail fica desligado; em desenvolvimento: localhost + python smtp_sink.py
+    SMTP_PORT: int = 1025
+    SMTP_USER: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = False
+    SMTP_REMETENTE: str = "nao-responda@imobiliaria.local"
+    SMS_WEBHOOK_URL: Optional[str] = None  # POST JSON {canal, para, mensagem}; sem URL o canal fica desligado
+    WHATSAPP_WEBHOOK_URL: Optional[str] = None
+    NOTIFICACOES_LOTE: int = 50  # Mensagens reservadas por vez por worker
+    NOTIFICACOES_CONCORRENCIA: int = 4  # Envios simultâneos por worker
+    NOTIFICACOES_MAX_TENTATIVAS: int = 8
+    NOTIFICACOES_RETRY_BACKOFF_SEGUNDOS: float = 30.0  # Dobra a cada tentativa (até 1h)
+    NOTIFICACOES_TIMEOUT_SEGUNDOS: float = 10.0  # Por envio (SMTP ou webhook)
+    NOTIFICACOES_INTERVALO_SEGUNDOS: float = 2.0  # Espera do worker quando a fila está vazia
+
+    # Reconciliação periódica dos contadores do dashboard (0 desativa)
+    CONTADORES_RECONCILIACAO_SEGUNDOS: int = 3600
 
     # CORS Configuration
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000,https://frontend-imobiliaria.vercel.app,https://*.vercel.app"
     FRONTEND_URL: Optional[str] = None
     ENVIRONMENT: str = "development"
 
-    @field_validator('USE_CLOUDINARY', mode='before')
+    @field_validator('USE_CLOUDINARY', 'CLOUDINARY_FAKE', 'SMTP_STARTTLS', mode='before')
     @classmethod
     def parse_use_cloudinary(cls, v):
-        """Aceita variações de true/false para USE_CLOUDINARY"""
+        """Aceita variações de true/false para USE_CLOUDINARY, CLOUDINARY_FAKE e SMTP_STARTTLS"""
         if isinstance(v, bool):
             return v
         if isinstance(v, str):
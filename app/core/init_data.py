@@ -24,6 +24,7 @@ def init_admin_user():
             return
 
         # Cria novo usuário admin
+        # Hash síncrono: roda antes do app aceitar requisições, não disputa o threadpool
         admin_user = User(
             username="admin",
             email="admin@imobiliaria.com",
@@ -1,10 +1,24 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+import logging
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# min_rounds/max_rounds fazem o passlib marcar como desatualizado qualquer hash
+# com custo diferente de BCRYPT_ROUNDS, permitindo o rehash transparente no login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,6 +29,75 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e, se o hash estiver com custo desatualizado,
+    retorna um novo hash para ser persistido (senão None)
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherPool:
+    """
+    Pool de processos dedicado ao bcrypt
+
+    Cada hash consome ~200ms de CPU; rodar no threadpool do FastAPI ocupa
+    as mesmas threads que atendem a listagem pública. Aqui o trabalho vai
+    para processos separados, com fila limitada: quando a fila enche a
+    requisição recebe 503 em vez de degradar o restante da API.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        self._max_workers = max_workers
+        self._queue_size = queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Cria o pool apenas no primeiro uso (lazy loading)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            logger.info(f"Pool de hash de senhas iniciado com {self._max_workers} processos")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._pending >= self._max_workers + self._queue_size:
+            logger.warning("Fila de hash de senhas cheia, recusando requisição")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, tente novamente em instantes",
+            )
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_workers)
+
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,190 @@
+"""
+Servidor de arquivos de /uploads com cache agressivo
+
+- Arquivos nomeados pelo hash do conteúdo (`{sha256[:32]}.{ext}`) recebem
+  `Cache-Control: immutable` de um ano e ETag forte igual ao hash.
+- Arquivos antigos (nomes por timestamp) continuam servidos, com cache curto
+  e ETag derivada de mtime/tamanho.
+- If-None-Match → 304; Range de um intervalo → 206 (If-Range respeitado).
+- Se existir `arquivo.br` / `arquivo.gz` e o cliente aceitar, a versão
+  pré-comprimida é enviada com Content-Encoding.
+"""
+import os
+import re
+import stat
+from mimetypes import guess_type
+from typing import Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+
+HASHED_NAME = re.compile(r"^([0-9a-f]{32})\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+DEFAULT_CACHE = "public, max-age=3600"
+
+# (content-encoding, sufixo do arquivo pré-comprimido), em ordem de preferência
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(range_header: str, total: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um header Range de intervalo único
+
+    Returns:
+        (início, fim) inclusivos; None se o header não for suportado
+        (múltiplos intervalos ou outra unidade), caso em que o arquivo é
+        enviado inteiro
+
+    Raises:
+        ValueError: intervalo impossível de satisfazer (416)
+    """
+    unidade, _, intervalos = range_header.partition("=")
+    if unidade.strip().lower() != "bytes" or "," in intervalos:
+        return None
+
+    inicio_str, _, fim_str = intervalos.strip().partition("-")
+    try:
+        if inicio_str == "":
+            # bytes=-N: os últimos N bytes
+            sufixo = int(fim_str)
+            if sufixo <= 0:
+                raise ValueError
+            return max(0, total - sufixo), total - 1
+        inicio = int(inicio_str)
+        fim = int(fim_str) if fim_str else total - 1
+    except ValueError:
+        raise ValueError("Range inválido")
+
+    if inicio >= total or fim < inicio:
+        raise ValueError("Range fora do arquivo")
+    return inicio, min(fim, total - 1)
+
+
+class FileRangeResponse(Response):
+    """Resposta 206 que envia apenas o intervalo pedido, em blocos"""
+
+    def __init__(self, path: str, inicio: int, fim: int, total: int, headers: dict, media_type: Optional[str]):
+        self.path = path
+        self.inicio = inicio
+        self.fim = fim
+        super().__init__(
+            status_code=206,
+            headers={
+                **headers,
+                "content-range": f"bytes {inicio}-{fim}/{total}",
+                "content-length": str(fim - inicio + 1),
+            },
+            media_type=media_type,
+        )
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"] != "HEAD":
+            restante = self.fim - self.inicio + 1
+            async with await anyio.open_file(self.path, "rb") as f:
+                await f.seek(self.inicio)
+                while restante > 0:
+                    chunk = await f.read(min(RANGE_CHUNK_SIZE, restante))
+                    if not chunk:
+                        break
+                    restante -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _stat_regular(path: str) -> Optional[os.stat_result]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles com ETag forte, cache immutable, Range e arquivos pré-comprimidos"""
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        try:
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        except PermissionError:
+            raise HTTPException(status_code=401)
+
+        if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+
+        request_headers = Headers(scope=scope)
+        range_header = request_headers.get("range")
+        nome = os.path.basename(full_path)
+        media_type = guess_type(nome)[0] or "application/octet-stream"
+
+        hashed = HASHED_NAME.match(nome)
+        if hashed:
+            etag_base = hashed.group(1)
+            cache_control = IMMUTABLE_CACHE
+        else:
+            etag_base = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+            cache_control = DEFAULT_CACHE
+
+        # Versão pré-comprimida (só sem Range: os offsets seriam do arquivo comprimido)
+        encoding = None
+        if not range_header:
+            accept_encoding = request_headers.get("accept-encoding", "")
+            for candidato, sufixo in PRECOMPRESSED:
+                if candidato not in accept_encoding:
+                    continue
+                comprimido_stat = await anyio.to_thread.run_sync(_stat_regular, full_path + sufixo)
+                if comprimido_stat is not None:
+                    encoding = candidato
+                    full_path, stat_result = full_path + sufixo, comprimido_stat
+                    break
+
+        # Cada representação tem sua própria ETag forte
+        etag = f'"{etag_base}-{encoding}"' if encoding else f'"{etag_base}"'
+        headers = {
+            "etag": etag,
+            "cache-control": cache_control,
+            "accept-ranges": "bytes",
+            "vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            if "*" in tags or etag in tags or f"W/{etag}" in tags:
+                return Response(status_code=304, headers=headers)
+
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range == etag):
+            try:
+                intervalo = parse_range(range_header, stat_result.st_size)
+            except ValueError:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "content-range": f"bytes */{stat_result.st_size}"},
+                )
+            if intervalo is not None:
+                inicio, fim = intervalo
+                return FileRangeResponse(
+                    full_path, inicio, fim, stat_result.st_size, headers, media_type
+                )
+
+        return FileResponse(
+            full_path,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=media_type,
+        )
@@ -0,0 +1,168 @@
+"""
+Leitura de uploads em blocos, com limite de tamanho aplicado incrementalmente
+
+Nenhuma função aqui carrega o arquivo inteiro em memória: o pico por upload
+fica limitado a UPLOAD_CHUNK_SIZE.
+"""
+import os
+import uuid
+from typing import AsyncIterator, Optional
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile, status
+from app.core.config import settings
+
+
+def _file_too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo muito grande. Tamanho máximo: {max_size / (1024*1024)}MB",
+    )
+
+
+async def iter_upload_chunks(
+    file: UploadFile,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Lê o upload em blocos, abortando (413) assim que passar de max_size
+
+    Args:
+        file: Arquivo de upload do FastAPI (lido a partir da posição atual)
+        max_size: Limite em bytes (padrão MAX_UPLOAD_SIZE)
+        chunk_size: Tamanho do bloco (padrão UPLOAD_CHUNK_SIZE)
+    """
+    max_size = max_size or settings.MAX_UPLOAD_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    total = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_size:
+            raise _file_too_large(max_size)
+        yield chunk
+
+
+async def validate_upload_size(file: UploadFile, max_size: Optional[int] = None) -> int:
+    """
+    Confere o tamanho percorrendo o upload em blocos e volta ao início
+
+    Returns:
+        Tamanho do arquivo em bytes
+    """
+    total = 0
+    async for chunk in iter_upload_chunks(file, max_size):
+        total += len(chunk)
+    await file.seek(0)
+    return total
+
+
+async def save_upload(file: UploadFile, dest_path: str, max_size: Optional[int] = None) -> int:
+    """
+    Grava o upload em disco de forma assíncrona (aiofiles), bloco a bloco
+
+    O arquivo é escrito com nome temporário e só aparece em dest_path quando
+    completo; se o limite for excedido o parcial é removido.
+
+    Returns:
+        Tamanho gravado em bytes
+    """
+    tmp_path = f"{dest_path}.{uuid.uuid4().hex}.part"
+    total = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as buffer:
+            async for chunk in iter_upload_chunks(file, max_size):
+                await buffer.write(chunk)
+                total += len(chunk)
+        await aiofiles.os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
+        raise
+    return total
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejeita com 413 requisições multipart acima de MAX_UPLOAD_REQUEST_SIZE
+    (MAX_BATCH_UPLOAD_REQUEST_SIZE nas rotas de upload em lote)
+
+    Com Content-Length a recusa acontece antes de ler o corpo. Sem ele
+    (chunked), os bytes são contados conforme chegam e a resposta do app é
+    trocada por 413 assim que o limite é ultrapassado.
+    """
+
+    BATCH_PATH_SUFFIX = "/upload_imagens/"
+
+    def __init__(self, app, max_size: Optional[int] = None, batch_max_size: Optional[int] = None):
+        self.app = app
+        self.max_size = max_size or settings.MAX_UPLOAD_REQUEST_SIZE
+        self.batch_max_size = batch_max_size or settings.MAX_BATCH_UPLOAD_REQUEST_SIZE
+
+    async def _send_413(self, send):
+        body = b'{"detail":"Requisi\\u00e7\\u00e3o muito grande"}'
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        if scope.get("path", "").endswith(self.BATCH_PATH_SUFFIX):
+            max_size = self.batch_max_size
+        else:
+            max_size = self.max_size
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_size:
+            return await self._send_413(send)
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await self._send_413(send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+
+        if exceeded and not response_started:
+            await self._send_413(send)
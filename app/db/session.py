@@ -10,8 +10,8 @@ logger = logging.getLogger(__name__)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Verifica conexões antes de usar
-    pool_size=5,  # Número de conexões no pool
-    max_overflow=10,  # Conexões extras permitidas
+    pool_size=settings.DB_POOL_SIZE,  # Número de conexões no pool (por processo)
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Conexões extras permitidas
     pool_recycle=3600,  # Recicla conexões a cada hora
     echo=False  # Não loga SQL em produção
 )
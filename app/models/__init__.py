@@ -3,5 +3,28 @@ from app.models.imovel import Imovel, ImovelImagem
 from app.models.lead import Lead
 from app.models.visita import Visita
 from app.models.configuracao import Configuracao
+from app.models.contador import Contador
+from app.models.estatistica_diaria import EstatisticaDiaria
+from app.models.mapa_celula import MapaCelula
+from app.models.versao import Versao
+from app.models.estatistica_preco_m2 import EstatisticaPrecoM2
+from app.models.busca_salva import BuscaSalva, AlertaBusca, ImovelPendenteAlerta
+from app.models.notificacao import Notificacao
 
-__all__ = ["User", "Imovel", "ImovelImagem", "Lead", "Visita", "Configuracao"]
+__all__ = [
+    "User",
+    "Imovel",
+    "ImovelImagem",
+    "Lead",
+    "Visita",
+    "Configuracao",
+    "Contador",
+    "EstatisticaDiaria",
+    "MapaCelula",
+    "Versao",
+    "EstatisticaPrecoM2",
+    "BuscaSalva",
+    "AlertaBusca",
+    "ImovelPendenteAlerta",
+    "Notificacao",
+]
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class BuscaSalva(Base):
+    """Filtros de list_imoveis salvos por um cliente para receber alertas de novos imóveis"""
+    __tablename__ = "buscas_salvas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nome = Column(String(200), nullable=False)
+    email = Column(String(200), nullable=False, index=True)
+    # Mesmos nomes e semântica dos parâmetros de GET /api/imoveis/
+    filtros = Column(JSON, nullable=False)
+    ativa = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AlertaBusca(Base):
+    """
+    Imóvel que satisfaz uma busca salva (fila de notificações)
+
+    Um imóvel gera no máximo um alerta por busca, mesmo que seja editado e
+    volte a satisfazê-la.
+    """
+    __tablename__ = "alertas_busca"
+
+    id = Column(Integer, primary_key=True, index=True)
+    busca_id = Column(Integer, ForeignKey("buscas_salvas.id", ondelete="CASCADE"), nullable=False)
+    imovel_id = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Quando o alerta virou e-mail na tabela notificacoes (notificacoes_service.transferir_alertas)
+    enviado_em = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("busca_id", "imovel_id", name="uq_alertas_busca_busca_imovel"),
+        # Alertas ainda não enviados
+        Index("ix_alertas_busca_pendentes", "created_at", postgresql_where=enviado_em.is_(None)),
+    )
+
+
+class ImovelPendenteAlerta(Base):
+    """
+    Imóvel criado ou editado ainda não comparado com as buscas salvas
+
+    Gravado na transação da escrita do imóvel e drenado pelo
+    notificacoes_worker.py. Sem chave estrangeira: remover o imóvel não
+    precisa esperar o worker, que ignora ids que não existem mais.
+    """
+    __tablename__ = "alertas_pendentes"
+
+    imovel_id = Column(Integer, primary_key=True)
+    # Última escrita do imóvel (escritas repetidas antes do worker viram uma linha só)
+    marcado_em = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class Contador(Base):
+    """
+    Contagens agregadas mantidas incrementalmente (ex: "leads", "visitas:agendada")
+    Atualizadas na mesma transação das escritas e reconciliadas periodicamente
+    """
+    __tablename__ = "contadores"
+
+    chave = Column(String(100), primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Date
+from app.db.session import Base
+
+
+class EstatisticaDiaria(Base):
+    """
+    Agregados diários pré-calculados para o analytics do admin
+
+    metrica: "leads" (por dia de criação, dimensao = status do lead)
+             "visitas" (por dia da visita, dimensao = status da visita)
+    A chave primária (metrica, dia, dimensao) atende às consultas por intervalo de datas.
+    """
+    __tablename__ = "estatisticas_diarias"
+
+    metrica = Column(String(50), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    dimensao = Column(String(50), primary_key=True, default="")
+    valor = Column(Integer, nullable=False, default=0)
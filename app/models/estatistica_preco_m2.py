@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class EstatisticaPrecoM2(Base):
+    """
+    Distribuição do preço por m² por segmento de mercado
+
+    Há uma linha por (cidade, bairro, tipo_negocio, tipo_imovel) e outra
+    para a cidade inteira, com bairro = "*" (TODOS_BAIRROS). Quantis com
+    interpolação linear (como percentile_cont). O preço é o de venda ou o
+    aluguel mensal, conforme o tipo_negocio.
+
+    quantidade, soma e media são atualizadas a cada escrita; os quantis são
+    recalculados logo depois, fora da transação (quantis_pendentes).
+    """
+    __tablename__ = "estatisticas_preco_m2"
+
+    cidade = Column(String(100), primary_key=True)
+    bairro = Column(String(100), primary_key=True)
+    tipo_negocio = Column(String(20), primary_key=True)
+    tipo_imovel = Column(String(20), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    soma = Column(Float, nullable=False, default=0)
+    media = Column(Float, nullable=True)
+    p10 = Column(Float, nullable=True)
+    p25 = Column(Float, nullable=True)
+    mediana = Column(Float, nullable=True)
+    p75 = Column(Float, nullable=True)
+    p90 = Column(Float, nullable=True)
+    # Incrementada a cada escrita: um recálculo de quantis só grava se nada mudou desde a leitura
+    versao = Column(Integer, nullable=False, default=0)
+    quantis_pendentes = Column(Boolean, nullable=False, default=False)
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum, Index, JSON, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -29,6 +29,8 @@ class Imovel(Base):
     # Preços
     preco_venda = Column(Float, nullable=True)
     valor_aluguel = Column(Float, nullable=True)
+    # Preço (venda ou aluguel, conforme o negócio) / área total, gravado na escrita
+    preco_m2 = Column(Float, nullable=True)
 
     # Características
     area_total = Column(Float, nullable=False)
@@ -45,6 +47,10 @@ class Imovel(Base):
     cidade = Column(String(100), nullable=False)
     estado = Column(String(2), nullable=False)
     cep = Column(String(10), nullable=False)
+    # Coordenadas (informadas ou obtidas do CEP) e geohash para busca por área
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True)
 
     # Extras
     piscina = Column(Boolean, default=False)
@@ -59,13 +65,63 @@ class Imovel(Base):
     # Relacionamentos
     imagens = relationship("ImovelImagem", back_populates="imovel", cascade="all, delete-orphan")
 
+    # Índices dos caminhos quentes (criados pela migração 0002)
+    __table_args__ = (
+        # Listagem padrão (ordering=-criado_em)
+        Index("ix_imoveis_criado_em", "criado_em"),
+        # /destaques/: índice parcial, só as linhas em destaque
+        Index(
+            "ix_imoveis_destaque_criado_em",
+            "destaque",
+            "criado_em",
+            postgresql_where=text("destaque = true"),
+        ),
+        # Filtros de negócio/tipo + faixa de preço
+        Index("ix_imoveis_negocio_tipo_preco_venda", "tipo_negocio", "tipo_imovel", "preco_venda"),
+        Index(
+            "ix_imoveis_negocio_tipo_valor_aluguel",
+            "tipo_negocio",
+            "tipo_imovel",
+            "valor_aluguel",
+            postgresql_where=text("tipo_negocio = 'aluguel'"),
+        ),
+        # Busca por raio/bbox: intervalos de prefixo de geohash (migração 0007)
+        Index("ix_imoveis_geohash", "geohash"),
+        # Sincronização incremental dos índices em memória (migração 0009)
+        Index("ix_imoveis_atualizado_em", "atualizado_em"),
+        # Ordenação/filtro por preço do m² e recálculo das estatísticas por segmento (migração 0010)
+        Index("ix_imoveis_preco_m2", "preco_m2"),
+        Index(
+            "ix_imoveis_segmento_preco_m2",
+            "cidade",
+            "tipo_negocio",
+            "tipo_imovel",
+            "bairro",
+            "preco_m2",
+        ),
+    )
+
 
 class ImovelImagem(Base):
     __tablename__ = "imovel_imagens"
 
     id = Column(Integer, primary_key=True, index=True)
-    imovel_id = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False)
+    imovel_id = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False, index=True)
     imagem_url = Column(String(500), nullable=False)
+    # Chave no armazenamento (public_id do Cloudinary ou caminho relativo em UPLOAD_DIR)
+    storage_key = Column(String(300), nullable=True)
+    # Dimensões da imagem servida em imagem_url
+    largura = Column(Integer, nullable=True)
+    altura = Column(Integer, nullable=True)
+    # Prévia minúscula (data URI) e cor dominante, exibidas enquanto a imagem carrega
+    placeholder = Column(Text, nullable=True)
+    cor_dominante = Column(String(7), nullable=True)
+    # URLs das variantes redimensionadas (armazenamento local):
+    # {"card": {"largura", "altura", "webp", "jpeg"}, "gallery": {...}, "full": {...}}
+    variantes = Column(JSON, nullable=True)
+    # Hashes do arquivo enviado para deduplicação: SHA-256 e dHash perceptual de 64 bits
+    conteudo_hash = Column(String(64), nullable=True, index=True)
+    phash = Column(String(16), nullable=True, index=True)
     ordem = Column(Integer, default=0)
     principal = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
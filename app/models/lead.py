@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
 from sqlalchemy.sql import func
 import enum
 from app.db.session import Base
@@ -23,5 +23,20 @@ class Lead(Base):
     mensagem = Column(Text, nullable=True)
     origem = Column(String(50), nullable=True)
     status = Column(Enum(LeadStatus), default=LeadStatus.novo)
+    # Chaves de deduplicação (leads_service.normalizar_email / normalizar_telefone)
+    email_normalizado = Column(String(200), nullable=True)
+    telefone_normalizado = Column(String(20), nullable=True)
+    # Contatos repetidos da mesma pessoa são mesclados no lead aberto
+    quantidade_contatos = Column(Integer, nullable=False, default=1)
+    ultimo_contato_em = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Listagem do admin (ordem por created_at, filtro opcional por status)
+        Index("ix_leads_status_created_at", "status", "created_at"),
+        Index("ix_leads_created_at", "created_at"),
+        # Busca de duplicados na entrada de contatos (migração 0012)
+        Index("ix_leads_email_normalizado", "email_normalizado"),
+        Index("ix_leads_telefone_normalizado", "telefone_normalizado"),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.db.session import Base
+
+
+class MapaCelula(Base):
+    """
+    Agregados dos imóveis por célula de geohash, para o agrupamento do mapa
+
+    Há uma linha por (precisao, celula, tipo_negocio, tipo_imovel), em todas
+    as precisões de PRECISOES_MAPA; cada nível de zoom lê uma precisão.
+    soma_lat/soma_lng dão o centroide (soma / quantidade). preco é o preço
+    de venda ou o aluguel, conforme o tipo_negocio.
+    """
+    __tablename__ = "mapa_celulas"
+
+    precisao = Column(Integer, primary_key=True)
+    celula = Column(String(12), primary_key=True)
+    tipo_negocio = Column(String(20), primary_key=True)
+    tipo_imovel = Column(String(20), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    soma_lat = Column(Float, nullable=False, default=0)
+    soma_lng = Column(Float, nullable=False, default=0)
+    preco_min = Column(Float, nullable=True)
+    preco_max = Column(Float, nullable=True)
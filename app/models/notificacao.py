@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index, text
+from sqlalchemy.sql import func
+import enum
+from app.db.session import Base
+
+
+class CanalNotificacao(str, enum.Enum):
+    email = "email"
+    sms = "sms"
+    whatsapp = "whatsapp"
+
+
+class StatusNotificacao(str, enum.Enum):
+    pendente = "pendente"
+    enviada = "enviada"
+    falhou = "falhou"
+
+
+class Notificacao(Base):
+    """
+    Mensagem a enviar (outbox)
+
+    Gravada na mesma transação do lead/visita que a originou e enviada
+    depois pelo notificacoes_worker.py, fora das requisições.
+    """
+    __tablename__ = "notificacoes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    canal = Column(Enum(CanalNotificacao), nullable=False)
+    destinatario = Column(String(200), nullable=False)
+    assunto = Column(String(300), nullable=True)
+    corpo = Column(Text, nullable=False)
+    # Ex: "lead:12", "visita:7", "busca:3"
+    origem = Column(String(50), nullable=True)
+
+    status = Column(Enum(StatusNotificacao), nullable=False, default=StatusNotificacao.pendente)
+    tentativas = Column(Integer, nullable=False, default=0)
+    # Próxima tentativa; enquanto um worker envia, também serve de prazo da reserva
+    disponivel_em = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    ultimo_erro = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    enviada_em = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Fila do worker: só as pendentes, na ordem em que ficam disponíveis
+        Index("ix_notificacoes_pendentes", "disponivel_em", postgresql_where=text("status = 'pendente'")),
+    )
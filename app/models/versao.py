@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String
+from app.db.session import Base
+
+
+class Versao(Base):
+    """
+    Número de versão de um conjunto de dados cacheado em memória (ex: "imoveis")
+
+    Incrementado na mesma transação das escritas; cada processo compara com a
+    versão que carregou para saber se o cache local está desatualizado.
+    """
+    __tablename__ = "versoes"
+
+    chave = Column(String(100), primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
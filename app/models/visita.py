@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.sql import func
 import enum
 from app.db.session import Base
@@ -15,8 +15,8 @@ class Visita(Base):
     __tablename__ = "visitas"
 
     id = Column(Integer, primary_key=True, index=True)
-    imovel_id = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False)
-    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), nullable=True)
+    imovel_id = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False, index=True)
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), nullable=True, index=True)
 
     nome_cliente = Column(String(200), nullable=False)
     email_cliente = Column(String(200), nullable=False)
@@ -28,3 +28,9 @@ class Visita(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Agenda do admin (filtro por status + intervalo de data_hora)
+        Index("ix_visitas_status_data_hora", "status", "data_hora"),
+        Index("ix_visitas_data_hora", "data_hora"),
+    )
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional
+from datetime import datetime
+from app.schemas.imovel import TipoImovelEnum, TipoNegocioEnum
+
+
+class FiltrosBusca(BaseModel):
+    """Mesmos filtros de GET /api/imoveis/"""
+    tipo_negocio: Optional[TipoNegocioEnum] = None
+    tipo_imovel: Optional[TipoImovelEnum] = None
+    cidade: Optional[str] = None
+    bairro: Optional[str] = None
+    preco_venda__gte: Optional[float] = None
+    preco_venda__lte: Optional[float] = None
+    area_total__gte: Optional[float] = None
+    area_total__lte: Optional[float] = None
+    preco_m2__gte: Optional[float] = None
+    preco_m2__lte: Optional[float] = None
+    quartos: Optional[int] = None
+    banheiros: Optional[int] = None
+    vagas_garagem: Optional[int] = None
+    piscina: Optional[bool] = None
+    aceita_pets: Optional[bool] = None
+    mobiliado: Optional[bool] = None
+    search: Optional[str] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    radius_km: Optional[float] = Field(None, gt=0, le=200)
+    bbox: Optional[str] = None
+
+
+class BuscaSalvaCreate(BaseModel):
+    nome: str
+    email: EmailStr
+    filtros: FiltrosBusca
+
+
+class BuscaSalva(BaseModel):
+    id: int
+    nome: str
+    email: EmailStr
+    filtros: dict
+    ativa: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
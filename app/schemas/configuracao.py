@@ -27,3 +27,17 @@ class Configuracao(ConfiguracaoBase):
 
     class Config:
         from_attributes = True
+
+
+class ConfiguracaoPublica(BaseModel):
+    """Dados de contato exibidos no site (sem as preferências de notificação)"""
+    nome_empresa: str
+    email: str
+    telefone: str
+    whatsapp: str
+    site: Optional[str] = None
+    endereco: str
+    sobre: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -26,8 +26,19 @@ class ImovelImagemCreate(ImovelImagemBase):
     pass
 
 
+class ImagemSrc(BaseModel):
+    largura: Optional[int] = None
+    url: str
+
+
 class ImovelImagem(ImovelImagemBase):
     id: int
+    largura: Optional[int] = None
+    altura: Optional[int] = None
+    placeholder: Optional[str] = None
+    cor_dominante: Optional[str] = None
+    variantes: Optional[Dict[str, Any]] = None
+    srcset: List[ImagemSrc] = []
 
     class Config:
         from_attributes = True
@@ -52,6 +63,9 @@ class ImovelBase(BaseModel):
     cidade: str
     estado: str = Field(..., min_length=2, max_length=2)
     cep: str
+    # Sem coordenadas, são obtidas do CEP
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     piscina: bool = False
     aceita_pets: bool = False
     mobiliado: bool = False
@@ -81,6 +95,8 @@ class ImovelUpdate(BaseModel):
     cidade: Optional[str] = None
     estado: Optional[str] = None
     cep: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     piscina: Optional[bool] = None
     aceita_pets: Optional[bool] = None
     mobiliado: Optional[bool] = None
@@ -90,6 +106,7 @@ class ImovelUpdate(BaseModel):
 class Imovel(ImovelBase):
     id: int
     preco: Optional[float] = None
+    preco_m2: Optional[float] = None
     imagem_principal: Optional[str] = None
     imagens: List[ImovelImagem] = []
     criado_em: datetime
@@ -33,6 +33,8 @@ class LeadUpdate(BaseModel):
 class Lead(LeadBase):
     id: int
     status: LeadStatusEnum
+    quantidade_contatos: int = 1
+    ultimo_contato_em: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,283 @@
+"""
+Autocomplete de cidade, bairro e palavras do título
+
+Cada processo mantém em memória os termos distintos (cidades, bairros e
+palavras dos títulos) com a quantidade de imóveis de cada um. As chaves de
+busca, sem acento e em minúsculas, ficam em uma lista ordenada: um prefixo
+vira um intervalo achado por busca binária. Os melhores termos dos
+prefixos com muitas chaves (as primeiras letras) ficam em cache e são
+ajustados a cada escrita, sem nova varredura.
+
+Escritas feitas por este processo são aplicadas na hora. As dos outros
+workers chegam pela versão "imoveis" (versoes_service): quando ela muda,
+o índice é remontado em uma thread e trocado de uma vez, sem bloquear as
+consultas.
+"""
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.imovel import Imovel
+from app.services import versoes_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+CIDADE = "cidade"
+BAIRRO = "bairro"
+TITULO = "titulo"
+
+# Desempate entre termos com a mesma quantidade de imóveis
+ORDEM_TIPOS = {CIDADE: 0, BAIRRO: 1, TITULO: 2}
+
+LIMITE_MAXIMO = 20
+
+# Prefixos com mais chaves que isso têm o resultado guardado em cache
+LIMITE_VARREDURA = 64
+
+TAMANHO_MINIMO_PALAVRA = 3
+PALAVRAS_IGNORADAS = {
+    "com", "para", "por", "dos", "das", "uma", "sem", "que", "nos", "nas", "the",
+}
+
+
+class Termo(NamedTuple):
+    tipo: str
+    chave: str
+    # Cidade normalizada (bairros com o mesmo nome em cidades diferentes são termos diferentes)
+    contexto: str = ""
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas, sem acentos e com qualquer pontuação virando um espaço"""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(re.split(r"[^0-9a-z]+", sem_acentos.lower())).strip()
+
+
+def _palavras_do_titulo(titulo: Optional[str]) -> Dict[str, str]:
+    """{palavra normalizada: palavra como escrita} das palavras relevantes do título"""
+    palavras = {}
+    for palavra in re.findall(r"\w+", titulo or ""):
+        chave = normalizar(palavra)
+        if len(chave) >= TAMANHO_MINIMO_PALAVRA and not chave.isdigit() and chave not in PALAVRAS_IGNORADAS:
+            palavras.setdefault(chave, palavra.lower())
+    return palavras
+
+
+def termos(imovel: Imovel) -> Dict[Termo, Tuple[str, Optional[str]]]:
+    """Termos de um imóvel: {termo: (texto exibido, cidade exibida)}"""
+    cidade = normalizar(imovel.cidade)
+    resultado = {}
+    if cidade:
+        resultado[Termo(CIDADE, cidade)] = (imovel.cidade, None)
+        bairro = normalizar(imovel.bairro)
+        if bairro:
+            resultado[Termo(BAIRRO, bairro, cidade)] = (imovel.bairro, imovel.cidade)
+    for chave, palavra in _palavras_do_titulo(imovel.titulo).items():
+        resultado[Termo(TITULO, chave)] = (palavra, None)
+    return resultado
+
+
+def _chaves_de_busca(termo: Termo) -> List[str]:
+    """O nome inteiro e cada sufixo a partir de uma palavra ("lisboa" acha "Santo Antônio de Lisboa")"""
+    palavras = termo.chave.split(" ")
+    return [" ".join(palavras[i:]) for i in range(len(palavras))]
+
+
+class _Estado:
+    """Estrutura de um índice montado; só é alterada com o lock do IndiceAutocomplete"""
+
+    def __init__(self):
+        self.chaves: List[str] = []
+        self.termos_por_chave: Dict[str, List[Termo]] = {}
+        self.quantidades: Dict[Termo, int] = {}
+        self.textos: Dict[Termo, Tuple[str, Optional[str]]] = {}
+        self.cache: Dict[str, List[Termo]] = {}
+
+    @classmethod
+    def montar(cls, db: Session) -> "_Estado":
+        quantidades: Counter = Counter()
+        grafias: Dict[Termo, Counter] = {}
+
+        def contar(termo: Termo, texto: Tuple[str, Optional[str]], quantidade: int):
+            quantidades[termo] += quantidade
+            grafias.setdefault(termo, Counter())[texto] += quantidade
+
+        for cidade, quantidade in db.query(Imovel.cidade, func.count(Imovel.id)).group_by(Imovel.cidade):
+            chave = normalizar(cidade)
+            if chave:
+                contar(Termo(CIDADE, chave), (cidade, None), quantidade)
+
+        for cidade, bairro, quantidade in (
+            db.query(Imovel.cidade, Imovel.bairro, func.count(Imovel.id)).group_by(Imovel.cidade, Imovel.bairro)
+        ):
+            chave, contexto = normalizar(bairro), normalizar(cidade)
+            if chave and contexto:
+                contar(Termo(BAIRRO, chave, contexto), (bairro, cidade), quantidade)
+
+        for (titulo,) in db.query(Imovel.titulo).yield_per(5000):
+            for chave, palavra in _palavras_do_titulo(titulo).items():
+                contar(Termo(TITULO, chave), (palavra, None), 1)
+
+        estado = cls()
+        estado.quantidades = dict(quantidades)
+        # Grafia mais frequente de cada termo (ex.: "Florianópolis" x "Florianopolis")
+        estado.textos = {termo: contagem.most_common(1)[0][0] for termo, contagem in grafias.items()}
+        for termo in estado.quantidades:
+            for chave in _chaves_de_busca(termo):
+                estado.termos_por_chave.setdefault(chave, []).append(termo)
+        estado.chaves = sorted(estado.termos_por_chave)
+
+        # Aquece o cache das primeiras letras (os intervalos mais longos)
+        for tamanho in (1, 2):
+            for prefixo in sorted({chave[:tamanho] for chave in estado.chaves}):
+                estado.melhores(prefixo)
+        return estado
+
+    # -- consulta ------------------------------------------------------------
+
+    def _ordem(self, termo: Termo):
+        return (-self.quantidades.get(termo, 0), ORDEM_TIPOS[termo.tipo], termo.chave, termo.contexto)
+
+    def _varrer(self, inicio: int, fim: int) -> List[Termo]:
+        encontrados = {
+            termo
+            for chave in self.chaves[inicio:fim]
+            for termo in self.termos_por_chave[chave]
+            if self.quantidades.get(termo, 0) > 0
+        }
+        return sorted(encontrados, key=self._ordem)[:LIMITE_MAXIMO]
+
+    def melhores(self, prefixo: str) -> List[Termo]:
+        resultado = self.cache.get(prefixo)
+        if resultado is not None:
+            return resultado
+
+        inicio = bisect_left(self.chaves, prefixo)
+        # Primeira chave que não começa com o prefixo
+        fim = bisect_left(self.chaves, prefixo + "\uffff", inicio)
+        resultado = self._varrer(inicio, fim)
+        if fim - inicio > LIMITE_VARREDURA:
+            self.cache[prefixo] = resultado
+        return resultado
+
+    # -- escrita ---------------------------------------------------------------
+
+    def alterar(self, termo: Termo, texto: Tuple[str, Optional[str]], delta: int):
+        quantidade = self.quantidades.get(termo, 0) + delta
+        if termo not in self.quantidades:
+            self.textos[termo] = texto
+            for chave in _chaves_de_busca(termo):
+                if chave not in self.termos_por_chave:
+                    self.termos_por_chave[chave] = []
+                    insort(self.chaves, chave)
+                self.termos_por_chave[chave].append(termo)
+        self.quantidades[termo] = max(quantidade, 0)
+
+        for chave in _chaves_de_busca(termo):
+            for tamanho in range(1, len(chave) + 1):
+                prefixo = chave[:tamanho]
+                melhores = self.cache.get(prefixo)
+                if melhores is None:
+                    continue
+                if delta < 0:
+                    # O substituto pode estar fora do cache: recalcula na próxima consulta
+                    if termo in melhores:
+                        del self.cache[prefixo]
+                elif termo in melhores or len(melhores) < LIMITE_MAXIMO or self._ordem(termo) < self._ordem(melhores[-1]):
+                    # Um aumento só pode fazer o termo entrar ou subir no top
+                    novos = set(melhores)
+                    novos.add(termo)
+                    self.cache[prefixo] = sorted(novos, key=self._ordem)[:LIMITE_MAXIMO]
+
+
+class IndiceAutocomplete:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_carga = threading.Lock()
+        self._estado: Optional[_Estado] = None
+        self._versao: Optional[int] = None
+        self._verificado_em = 0.0
+        self._recarregando = False
+
+    def _carregar(self, db: Session):
+        inicio = time.perf_counter()
+        versao = versoes_service.obter(db, versoes_service.IMOVEIS)
+        estado = _Estado.montar(db)
+        with self._lock:
+            self._estado = estado
+            self._versao = versao
+            self._verificado_em = time.monotonic()
+        logger.info(
+            f"Autocomplete montado: {len(estado.quantidades)} termos em "
+            f"{(time.perf_counter() - inicio) * 1000:.0f}ms"
+        )
+
+    def _recarregar_se_mudou(self):
+        try:
+            with SessionLocal() as db:
+                if versoes_service.obter(db, versoes_service.IMOVEIS) != self._versao:
+                    self._carregar(db)
+        except Exception as e:
+            logger.error(f"Erro ao recarregar o autocomplete: {e}")
+        finally:
+            self._recarregando = False
+
+    def _verificar(self):
+        """Dispara (no máximo a cada AUTOCOMPLETE_SYNC_SEGUNDOS) a verificação de escritas de outros workers"""
+        if self._recarregando or time.monotonic() - self._verificado_em < settings.AUTOCOMPLETE_SYNC_SEGUNDOS:
+            return
+        self._recarregando = True
+        self._verificado_em = time.monotonic()
+        threading.Thread(target=self._recarregar_se_mudou, daemon=True).start()
+
+    def sugestoes(self, db: Session, q: str, limite: int = 8) -> List[dict]:
+        """Termos que começam com q (sem acento), do que tem mais imóveis para o que tem menos"""
+        if self._estado is None:
+            with self._lock_carga:
+                if self._estado is None:
+                    self._carregar(db)
+        else:
+            self._verificar()
+
+        prefixo = normalizar(q)
+        if not prefixo:
+            return []
+
+        with self._lock:
+            estado = self._estado
+            resultado = []
+            for termo in estado.melhores(prefixo)[:limite]:
+                texto, cidade = estado.textos[termo]
+                sugestao = {"tipo": termo.tipo, "texto": texto, "quantidade": estado.quantidades[termo]}
+                if termo.tipo == BAIRRO:
+                    sugestao["cidade"] = cidade
+                resultado.append(sugestao)
+            return resultado
+
+    def registrar(
+        self,
+        anteriores: Optional[Dict[Termo, Tuple[str, Optional[str]]]],
+        novos: Optional[Dict[Termo, Tuple[str, Optional[str]]]],
+    ):
+        """Aplica uma escrita deste processo (chamar depois do commit); None em criação/remoção"""
+        anteriores = anteriores or {}
+        novos = novos or {}
+        with self._lock:
+            if self._estado is None:
+                return
+            for termo in anteriores.keys() - novos.keys():
+                self._estado.alterar(termo, anteriores[termo], -1)
+            for termo in novos.keys() - anteriores.keys():
+                self._estado.alterar(termo, novos[termo], 1)
+
+
+indice_autocomplete = IndiceAutocomplete()
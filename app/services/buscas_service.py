@@ -0,0 +1,345 @@
+"""
+Buscas salvas: quais buscas um imóvel novo ou editado satisfaz
+
+As buscas ativas ficam em um índice invertido em memória, agrupadas por
+(tipo_negocio, tipo_imovel, trecho da cidade), com "" onde a busca não
+filtra. Um imóvel consulta só os grupos compatíveis: 2 x 2 x (trechos da
+sua cidade presentes no índice). Dentro de cada grupo as buscas estão
+ordenadas pelo preço mínimo, e uma busca binária descarta as que pedem
+preço acima do imóvel. Só as candidatas restantes são avaliadas por
+inteiro (satisfaz), com a mesma semântica dos filtros de list_imoveis.
+
+A avaliação roda fora da requisição: a escrita do imóvel marca o id em
+alertas_pendentes na própria transação (nada se perde quando um worker da
+API é reciclado) e o notificacoes_worker.py, com o índice em memória, drena
+essa tabela em lotes, grava os alertas (tabela alertas_busca) e depois os
+transforma em e-mails.
+"""
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.busca_salva import AlertaBusca, BuscaSalva, ImovelPendenteAlerta
+from app.models.imovel import Imovel, TipoImovel, TipoNegocio
+from app.services import geolocalizacao, versoes_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Filtros em que 0/"" significam "sem filtro" em list_imoveis (os demais comparam com None)
+FILTROS_BOOLEANOS = ("piscina", "aceita_pets", "mobiliado")
+FILTROS_COORDENADAS = ("lat", "lng")
+
+# Imóveis pendentes processados por transação
+LOTE_PENDENTES = 50
+
+
+# ---------------------------------------------------------------------------
+# Filtros
+# ---------------------------------------------------------------------------
+
+def normalizar_filtros(filtros: dict) -> dict:
+    """
+    Remove os filtros vazios e valida as combinações geográficas
+
+    Raises:
+        HTTPException 400: sem nenhum filtro ou com lat/lng/radius_km/bbox inválidos
+    """
+    normalizados = {}
+    for nome, valor in filtros.items():
+        valor = getattr(valor, "value", valor)
+        if nome in FILTROS_BOOLEANOS or nome in FILTROS_COORDENADAS:
+            if valor is not None:
+                normalizados[nome] = valor
+        elif valor:
+            normalizados[nome] = valor
+
+    if not normalizados:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe pelo menos um filtro",
+        )
+    if ("lat" in normalizados) != ("lng" in normalizados):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe lat e lng juntos",
+        )
+    if "radius_km" in normalizados and "lat" not in normalizados:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="radius_km exige lat e lng",
+        )
+    if "bbox" in normalizados:
+        geolocalizacao.parse_bbox(normalizados["bbox"])
+    return normalizados
+
+
+def _contem(valor: Optional[str], trecho: str) -> bool:
+    # ilike '%trecho%'
+    return trecho.lower() in (valor or "").lower()
+
+
+def _minimo(valor, limite) -> bool:
+    return valor is not None and valor >= limite
+
+
+def _maximo(valor, limite) -> bool:
+    return valor is not None and valor <= limite
+
+
+def satisfaz(filtros: dict, imovel: Imovel) -> bool:
+    """Avalia em memória os filtros de uma busca (normalizados) contra um imóvel"""
+    if "tipo_negocio" in filtros and TipoNegocio(imovel.tipo_negocio).value != filtros["tipo_negocio"]:
+        return False
+    if "tipo_imovel" in filtros and TipoImovel(imovel.tipo_imovel).value != filtros["tipo_imovel"]:
+        return False
+    if "cidade" in filtros and not _contem(imovel.cidade, filtros["cidade"]):
+        return False
+    if "bairro" in filtros and not _contem(imovel.bairro, filtros["bairro"]):
+        return False
+
+    faixas = (
+        ("preco_venda", imovel.preco_venda),
+        ("area_total", imovel.area_total),
+        ("preco_m2", imovel.preco_m2),
+    )
+    for nome, valor in faixas:
+        if f"{nome}__gte" in filtros and not _minimo(valor, filtros[f"{nome}__gte"]):
+            return False
+        if f"{nome}__lte" in filtros and not _maximo(valor, filtros[f"{nome}__lte"]):
+            return False
+    for nome in ("quartos", "banheiros", "vagas_garagem"):
+        if nome in filtros and not _minimo(getattr(imovel, nome), filtros[nome]):
+            return False
+    for nome in FILTROS_BOOLEANOS:
+        if nome in filtros and bool(getattr(imovel, nome)) != filtros[nome]:
+            return False
+
+    if "search" in filtros and not any(
+        _contem(valor, filtros["search"])
+        for valor in (imovel.titulo, imovel.descricao, imovel.cidade, imovel.bairro)
+    ):
+        return False
+
+    if "lat" in filtros or "bbox" in filtros:
+        if imovel.latitude is None or imovel.longitude is None:
+            return False
+    if "lat" in filtros:
+        raio = filtros.get("radius_km") or geolocalizacao.RAIO_PADRAO_KM
+        distancia = geolocalizacao.distancia_km(filtros["lat"], filtros["lng"], imovel.latitude, imovel.longitude)
+        if distancia > raio:
+            return False
+    if "bbox" in filtros:
+        lat_min, lng_min, lat_max, lng_max = geolocalizacao.parse_bbox(filtros["bbox"])
+        if not (lat_min <= imovel.latitude <= lat_max and lng_min <= imovel.longitude <= lng_max):
+            return False
+
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Índice invertido
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Grupo:
+    """Buscas de um (tipo_negocio, tipo_imovel, cidade), ordenadas pelo preço mínimo"""
+    precos_minimos: List[float] = field(default_factory=list)
+    buscas: List[Tuple[int, dict]] = field(default_factory=list)
+
+    def adicionar(self, busca_id: int, filtros: dict):
+        preco_minimo = filtros.get("preco_venda__gte", -math.inf)
+        posicao = bisect_right(self.precos_minimos, preco_minimo)
+        self.precos_minimos.insert(posicao, preco_minimo)
+        self.buscas.insert(posicao, (busca_id, filtros))
+
+    def ordenar(self):
+        """Ordena de uma vez depois de uma carga completa (feita só com append)"""
+        pares = sorted(zip(self.precos_minimos, self.buscas), key=lambda par: par[0])
+        self.precos_minimos = [preco for preco, _ in pares]
+        self.buscas = [busca for _, busca in pares]
+
+    def ate_o_preco(self, preco: Optional[float]) -> List[Tuple[int, dict]]:
+        fim = bisect_right(self.precos_minimos, -math.inf if preco is None else preco)
+        return self.buscas[:fim]
+
+
+def _chave_grupo(filtros: dict) -> Tuple[str, str, str]:
+    return (
+        filtros.get("tipo_negocio", ""),
+        filtros.get("tipo_imovel", ""),
+        filtros.get("cidade", "").lower(),
+    )
+
+
+class IndiceBuscas:
+    """Buscas ativas em memória; usado só pelo ProcessadorAlertas (notificacoes_worker.py)"""
+
+    def __init__(self):
+        self._grupos: Dict[Tuple[str, str, str], _Grupo] = {}
+        self._cidades: Set[str] = set()
+        self._total = 0
+        self._ultimo_id = 0
+        self._versao: Optional[int] = None
+
+    def _adicionar(self, busca_id: int, filtros: dict, carga_completa: bool = False):
+        chave = _chave_grupo(filtros)
+        grupo = self._grupos.setdefault(chave, _Grupo())
+        if carga_completa:
+            grupo.precos_minimos.append(filtros.get("preco_venda__gte", -math.inf))
+            grupo.buscas.append((busca_id, filtros))
+        else:
+            grupo.adicionar(busca_id, filtros)
+        self._cidades.add(chave[2])
+        self._total += 1
+        self._ultimo_id = max(self._ultimo_id, busca_id)
+
+    def carregar(self, db: Session):
+        self._versao = versoes_service.obter(db, versoes_service.BUSCAS_SALVAS)
+        self._grupos, self._cidades = {}, set()
+        self._total = self._ultimo_id = 0
+        linhas = (
+            db.query(BuscaSalva.id, BuscaSalva.filtros)
+            .filter(BuscaSalva.ativa == True)
+            .yield_per(5000)
+        )
+        for busca_id, filtros in linhas:
+            self._adicionar(busca_id, filtros, carga_completa=True)
+        for grupo in self._grupos.values():
+            grupo.ordenar()
+        logger.info(f"Índice de buscas salvas carregado: {self._total} buscas em {len(self._grupos)} grupos")
+
+    def sincronizar(self, db: Session):
+        """Acrescenta as buscas novas; remoções/desativações forçam recarga completa"""
+        versao = versoes_service.obter(db, versoes_service.BUSCAS_SALVAS)
+        if self._versao is not None and versao == self._versao:
+            return
+        if self._versao is None:
+            self.carregar(db)
+            return
+
+        novas = (
+            db.query(BuscaSalva.id, BuscaSalva.filtros)
+            .filter(BuscaSalva.ativa == True, BuscaSalva.id > self._ultimo_id)
+        )
+        for busca_id, filtros in novas:
+            self._adicionar(busca_id, filtros)
+        ativas = db.query(func.count(BuscaSalva.id)).filter(BuscaSalva.ativa == True).scalar() or 0
+        if ativas != self._total:
+            self.carregar(db)
+        else:
+            self._versao = versao
+
+    def correspondentes(self, imovel: Imovel) -> List[int]:
+        """Ids das buscas ativas que o imóvel satisfaz"""
+        tipo_negocio = TipoNegocio(imovel.tipo_negocio).value
+        tipo_imovel = TipoImovel(imovel.tipo_imovel).value
+
+        # Filtro de cidade é "contém": vale todo trecho da cidade do imóvel
+        cidade = (imovel.cidade or "").lower()
+        trechos = {cidade[i:j] for i in range(len(cidade)) for j in range(i + 1, len(cidade) + 1)}
+        cidades = (trechos & self._cidades) | {""}
+
+        resultado = []
+        for negocio in (tipo_negocio, ""):
+            for tipo in (tipo_imovel, ""):
+                for trecho in cidades:
+                    grupo = self._grupos.get((negocio, tipo, trecho))
+                    if grupo is None:
+                        continue
+                    for busca_id, filtros in grupo.ate_o_preco(imovel.preco_venda):
+                        if satisfaz(filtros, imovel):
+                            resultado.append(busca_id)
+        return resultado
+
+
+# ---------------------------------------------------------------------------
+# Fila de alertas
+# ---------------------------------------------------------------------------
+
+def _insert_ignorando_duplicados(db: Session, modelo=AlertaBusca):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(modelo)
+    if dialect == "sqlite":
+        return sqlite.insert(modelo)
+    raise NotImplementedError(f"Alertas de buscas não suportam o banco '{dialect}'")
+
+
+def marcar_pendente(db: Session, imovel_id: int) -> None:
+    """
+    Marca o imóvel para comparação com as buscas salvas (o commit fica com o chamador)
+
+    Se o worker está processando a marcação anterior deste imóvel, espera o
+    commit dele e grava uma nova: a versão editada também é avaliada.
+    """
+    stmt = _insert_ignorando_duplicados(db, ImovelPendenteAlerta).values(imovel_id=imovel_id)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["imovel_id"],
+        set_={"marcado_em": func.now()},
+    ))
+
+
+def gravar_alertas(db: Session, imovel_id: int, busca_ids: List[int]) -> int:
+    """Grava os alertas (um por busca e imóvel); o commit fica com o chamador"""
+    if not busca_ids:
+        return 0
+    # A busca pode ter sido removida depois da última sincronização do índice
+    ativas = [
+        busca_id for (busca_id,) in
+        db.query(BuscaSalva.id).filter(BuscaSalva.id.in_(busca_ids), BuscaSalva.ativa == True)
+    ]
+    if not ativas:
+        return 0
+    stmt = _insert_ignorando_duplicados(db).values(
+        [{"busca_id": busca_id, "imovel_id": imovel_id} for busca_id in ativas]
+    )
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["busca_id", "imovel_id"]))
+    return len(ativas)
+
+
+class ProcessadorAlertas:
+    """Drena alertas_pendentes com o índice de buscas do processo (notificacoes_worker.py)"""
+
+    def __init__(self):
+        self._indice = IndiceBuscas()
+
+    def processar_lote(self, db: Session, lote: int = LOTE_PENDENTES) -> int:
+        """
+        Compara um lote de imóveis pendentes com as buscas e faz commit
+
+        As marcações ficam travadas (SKIP LOCKED para outros workers) até o
+        commit, que grava os alertas e remove as marcações juntos.
+
+        Returns:
+            Quantidade de imóveis processados
+        """
+        imovel_ids = [
+            imovel_id for (imovel_id,) in
+            db.query(ImovelPendenteAlerta.imovel_id)
+            .order_by(ImovelPendenteAlerta.marcado_em)
+            .limit(lote)
+            .with_for_update(skip_locked=True)
+        ]
+        if not imovel_ids:
+            db.rollback()
+            return 0
+
+        self._indice.sincronizar(db)
+        total = 0
+        # Imóveis removidos depois da marcação não aparecem aqui
+        for imovel in db.query(Imovel).filter(Imovel.id.in_(imovel_ids)):
+            total += gravar_alertas(db, imovel.id, self._indice.correspondentes(imovel))
+        db.execute(
+            delete(ImovelPendenteAlerta).where(ImovelPendenteAlerta.imovel_id.in_(imovel_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+
+        if total:
+            logger.info(f"{total} alertas de buscas salvas gerados para {len(imovel_ids)} imóveis")
+        return len(imovel_ids)
@@ -1,12 +1,26 @@
+import asyncio
 import cloudinary
+import cloudinary.exceptions
 import cloudinary.uploader
+import cloudinary.utils
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import UploadFile, HTTPException
 from app.core.config import settings
+from app.core.uploads import validate_upload_size
+from app.services.fake_storage import fake_uploader
 from typing import Optional, Dict
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Erros do Cloudinary que não adianta repetir (requisição inválida/credenciais)
+NON_RETRYABLE_ERRORS = (
+    cloudinary.exceptions.BadRequest,
+    cloudinary.exceptions.AuthorizationRequired,
+    cloudinary.exceptions.NotAllowed,
+    cloudinary.exceptions.NotFound,
+)
+
 
 class CloudinaryService:
     """Serviço para gerenciar upload de imagens no Cloudinary"""
@@ -14,6 +28,13 @@ class CloudinaryService:
     def __init__(self):
         self._configured = False
         self._config_attempted = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def uploader(self):
+        """SDK real ou armazenamento falso (CLOUDINARY_FAKE)"""
+        return fake_uploader if settings.CLOUDINARY_FAKE else cloudinary.uploader
 
     def _ensure_configured(self):
         """Configura o Cloudinary apenas quando necessário (lazy loading)"""
@@ -26,6 +47,11 @@ class CloudinaryService:
             logger.info("Cloudinary está desabilitado (USE_CLOUDINARY=false)")
             return
 
+        if settings.CLOUDINARY_FAKE:
+            self._configured = True
+            logger.warning("Usando armazenamento falso no lugar do Cloudinary (CLOUDINARY_FAKE=true)")
+            return
+
         try:
             if not all([
                 settings.CLOUDINARY_CLOUD_NAME,
@@ -49,6 +75,82 @@ class CloudinaryService:
         except Exception as e:
             logger.error(f"Erro ao configurar Cloudinary: {str(e)}", exc_info=True)
 
+    def is_available(self) -> bool:
+        """True se o Cloudinary está habilitado e configurado"""
+        self._ensure_configured()
+        return settings.USE_CLOUDINARY and self._configured
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Threads dedicadas às chamadas bloqueantes do SDK (não disputam o threadpool do FastAPI)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.UPLOAD_MAX_CONCURRENCY,
+                thread_name_prefix="cloudinary",
+            )
+        return self._executor
+
+    async def _submeter(self, fn, *args, **kwargs) -> asyncio.Future:
+        """
+        Agenda uma chamada bloqueante do SDK no executor dedicado
+
+        A concorrência é limitada por UPLOAD_MAX_CONCURRENCY; a vaga só é
+        liberada quando a thread termina, mesmo que o timeout já tenha
+        estourado, para que o limite valha de fato.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENCY)
+
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._get_executor(), lambda: fn(*args, **kwargs))
+        except BaseException:
+            self._semaphore.release()
+            raise
+        future.add_done_callback(lambda _: self._semaphore.release())
+        return future
+
+    @staticmethod
+    async def _aguardar(future: asyncio.Future):
+        return await asyncio.wait_for(
+            asyncio.shield(future), timeout=settings.UPLOAD_TIMEOUT_SECONDS
+        )
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        """Executa uma chamada bloqueante do SDK fora do event loop, com timeout"""
+        return await self._aguardar(await self._submeter(fn, *args, **kwargs))
+
+    async def _run_with_retry(self, description: str, fn, *args, **kwargs):
+        """
+        Repete falhas transitórias (rede, timeout, 5xx) com backoff exponencial
+
+        Depois de um timeout a thread da tentativa ainda roda e lê o mesmo
+        arquivo: a próxima tentativa só começa quando ela termina (duas
+        leituras simultâneas enviariam bytes misturados). Se ela acabou dando
+        certo, o resultado dela é usado.
+        """
+        attempts = settings.UPLOAD_MAX_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            future = await self._submeter(fn, *args, **kwargs)
+            try:
+                return await self._aguardar(future)
+            except NON_RETRYABLE_ERRORS:
+                raise
+            except Exception as e:
+                if attempt == attempts:
+                    raise
+                if not future.done():
+                    await asyncio.wait({future})
+                    if not future.cancelled() and future.exception() is None:
+                        logger.warning(f"{description} concluído após o timeout (tentativa {attempt}/{attempts})")
+                        return future.result()
+                delay = settings.UPLOAD_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+                logger.warning(
+                    f"{description} falhou (tentativa {attempt}/{attempts}): "
+                    f"{type(e).__name__}: {e}. Nova tentativa em {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
     async def upload_image(
         self,
         file: UploadFile,
@@ -86,16 +188,9 @@ class CloudinaryService:
                     detail=f"Tipo de arquivo não permitido. Use: {', '.join(allowed_types)}"
                 )
 
-            # Validar tamanho do arquivo
-            file_content = await file.read()
-            if len(file_content) > settings.MAX_UPLOAD_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Arquivo muito grande. Tamanho máximo: {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
-                )
-
-            # Reset do ponteiro do arquivo
-            await file.seek(0)
+            # Validar tamanho do arquivo em blocos (sem carregar tudo em memória);
+            # o SDK lê direto do arquivo temporário do upload
+            await validate_upload_size(file)
 
             # Opções de upload
             upload_options = {
@@ -111,11 +206,16 @@ class CloudinaryService:
             if transformation:
                 upload_options["transformation"] = transformation
 
-            # Upload para o Cloudinary
-            result = cloudinary.uploader.upload(
-                file.file,
-                **upload_options
-            )
+            # O public_id fixo com overwrite torna o retry idempotente
+            upload_options["overwrite"] = True
+            upload_options["timeout"] = settings.UPLOAD_TIMEOUT_SECONDS
+
+            def _upload():
+                file.file.seek(0)
+                return self.uploader.upload(file.file, **upload_options)
+
+            # Upload para o Cloudinary (em thread dedicada, com timeout e retry)
+            result = await self._run_with_retry("Upload para Cloudinary", _upload)
 
             logger.info(f"Imagem enviada com sucesso para Cloudinary: {result.get('public_id')}")
 
@@ -130,6 +230,12 @@ class CloudinaryService:
 
         except HTTPException:
             raise
+        except asyncio.TimeoutError:
+            logger.error("Timeout no upload para Cloudinary")
+            raise HTTPException(
+                status_code=504,
+                detail="Tempo esgotado ao enviar a imagem"
+            )
         except Exception as e:
             logger.error(f"Erro ao fazer upload para Cloudinary: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -153,13 +259,26 @@ class CloudinaryService:
             return False
 
         try:
-            result = cloudinary.uploader.destroy(public_id)
+            result = self.uploader.destroy(public_id)
             logger.info(f"Imagem removida do Cloudinary: {public_id}")
             return result.get("result") == "ok"
         except Exception as e:
             logger.error(f"Erro ao deletar imagem do Cloudinary: {str(e)}", exc_info=True)
             return False
 
+    async def delete_image_async(self, public_id: str) -> bool:
+        """Versão de delete_image que não bloqueia o event loop"""
+        try:
+            return await self._run_blocking(self.delete_image, public_id)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout ao deletar imagem do Cloudinary: {public_id}")
+            return False
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     def get_optimized_url(
         self,
         public_id: str,
@@ -186,6 +305,12 @@ class CloudinaryService:
         if not settings.USE_CLOUDINARY or not self._configured:
             return ""
 
+        if settings.CLOUDINARY_FAKE:
+            partes = [f"w_{width}" if width else None, f"h_{height}" if height else None]
+            transformacao = ",".join(p for p in partes if p)
+            prefixo = f"{transformacao}/" if transformacao else ""
+            return f"https://fake.cloudinary.local/image/upload/{prefixo}{public_id}"
+
         transformation = {
             "quality": quality,
             "fetch_format": "auto"
@@ -0,0 +1,94 @@
+"""
+Cache em memória da configuração da empresa (linha única de configuracoes)
+
+A configuração é lida em toda página do site e quase nunca muda. Cada
+processo guarda a linha já convertida para o schema do admin, o JSON
+público pronto e a ETag dele (hash do conteúdo: a mesma em todos os
+workers e entre deploys enquanto nada mudar).
+
+update_configuracoes incrementa a versão "configuracao" (versoes_service)
+na mesma transação e recarrega o cache do próprio processo. Os outros
+workers comparam a versão em uma thread, no máximo a cada
+CONFIGURACAO_SYNC_SEGUNDOS; as leituras em si não tocam no banco.
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.configuracao import Configuracao
+from app.schemas.configuracao import Configuracao as ConfiguracaoSchema, ConfiguracaoPublica
+from app.services import versoes_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EntradaConfiguracao:
+    # None enquanto a configuração não foi criada
+    admin: Optional[ConfiguracaoSchema]
+    publica: Optional[bytes]
+    etag: Optional[str]
+
+
+def _montar(config: Optional[Configuracao]) -> EntradaConfiguracao:
+    if config is None:
+        return EntradaConfiguracao(None, None, None)
+    publica = ConfiguracaoPublica.from_orm(config).json().encode()
+    etag = f'"{hashlib.sha256(publica).hexdigest()[:32]}"'
+    return EntradaConfiguracao(ConfiguracaoSchema.from_orm(config), publica, etag)
+
+
+class CacheConfiguracao:
+    def __init__(self):
+        self._lock_carga = threading.Lock()
+        self._entrada: Optional[EntradaConfiguracao] = None
+        self._versao: Optional[int] = None
+        self._verificado_em = 0.0
+        self._recarregando = False
+
+    def carregar(self, db: Session) -> EntradaConfiguracao:
+        """Relê versão e linha; chamar também depois do commit de uma alteração"""
+        # Versão antes da linha: uma escrita entre as duas leituras só causa uma recarga a mais
+        versao = versoes_service.obter(db, versoes_service.CONFIGURACAO)
+        entrada = _montar(db.query(Configuracao).order_by(Configuracao.id).first())
+        self._entrada, self._versao = entrada, versao
+        self._verificado_em = time.monotonic()
+        return entrada
+
+    def _recarregar_se_mudou(self):
+        try:
+            with SessionLocal() as db:
+                if versoes_service.obter(db, versoes_service.CONFIGURACAO) != self._versao:
+                    self.carregar(db)
+        except Exception as e:
+            logger.error(f"Erro ao recarregar a configuração: {e}")
+        finally:
+            self._recarregando = False
+
+    def _verificar(self):
+        if self._recarregando or time.monotonic() - self._verificado_em < settings.CONFIGURACAO_SYNC_SEGUNDOS:
+            return
+        self._recarregando = True
+        self._verificado_em = time.monotonic()
+        threading.Thread(target=self._recarregar_se_mudou, daemon=True).start()
+
+    def obter(self) -> EntradaConfiguracao:
+        """Configuração atual; só consulta o banco na primeira chamada do processo"""
+        entrada = self._entrada
+        if entrada is not None:
+            self._verificar()
+            return entrada
+
+        with self._lock_carga:
+            if self._entrada is None:
+                with SessionLocal() as db:
+                    self.carregar(db)
+            return self._entrada
+
+
+cache_configuracao = CacheConfiguracao()
@@ -0,0 +1,168 @@
+"""
+Contadores agregados para o dashboard
+
+Em vez de rodar COUNT(*) sobre tabelas inteiras a cada carregamento,
+os caminhos de criação/atualização/remoção de imóveis, leads e visitas
+ajustam as linhas de `contadores` na mesma transação da escrita.
+A reconciliação recalcula tudo a partir das tabelas e corrige desvios
+(ex: remoções em cascata feitas pelo banco ou scripts que escrevem direto).
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from typing import Dict, Optional
+from app.models.contador import Contador
+from app.models.imovel import Imovel
+from app.models.lead import Lead, LeadStatus
+from app.models.visita import Visita, VisitaStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMOVEIS = "imoveis"
+LEADS = "leads"
+
+
+def chave_lead_status(status: LeadStatus) -> str:
+    return f"leads:{LeadStatus(status).value}"
+
+
+def chave_visita_status(status: VisitaStatus) -> str:
+    return f"visitas:{VisitaStatus(status).value}"
+
+
+def incrementar(db: Session, chave: str, delta: int = 1) -> None:
+    """
+    Ajusta um contador dentro da transação corrente (o commit fica com o chamador)
+
+    Se a linha ainda não existe o ajuste é ignorado: a próxima reconciliação
+    cria a linha já com o valor correto.
+    """
+    if not delta:
+        return
+
+    result = db.execute(
+        update(Contador)
+        .where(Contador.chave == chave)
+        .values(valor=Contador.valor + delta)
+    )
+    if result.rowcount == 0:
+        logger.info(f"Contador '{chave}' ainda não existe; será criado na reconciliação")
+
+
+def registrar_lead_status(
+    db: Session,
+    anterior: Optional[LeadStatus],
+    novo: Optional[LeadStatus],
+) -> None:
+    """Registra a entrada, saída ou mudança de status de um lead"""
+    if anterior == novo:
+        return
+    if anterior is not None:
+        incrementar(db, chave_lead_status(anterior), -1)
+    if novo is not None:
+        incrementar(db, chave_lead_status(novo), 1)
+
+
+def registrar_visita_status(
+    db: Session,
+    anterior: Optional[VisitaStatus],
+    novo: Optional[VisitaStatus],
+) -> None:
+    """Registra a entrada, saída ou mudança de status de uma visita"""
+    if anterior == novo:
+        return
+    if anterior is not None:
+        incrementar(db, chave_visita_status(anterior), -1)
+    if novo is not None:
+        incrementar(db, chave_visita_status(novo), 1)
+
+
+def _descontar_visitas_em_cascata(db: Session, filtro) -> None:
+    """
+    Decrementa as visitas que o banco vai remover em cascata
+    (visitas.imovel_id e visitas.lead_id têm ON DELETE CASCADE, fora do alcance do ORM)
+    """
+    por_status = (
+        db.query(Visita.status, func.count(Visita.id))
+        .filter(filtro)
+        .group_by(Visita.status)
+        .all()
+    )
+    for status, total in por_status:
+        if status is not None:
+            incrementar(db, chave_visita_status(status), -total)
+
+
+def registrar_remocao_imovel(db: Session, imovel_id: int) -> None:
+    incrementar(db, IMOVEIS, -1)
+    _descontar_visitas_em_cascata(db, Visita.imovel_id == imovel_id)
+
+
+def registrar_remocao_lead(db: Session, lead: Lead) -> None:
+    incrementar(db, LEADS, -1)
+    registrar_lead_status(db, lead.status, None)
+    _descontar_visitas_em_cascata(db, Visita.lead_id == lead.id)
+
+
+def calcular_contagens(db: Session) -> Dict[str, int]:
+    """Conta tudo a partir das tabelas de origem (usado na reconciliação)"""
+    contagens = {IMOVEIS: db.query(func.count(Imovel.id)).scalar() or 0}
+
+    contagens[LEADS] = 0
+    for status in LeadStatus:
+        contagens[chave_lead_status(status)] = 0
+    for status, total in db.query(Lead.status, func.count(Lead.id)).group_by(Lead.status).all():
+        contagens[LEADS] += total
+        if status is not None:
+            contagens[chave_lead_status(status)] = total
+
+    for status in VisitaStatus:
+        contagens[chave_visita_status(status)] = 0
+    for status, total in db.query(Visita.status, func.count(Visita.id)).group_by(Visita.status).all():
+        if status is not None:
+            contagens[chave_visita_status(status)] = total
+
+    return contagens
+
+
+def reconciliar(db: Session) -> Dict[str, int]:
+    """
+    Recalcula todos os contadores e corrige os valores armazenados
+
+    As linhas existentes são travadas (FOR UPDATE) antes da contagem, assim
+    escritas concorrentes esperam a reconciliação terminar e nenhum
+    incremento é perdido ou contado duas vezes.
+
+    Returns:
+        Dict com os contadores que estavam divergentes e a diferença corrigida
+    """
+    atuais = {
+        c.chave: c
+        for c in db.query(Contador).with_for_update().all()
+    }
+    contagens = calcular_contagens(db)
+
+    divergencias = {}
+    for chave, valor in contagens.items():
+        contador = atuais.get(chave)
+        if contador is None:
+            db.add(Contador(chave=chave, valor=valor))
+            divergencias[chave] = valor
+        elif contador.valor != valor:
+            divergencias[chave] = valor - contador.valor
+            contador.valor = valor
+
+    db.commit()
+
+    if divergencias:
+        logger.info(f"Contadores reconciliados: {divergencias}")
+    return divergencias
+
+
+def obter_contadores(db: Session) -> Dict[str, int]:
+    """Lê todos os contadores em uma única consulta; reconcilia se a tabela estiver vazia"""
+    valores = dict(db.query(Contador.chave, Contador.valor).all())
+    if not valores:
+        reconciliar(db)
+        valores = dict(db.query(Contador.chave, Contador.valor).all())
+    return valores
@@ -0,0 +1,161 @@
+"""
+Deduplicação de imagens por hash exato e perceptual
+
+- conteudo_hash: SHA-256 dos bytes enviados (mesmo arquivo reenviado)
+- phash: dHash de 64 bits (mesma foto reexportada/recomprimida); opcional
+  (DEDUP_PERCEPTUAL) e só entre fotos do mesmo imóvel, porque fotos
+  diferentes podem ter o mesmo dHash
+
+Quando um upload coincide com uma imagem já armazenada, a nova linha de
+ImovelImagem reaproveita o objeto existente (URL, variantes, placeholder)
+sem gravar em disco nem enviar ao Cloudinary. Por isso arquivos podem ser
+compartilhados entre imóveis: a remoção física fica com o coletor de órfãos.
+"""
+import hashlib
+from typing import BinaryIO, Optional
+from sqlalchemy.orm import Session
+from PIL import Image, ImageOps
+from app.core.config import settings
+from app.models.imovel import ImovelImagem
+from app.services.image_processing import VARIANTES
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# dHash com poucos (ou quase todos) bits ligados vem de imagens lisas ou quase
+# uniformes, que colidem entre si sistematicamente: não servem para deduplicar
+PHASH_BITS_MINIMO = 8
+PHASH_BITS_MAXIMO = 56
+
+# Diferença relativa máxima de proporção (largura/altura) entre duplicatas perceptuais
+TOLERANCIA_PROPORCAO = 0.01
+
+# Campos que descrevem o objeto armazenado (copiados de uma duplicata)
+CAMPOS_ARMAZENAMENTO = (
+    "imagem_url",
+    "variantes",
+    "storage_key",
+    "largura",
+    "altura",
+    "placeholder",
+    "cor_dominante",
+    "conteudo_hash",
+    "phash",
+)
+
+
+def sha256_arquivo(fileobj: BinaryIO) -> str:
+    """SHA-256 lido em blocos; deixa o ponteiro no início"""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def dhash(imagem: Image.Image) -> str:
+    """Difference hash de 64 bits em hexadecimal (16 caracteres)"""
+    cinza = imagem.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = list(cinza.getdata())
+    bits = 0
+    for linha in range(8):
+        for coluna in range(8):
+            esquerda = pixels[linha * 9 + coluna]
+            direita = pixels[linha * 9 + coluna + 1]
+            bits = (bits << 1) | (esquerda > direita)
+    return f"{bits:016x}"
+
+
+def calcular_hashes(fileobj: BinaryIO) -> dict:
+    """
+    Hashes exato e perceptual de um arquivo de imagem (síncrono; rodar em thread)
+
+    Returns:
+        {"conteudo_hash", "phash", "largura_original", "altura_original"};
+        phash e dimensões são None se o arquivo não puder ser decodificado
+        (a validação fica com o pipeline)
+    """
+    conteudo_hash = sha256_arquivo(fileobj)
+    try:
+        with Image.open(fileobj) as original:
+            # Orientações EXIF 5-8 giram a imagem em 90°
+            orientacao = original.getexif().get(0x0112, 1)
+            if orientacao in (5, 6, 7, 8):
+                largura_original, altura_original = original.height, original.width
+            else:
+                largura_original, altura_original = original.width, original.height
+            original.draft("L", (64, 64))
+            original.load()
+            phash = dhash(ImageOps.exif_transpose(original))
+    except Exception:
+        phash = largura_original = altura_original = None
+    finally:
+        fileobj.seek(0)
+
+    return {
+        "conteudo_hash": conteudo_hash,
+        "phash": phash,
+        "largura_original": largura_original,
+        "altura_original": altura_original,
+    }
+
+
+def phash_informativo(phash: Optional[str]) -> bool:
+    """Falso para hashes degenerados (ex: 0000000000000000 de uma imagem lisa)"""
+    if not phash:
+        return False
+    bits = bin(int(phash, 16)).count("1")
+    return PHASH_BITS_MINIMO <= bits <= PHASH_BITS_MAXIMO
+
+
+def _mesma_proporcao(candidato: ImovelImagem, largura: Optional[int], altura: Optional[int]) -> bool:
+    if not (candidato.largura and candidato.altura and largura and altura):
+        return False
+    proporcao = largura / altura
+    return abs(candidato.largura / candidato.altura - proporcao) <= proporcao * TOLERANCIA_PROPORCAO
+
+
+def buscar_duplicata(db: Session, hashes: dict, imovel_id: Optional[int] = None) -> Optional[ImovelImagem]:
+    """
+    Procura uma imagem já armazenada equivalente (consultas por índice)
+
+    O SHA-256 vale entre quaisquer imóveis. O hash perceptual só com
+    DEDUP_PERCEPTUAL, entre imagens do mesmo imovel_id, com hash não
+    degenerado, mesma proporção e pelo menos a resolução que o novo upload
+    geraria (para não trocar por uma versão pior).
+    """
+    existente = (
+        db.query(ImovelImagem)
+        .filter(ImovelImagem.conteudo_hash == hashes["conteudo_hash"])
+        .first()
+    )
+    if existente:
+        return existente
+
+    if not settings.DEDUP_PERCEPTUAL or imovel_id is None or not phash_informativo(hashes.get("phash")):
+        return None
+
+    candidatos = (
+        db.query(ImovelImagem)
+        .filter(ImovelImagem.phash == hashes["phash"], ImovelImagem.imovel_id == imovel_id)
+        .limit(10)
+        .all()
+    )
+    largura_necessaria = hashes.get("largura_original") or 0
+    if not settings.USE_CLOUDINARY:
+        # O pipeline local nunca serve mais que a variante "full"
+        largura_necessaria = min(largura_necessaria, VARIANTES["full"])
+
+    for candidato in candidatos:
+        if not _mesma_proporcao(candidato, hashes.get("largura_original"), hashes.get("altura_original")):
+            continue
+        if candidato.largura and candidato.largura >= largura_necessaria:
+            return candidato
+    return None
+
+
+def campos_da_duplicata(imagem: ImovelImagem) -> dict:
+    return {campo: getattr(imagem, campo) for campo in CAMPOS_ARMAZENAMENTO}
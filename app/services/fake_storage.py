@@ -0,0 +1,63 @@
+"""
+Armazenamento falso com a mesma interface de `cloudinary.uploader`
+
+Usado com USE_CLOUDINARY=true e CLOUDINARY_FAKE=true em testes e benchmarks:
+nenhuma chamada de rede é feita, mas cada operação bloqueia a thread pelo
+tempo configurado (como o SDK real), o que permite medir se o event loop
+continua livre durante os uploads.
+"""
+import threading
+import time
+from typing import Dict
+
+
+class FakeCloudinaryUploader:
+    """Guarda os objetos em memória; latência e falhas são configuráveis"""
+
+    def __init__(self, latency: float = 0.2, failures: int = 0):
+        self.latency = latency
+        # Número de chamadas iniciais que falham (para exercitar o retry)
+        self.failures = failures
+        self.objects: Dict[str, bytes] = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def upload(self, file, **options) -> dict:
+        with self._lock:
+            self.calls += 1
+            should_fail = self.failures > 0
+            if should_fail:
+                self.failures -= 1
+
+        time.sleep(self.latency)
+        if should_fail:
+            raise ConnectionError("Falha simulada no armazenamento falso")
+
+        content = file.read() if hasattr(file, "read") else bytes(file)
+        folder = options.get("folder")
+        public_id = options.get("public_id") or f"fake_{len(self.objects) + 1}"
+        if folder:
+            public_id = f"{folder}/{public_id}"
+
+        with self._lock:
+            self.objects[public_id] = content
+
+        url = f"https://fake.cloudinary.local/image/upload/{public_id}"
+        return {
+            "url": url.replace("https://", "http://"),
+            "secure_url": url,
+            "public_id": public_id,
+            "width": None,
+            "height": None,
+            "format": None,
+            "bytes": len(content),
+        }
+
+    def destroy(self, public_id: str, **options) -> dict:
+        time.sleep(self.latency)
+        with self._lock:
+            existed = self.objects.pop(public_id, None) is not None
+        return {"result": "ok" if existed else "not found"}
+
+
+fake_uploader = FakeCloudinaryUploader()
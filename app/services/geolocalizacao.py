@@ -0,0 +1,263 @@
+"""
+Coordenadas dos imóveis e busca por raio / área do mapa
+
+- As coordenadas vêm do CEP, por uma base offline (CSV de prefixos de CEP),
+  quando o imóvel é gravado sem latitude/longitude explícitas.
+- Cada imóvel guarda o geohash das coordenadas, com índice B-tree comum.
+  Uma busca por área vira poucos intervalos de geohash (células que cobrem
+  a área), resolvidos pelo índice, e só as linhas dessas células são
+  filtradas pela distância/retângulo exatos.
+"""
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from app.core.config import settings
+from app.models.imovel import Imovel
+
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU = 111.32
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISAO = 9  # células de ~5m
+
+# Limite de intervalos de geohash por consulta (cada um é um range scan no índice)
+MAX_CELULAS = 16
+
+# Raio usado quando lat/lng vêm sem radius_km, e o máximo aceito
+RAIO_PADRAO_KM = 10.0
+RAIO_MAXIMO_KM = 200.0
+
+CEP_DATASET_PADRAO = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cep_coordenadas.csv")
+
+
+# ---------------------------------------------------------------------------
+# CEP -> coordenadas
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def _base_ceps() -> Dict[str, Tuple[float, float]]:
+    """Carrega o CSV de prefixos uma vez por processo"""
+    caminho = settings.CEP_DATASET_PATH or CEP_DATASET_PADRAO
+    base = {}
+    with open(caminho, encoding="utf-8") as f:
+        linhas = (linha for linha in f if linha.strip() and not linha.startswith("#"))
+        for registro in csv.reader(linhas):
+            base[registro[0].strip()] = (float(registro[1]), float(registro[2]))
+    return base
+
+
+def coordenadas_do_cep(cep: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) do prefixo mais longo do CEP presente na base"""
+    digitos = re.sub(r"\D", "", cep or "")
+    if not digitos:
+        return None
+
+    base = _base_ceps()
+    for tamanho in range(min(len(digitos), 8), 1, -1):
+        coordenadas = base.get(digitos[:tamanho])
+        if coordenadas:
+            return coordenadas
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Geohash
+# ---------------------------------------------------------------------------
+
+def geohash(latitude: float, longitude: float, precisao: int = GEOHASH_PRECISAO) -> str:
+    lat_min, lat_max = -90.0, 90.0
+    lng_min, lng_max = -180.0, 180.0
+    resultado = []
+    bits = valor = 0
+    longitude_vez = True
+
+    while len(resultado) < precisao:
+        if longitude_vez:
+            meio = (lng_min + lng_max) / 2
+            if longitude >= meio:
+                valor = (valor << 1) | 1
+                lng_min = meio
+            else:
+                valor <<= 1
+                lng_max = meio
+        else:
+            meio = (lat_min + lat_max) / 2
+            if latitude >= meio:
+                valor = (valor << 1) | 1
+                lat_min = meio
+            else:
+                valor <<= 1
+                lat_max = meio
+        longitude_vez = not longitude_vez
+        bits += 1
+        if bits == 5:
+            resultado.append(GEOHASH_BASE32[valor])
+            bits = valor = 0
+
+    return "".join(resultado)
+
+
+def tamanho_celula(precisao: int) -> Tuple[float, float]:
+    """(altura em graus de latitude, largura em graus de longitude) de uma célula"""
+    bits = 5 * precisao
+    bits_lng = (bits + 1) // 2
+    bits_lat = bits // 2
+    return 180.0 / (2 ** bits_lat), 360.0 / (2 ** bits_lng)
+
+
+def proximo_prefixo(prefixo: str) -> Optional[str]:
+    """Menor string maior que todas as que começam com `prefixo` (limite do intervalo)"""
+    while prefixo:
+        posicao = GEOHASH_BASE32.index(prefixo[-1])
+        if posicao + 1 < len(GEOHASH_BASE32):
+            return prefixo[:-1] + GEOHASH_BASE32[posicao + 1]
+        prefixo = prefixo[:-1]
+    return None
+
+
+def celulas_cobertura(
+    lat_min: float, lng_min: float, lat_max: float, lng_max: float,
+    max_celulas: int = MAX_CELULAS,
+    precisao_max: int = GEOHASH_PRECISAO,
+) -> List[str]:
+    """Prefixos de geohash (o mais precisos possível, até precisao_max) que cobrem o retângulo"""
+    for precisao in range(precisao_max, 0, -1):
+        altura, largura = tamanho_celula(precisao)
+        linha_ini = math.floor((lat_min + 90) / altura)
+        linha_fim = math.floor((lat_max + 90) / altura)
+        coluna_ini = math.floor((lng_min + 180) / largura)
+        coluna_fim = math.floor((lng_max + 180) / largura)
+        if (linha_fim - linha_ini + 1) * (coluna_fim - coluna_ini + 1) > max_celulas:
+            continue
+
+        celulas = set()
+        for linha in range(linha_ini, linha_fim + 1):
+            for coluna in range(coluna_ini, coluna_fim + 1):
+                centro_lat = min(89.999999, -90 + (linha + 0.5) * altura)
+                centro_lng = min(179.999999, -180 + (coluna + 0.5) * largura)
+                celulas.add(geohash(centro_lat, centro_lng, precisao))
+        return sorted(celulas)
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Distâncias e filtros
+# ---------------------------------------------------------------------------
+
+def distancia_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distância de haversine em km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def retangulo_do_raio(latitude: float, longitude: float, raio_km: float) -> Tuple[float, float, float, float]:
+    """(lat_min, lng_min, lat_max, lng_max) que contém o círculo"""
+    delta_lat = raio_km / KM_POR_GRAU
+    delta_lng = raio_km / (KM_POR_GRAU * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(-90.0, latitude - delta_lat),
+        max(-180.0, longitude - delta_lng),
+        min(90.0, latitude + delta_lat),
+        min(180.0, longitude + delta_lng),
+    )
+
+
+def distancia_quadrada_expr(latitude: float, longitude: float):
+    """
+    Distância equiretangular ao quadrado, em graus de latitude (expressão SQL)
+
+    Só aritmética, portanto funciona em qualquer banco; a distorção em raios
+    de até algumas centenas de km é desprezível para filtrar e ordenar.
+    """
+    fator = math.cos(math.radians(latitude))
+    delta_lat = Imovel.latitude - latitude
+    delta_lng = (Imovel.longitude - longitude) * fator
+    return delta_lat * delta_lat + delta_lng * delta_lng
+
+
+def filtro_celulas(celulas: List[str], coluna=None):
+    """OR de intervalos [prefixo, próximo prefixo) sobre uma coluna de geohash indexada"""
+    coluna = Imovel.geohash if coluna is None else coluna
+    intervalos = []
+    for celula in celulas:
+        limite = proximo_prefixo(celula)
+        condicao = coluna >= celula
+        if limite:
+            condicao = and_(condicao, coluna < limite)
+        intervalos.append(condicao)
+    return or_(*intervalos)
+
+
+def filtro_retangulo(lat_min: float, lng_min: float, lat_max: float, lng_max: float):
+    condicoes = [
+        Imovel.latitude.between(lat_min, lat_max),
+        Imovel.longitude.between(lng_min, lng_max),
+    ]
+    celulas = celulas_cobertura(lat_min, lng_min, lat_max, lng_max)
+    if celulas:
+        # Áreas continentais não cabem em MAX_CELULAS: fica só o filtro por faixa
+        condicoes.insert(0, filtro_celulas(celulas))
+    return and_(*condicoes)
+
+
+def filtro_raio(latitude: float, longitude: float, raio_km: float):
+    raio_graus = raio_km / KM_POR_GRAU
+    return and_(
+        filtro_retangulo(*retangulo_do_raio(latitude, longitude, raio_km)),
+        distancia_quadrada_expr(latitude, longitude) <= raio_graus * raio_graus,
+    )
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Converte "lng_min,lat_min,lng_max,lat_max" (ordem do GeoJSON)
+
+    Returns:
+        (lat_min, lng_min, lat_max, lng_max)
+    """
+    try:
+        lng_min, lat_min, lng_max, lat_max = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox deve ser 'lng_min,lat_min,lng_max,lat_max'",
+        )
+    if not (-90 <= lat_min <= lat_max <= 90 and -180 <= lng_min <= lng_max <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox fora dos limites ou com mínimo maior que o máximo",
+        )
+    return lat_min, lng_min, lat_max, lng_max
+
+
+# ---------------------------------------------------------------------------
+# Escrita
+# ---------------------------------------------------------------------------
+
+def atualizar_localizacao(imovel: Imovel, cep_alterado: bool = False) -> None:
+    """
+    Preenche latitude/longitude pelo CEP (se não informadas ou se o CEP mudou)
+    e recalcula o geohash
+
+    Se o CEP mudou e não é encontrado, as coordenadas antigas (do endereço
+    anterior) são apagadas: o imóvel sai da busca por área e do mapa.
+    """
+    if cep_alterado or imovel.latitude is None or imovel.longitude is None:
+        coordenadas = coordenadas_do_cep(imovel.cep)
+        if coordenadas:
+            imovel.latitude, imovel.longitude = coordenadas
+        elif cep_alterado:
+            imovel.latitude = imovel.longitude = None
+
+    if imovel.latitude is not None and imovel.longitude is not None:
+        imovel.geohash = geohash(imovel.latitude, imovel.longitude)
+    else:
+        imovel.geohash = None
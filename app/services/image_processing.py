@@ -0,0 +1,243 @@
+"""
+Pipeline de imagens do armazenamento local (USE_CLOUDINARY=false)
+
+Cada upload é decodificado uma única vez, tem a orientação EXIF aplicada e
+os metadados removidos, e gera variantes WebP e JPEG em larguras fixas,
+além do placeholder (prévia minúscula em base64) e da cor dominante.
+O trabalho de CPU roda em um pool de processos dedicado.
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Larguras máximas por variante (nunca amplia a imagem original)
+VARIANTES = {
+    "card": 480,
+    "gallery": 1024,
+    "full": 1920,
+}
+
+FORMATOS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+# Largura da prévia embutida no payload (LQIP); fica com poucas centenas de bytes
+PLACEHOLDER_LARGURA = 16
+
+# Limite contra "decompression bombs" (~50 megapixels)
+Image.MAX_IMAGE_PIXELS = 50_000_000
+
+
+class ImagemInvalida(ValueError):
+    """Arquivo que o Pillow não consegue decodificar (formato, truncado, grande demais)"""
+
+
+def media_dir() -> str:
+    """Raiz das mídias processadas, endereçadas por conteúdo"""
+    return os.path.join(settings.UPLOAD_DIR, "media")
+
+
+def url_local(path: str) -> str:
+    """Converte um caminho dentro de UPLOAD_DIR na URL servida em /uploads"""
+    relativo = os.path.relpath(path, settings.UPLOAD_DIR).replace(os.sep, "/")
+    return f"/uploads/{relativo}"
+
+
+def caminho_por_hash(destino_dir: str, conteudo: bytes, extensao: str) -> str:
+    """
+    Caminho endereçado pelo conteúdo: {destino_dir}/{hh}/{sha256[:32]}.{ext}
+
+    Como o nome muda sempre que o conteúdo muda, os arquivos podem ser
+    servidos com Cache-Control immutable.
+    """
+    digest = hashlib.sha256(conteudo).hexdigest()[:32]
+    return os.path.join(destino_dir, digest[:2], f"{digest}.{extensao}")
+
+
+def _abrir_rgb(origem: Union[str, BinaryIO], draft: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Decodifica a imagem, aplica a orientação EXIF e converte para RGB
+
+    Args:
+        draft: Tamanho aproximado desejado; em JPEG permite decodificar já
+            reduzido (bem mais rápido quando só a prévia é necessária)
+    """
+    # Só os erros da decodificação viram ImagemInvalida (400); falhas de
+    # disco ao gravar as variantes continuam sendo erro do servidor.
+    # UnidentifiedImageError e "image file is truncated" são OSError.
+    try:
+        with Image.open(origem) as original:
+            if draft:
+                original.draft("RGB", draft)
+            original.load()
+            imagem = ImageOps.exif_transpose(original)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImagemInvalida(str(e)) from e
+
+    # JPEG não tem canal alfa; aplica fundo branco em PNG/WebP transparentes
+    if imagem.mode in ("RGBA", "LA", "P"):
+        imagem = imagem.convert("RGBA")
+        fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+        fundo.paste(imagem, mask=imagem.split()[-1])
+        imagem = fundo
+    elif imagem.mode != "RGB":
+        imagem = imagem.convert("RGB")
+
+    return imagem
+
+
+def gerar_placeholder(imagem: Image.Image) -> Dict[str, str]:
+    """
+    Prévia minúscula (data URI WebP) e cor dominante de uma imagem RGB
+
+    Returns:
+        {"placeholder": "data:image/webp;base64,...", "cor_dominante": "#rrggbb"}
+    """
+    altura = max(1, round(imagem.height * PLACEHOLDER_LARGURA / imagem.width))
+    previa = imagem.resize((PLACEHOLDER_LARGURA, altura), Image.BILINEAR)
+
+    buffer = io.BytesIO()
+    previa.save(buffer, format="WEBP", quality=40)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    # Cor mais frequente após reduzir a paleta (mais fiel que a média)
+    amostra = imagem.resize((64, max(1, round(imagem.height * 64 / imagem.width))), Image.BILINEAR)
+    paleta = amostra.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, indice = max(paleta.getcolors())
+    r, g, b = paleta.getpalette()[indice * 3:indice * 3 + 3]
+
+    return {"placeholder": placeholder, "cor_dominante": f"#{r:02x}{g:02x}{b:02x}"}
+
+
+def analisar_imagem(origem: Union[str, BinaryIO]) -> Dict[str, str]:
+    """Placeholder e cor dominante de um arquivo (upload no Cloudinary e backfill)"""
+    imagem = _abrir_rgb(origem, draft=(128, 128))
+    return gerar_placeholder(imagem)
+
+
+def gerar_variantes(imagem: Image.Image, destino_dir: str) -> Dict[str, dict]:
+    """
+    Gera as variantes de uma imagem RGB já decodificada
+
+    Args:
+        imagem: Imagem decodificada por _abrir_rgb
+        destino_dir: Diretório raiz das mídias (arquivos nomeados pelo hash do conteúdo)
+
+    Returns:
+        {"card": {"largura", "altura", "webp", "jpeg"}, "gallery": {...}, "full": {...}}
+        com caminhos de arquivo em "webp"/"jpeg"
+    """
+    variantes = {}
+    for nome, largura_max in VARIANTES.items():
+        variante = imagem
+        if imagem.width > largura_max:
+            altura = round(imagem.height * largura_max / imagem.width)
+            variante = imagem.resize((largura_max, altura), Image.LANCZOS)
+
+        info = {"largura": variante.width, "altura": variante.height}
+        for extensao, opcoes in FORMATOS.items():
+            buffer = io.BytesIO()
+            # Sem exif/icc nos argumentos: o arquivo salvo sai sem metadados
+            variante.save(buffer, **opcoes)
+            conteudo = buffer.getvalue()
+
+            path = caminho_por_hash(destino_dir, conteudo, extensao)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.part"
+                with open(tmp_path, "wb") as f:
+                    f.write(conteudo)
+                os.replace(tmp_path, path)
+            info[extensao] = path
+        variantes[nome] = info
+
+    return variantes
+
+
+def processar_arquivo(origem_path: str, destino_dir: str) -> dict:
+    """
+    Decodifica uma vez e gera variantes + placeholder (executado no pool de processos)
+
+    Returns:
+        {"variantes": {...}, "placeholder": str, "cor_dominante": str}
+    """
+    imagem = _abrir_rgb(origem_path)
+    return {
+        "variantes": gerar_variantes(imagem, destino_dir),
+        **gerar_placeholder(imagem),
+    }
+
+
+class ImagePipeline:
+    """Executa processar_arquivo em um pool de processos criado sob demanda"""
+
+    def __init__(self, max_workers: int):
+        self._max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            logger.info(f"Pool de processamento de imagens iniciado com {self._max_workers} processos")
+        return self._executor
+
+    async def processar(
+        self,
+        origem_path: str,
+        destino_dir: Optional[str] = None,
+        remover_original: bool = True,
+    ) -> dict:
+        """
+        Gera as variantes e o placeholder e devolve as URLs públicas
+
+        Args:
+            destino_dir: Raiz das mídias (padrão UPLOAD_DIR/media)
+            remover_original: Apaga o arquivo enviado (com metadados) após processar
+
+        Returns:
+            {"variantes": {...}, "placeholder", "cor_dominante"}, com URLs
+            /uploads/... em "webp"/"jpeg" de cada variante
+        """
+        destino_dir = destino_dir or media_dir()
+        loop = asyncio.get_running_loop()
+        try:
+            resultado = await loop.run_in_executor(
+                self._get_executor(), processar_arquivo, origem_path, destino_dir
+            )
+        except ImagemInvalida as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Arquivo de imagem inválido: {str(e)}",
+            )
+        finally:
+            if remover_original and os.path.exists(origem_path):
+                os.remove(origem_path)
+
+        resultado["variantes"] = {
+            nome: {
+                **info,
+                "webp": url_local(info["webp"]),
+                "jpeg": url_local(info["jpeg"]),
+            }
+            for nome, info in resultado["variantes"].items()
+        }
+        return resultado
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+image_pipeline = ImagePipeline(max_workers=settings.IMAGE_PROCESS_WORKERS)
@@ -0,0 +1,154 @@
+"""
+Deduplicação de leads por e-mail e telefone normalizados
+
+Cada lead guarda as chaves normalizadas do contato, indexadas. Um contato
+novo da mesma pessoa (mesmo e-mail ou telefone) dentro de
+LEAD_DEDUP_JANELA_DIAS desde o último contato é mesclado no lead ainda
+aberto, em vez de criar outro. O histórico é deduplicado pelo
+dedupe_leads.py, com a mesma regra.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.lead import Lead, LeadStatus
+from app.models.visita import Visita
+from app.services import contadores_service, rollups_service
+
+STATUS_ABERTOS = (
+    LeadStatus.novo,
+    LeadStatus.contatado,
+    LeadStatus.visitaAgendada,
+    LeadStatus.negociacao,
+)
+
+# Ao mesclar, fica o status mais avançado (perdido só vence se os dois forem perdidos)
+ORDEM_FUNIL = {
+    LeadStatus.perdido: 0,
+    LeadStatus.novo: 1,
+    LeadStatus.contatado: 2,
+    LeadStatus.visitaAgendada: 3,
+    LeadStatus.negociacao: 4,
+    LeadStatus.convertido: 5,
+}
+
+DOMINIOS_GMAIL = ("gmail.com", "googlemail.com")
+
+
+def normalizar_email(email: Optional[str]) -> Optional[str]:
+    """Minúsculas e sem espaços; no Gmail também sem pontos e sem +sufixo"""
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return email or None
+    usuario, dominio = email.rsplit("@", 1)
+    if dominio in DOMINIOS_GMAIL:
+        usuario = usuario.split("+", 1)[0].replace(".", "")
+        dominio = "gmail.com"
+    return f"{usuario}@{dominio}"
+
+
+def normalizar_telefone(telefone: Optional[str]) -> Optional[str]:
+    """Só dígitos, sem o código do país (55) e sem o 0 de longa distância"""
+    digitos = re.sub(r"\D", "", telefone or "")
+    if digitos.startswith("55") and len(digitos) in (12, 13):
+        digitos = digitos[2:]
+    elif digitos.startswith("0") and len(digitos) in (11, 12):
+        digitos = digitos[1:]
+    return digitos or None
+
+
+def atualizar_chaves(lead: Lead) -> None:
+    lead.email_normalizado = normalizar_email(lead.email)
+    lead.telefone_normalizado = normalizar_telefone(lead.telefone)
+
+
+def ultimo_contato_expr():
+    # Leads anteriores à migração 0012 não têm ultimo_contato_em
+    return func.coalesce(Lead.ultimo_contato_em, Lead.created_at)
+
+
+def buscar_duplicado(db: Session, lead: Lead) -> Optional[Lead]:
+    """
+    Lead aberto com o mesmo e-mail ou telefone e último contato dentro da janela
+
+    A linha encontrada fica travada até o commit, para que dois contatos
+    simultâneos da mesma pessoa sejam mesclados um depois do outro.
+    """
+    if settings.LEAD_DEDUP_JANELA_DIAS <= 0:
+        return None
+
+    chaves = []
+    if lead.email_normalizado:
+        chaves.append(Lead.email_normalizado == lead.email_normalizado)
+    if lead.telefone_normalizado:
+        chaves.append(Lead.telefone_normalizado == lead.telefone_normalizado)
+    if not chaves:
+        return None
+
+    limite = datetime.now(timezone.utc) - timedelta(days=settings.LEAD_DEDUP_JANELA_DIAS)
+    return (
+        db.query(Lead)
+        .filter(
+            or_(*chaves),
+            Lead.status.in_(STATUS_ABERTOS),
+            ultimo_contato_expr() >= limite,
+        )
+        .order_by(ultimo_contato_expr().desc(), Lead.id.desc())
+        .with_for_update()
+        .first()
+    )
+
+
+def _juntar_mensagens(anterior: Optional[str], nova: Optional[str], momento: datetime) -> Optional[str]:
+    if not nova:
+        return anterior
+    nova = f"[{momento:%d/%m/%Y %H:%M}] {nova}"
+    return f"{anterior}\n\n{nova}" if anterior else nova
+
+
+def mesclar_contato(lead: Lead, novo: Lead) -> None:
+    """Registra no lead existente um novo contato (ainda não gravado) da mesma pessoa"""
+    agora = datetime.now(timezone.utc)
+    lead.mensagem = _juntar_mensagens(lead.mensagem, novo.mensagem, agora)
+    lead.origem = lead.origem or novo.origem
+    lead.quantidade_contatos = (lead.quantidade_contatos or 1) + 1
+    lead.ultimo_contato_em = agora
+
+
+def mesclar_leads(db: Session, alvo: Lead, duplicado: Lead) -> None:
+    """
+    Incorpora `duplicado` em `alvo` e remove o duplicado (commit fica com o chamador)
+
+    Visitas passam para o alvo; contadores e rollups acompanham a troca de
+    status do alvo e a remoção do duplicado.
+    """
+    db.execute(
+        update(Visita)
+        .where(Visita.lead_id == duplicado.id)
+        .values(lead_id=alvo.id),
+        execution_options={"synchronize_session": False},
+    )
+
+    momento = duplicado.ultimo_contato_em or duplicado.created_at
+    alvo.mensagem = _juntar_mensagens(alvo.mensagem, duplicado.mensagem, momento)
+    alvo.origem = alvo.origem or duplicado.origem
+    alvo.quantidade_contatos = (alvo.quantidade_contatos or 1) + (duplicado.quantidade_contatos or 1)
+    alvo.ultimo_contato_em = max(
+        alvo.ultimo_contato_em or alvo.created_at, momento
+    )
+
+    status_anterior = alvo.status
+    if ORDEM_FUNIL[LeadStatus(duplicado.status)] > ORDEM_FUNIL[LeadStatus(alvo.status)]:
+        alvo.status = duplicado.status
+    contadores_service.registrar_lead_status(db, status_anterior, alvo.status)
+    rollups_service.registrar_lead(
+        db, rollups_service.dia_utc(alvo.created_at), status_anterior, alvo.status
+    )
+
+    contadores_service.registrar_remocao_lead(db, duplicado)
+    rollups_service.registrar_lead(
+        db, rollups_service.dia_utc(duplicado.created_at), duplicado.status, None
+    )
+    db.delete(duplicado)
@@ -0,0 +1,331 @@
+"""
+Agrupamento de imóveis no mapa (clusters)
+
+Os imóveis são agregados por célula de geohash em várias precisões
+(`mapa_celulas`). Cada nível de zoom usa a precisão cuja célula ocupa
+algumas dezenas de pixels na tela, e o endpoint lê só as células da área
+visível, sem tocar na tabela de imóveis.
+
+Criação, edição e remoção de imóveis ajustam as células na mesma
+transação. Filtros que os agregados não cobrem (quartos, faixa de preço,
+busca textual...) caem em um GROUP BY sobre os imóveis da área visível,
+que continua limitado pelo índice de geohash.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, cast, delete, func, literal, select, update, String
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session
+from app.models.imovel import Imovel, TipoImovel, TipoNegocio
+from app.models.mapa_celula import MapaCelula
+from app.services import geolocalizacao
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Precisões de geohash com agregados (célula de ~5000km até ~150m)
+PRECISOES_MAPA = range(1, 8)
+
+# Tamanho alvo de uma célula na tela, em fração de um tile de 256px
+FRACAO_TILE = 1 / 8
+
+
+@dataclass(frozen=True)
+class PosicaoMapa:
+    """O que um imóvel contribui para as células do mapa"""
+    geohash: str
+    tipo_negocio: str
+    tipo_imovel: str
+    latitude: float
+    longitude: float
+    preco: Optional[float]
+
+
+def posicao(imovel: Imovel) -> Optional[PosicaoMapa]:
+    """Estado atual do imóvel para o mapa; None se ainda não tem coordenadas"""
+    if not imovel.geohash or imovel.latitude is None or imovel.longitude is None:
+        return None
+    tipo_negocio = TipoNegocio(imovel.tipo_negocio).value
+    preco = imovel.preco_venda if tipo_negocio == TipoNegocio.venda.value else imovel.valor_aluguel
+    return PosicaoMapa(
+        geohash=imovel.geohash,
+        tipo_negocio=tipo_negocio,
+        tipo_imovel=TipoImovel(imovel.tipo_imovel).value,
+        latitude=imovel.latitude,
+        longitude=imovel.longitude,
+        preco=preco,
+    )
+
+
+def preco_expr():
+    """Preço de venda ou aluguel, conforme o tipo de negócio (expressão SQL)"""
+    return case(
+        (Imovel.tipo_negocio == TipoNegocio.venda, Imovel.preco_venda),
+        else_=Imovel.valor_aluguel,
+    )
+
+
+def precisao_do_zoom(zoom: int) -> int:
+    """Maior precisão cuja célula ainda tem pelo menos FRACAO_TILE de um tile nesse zoom"""
+    largura_alvo = 360.0 / (2 ** zoom) * FRACAO_TILE
+    escolhida = PRECISOES_MAPA[0]
+    for precisao in PRECISOES_MAPA:
+        if geolocalizacao.tamanho_celula(precisao)[1] >= largura_alvo:
+            escolhida = precisao
+    return escolhida
+
+
+# ---------------------------------------------------------------------------
+# Manutenção incremental
+# ---------------------------------------------------------------------------
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(MapaCelula)
+    if dialect == "sqlite":
+        return sqlite.insert(MapaCelula)
+    raise NotImplementedError(f"Agregados do mapa não suportam o banco '{dialect}'")
+
+
+def _menor_maior(db: Session):
+    # LEAST/GREATEST no PostgreSQL; min/max escalares no SQLite
+    if db.get_bind().dialect.name == "sqlite":
+        return func.min, func.max
+    return func.least, func.greatest
+
+
+def _chave(precisao: int, celula: str, pos: PosicaoMapa):
+    return (
+        MapaCelula.precisao == precisao,
+        MapaCelula.celula == celula,
+        MapaCelula.tipo_negocio == pos.tipo_negocio,
+        MapaCelula.tipo_imovel == pos.tipo_imovel,
+    )
+
+
+def _adicionar(db: Session, pos: PosicaoMapa) -> None:
+    menor, maior = _menor_maior(db)
+    for precisao in PRECISOES_MAPA:
+        stmt = _upsert_insert(db).values(
+            precisao=precisao,
+            celula=pos.geohash[:precisao],
+            tipo_negocio=pos.tipo_negocio,
+            tipo_imovel=pos.tipo_imovel,
+            quantidade=1,
+            soma_lat=pos.latitude,
+            soma_lng=pos.longitude,
+            preco_min=pos.preco,
+            preco_max=pos.preco,
+        )
+        valores = {
+            "quantidade": MapaCelula.quantidade + 1,
+            "soma_lat": MapaCelula.soma_lat + pos.latitude,
+            "soma_lng": MapaCelula.soma_lng + pos.longitude,
+        }
+        if pos.preco is not None:
+            valores["preco_min"] = menor(func.coalesce(MapaCelula.preco_min, pos.preco), pos.preco)
+            valores["preco_max"] = maior(func.coalesce(MapaCelula.preco_max, pos.preco), pos.preco)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["precisao", "celula", "tipo_negocio", "tipo_imovel"],
+            set_=valores,
+        ))
+
+
+def _faixa_de_precos(db: Session, celula: str, pos: PosicaoMapa) -> Tuple[Optional[float], Optional[float]]:
+    """Recalcula min/max de preço de uma célula a partir dos imóveis"""
+    preco = preco_expr()
+    return tuple(
+        db.query(func.min(preco), func.max(preco))
+        .filter(
+            geolocalizacao.filtro_celulas([celula]),
+            Imovel.tipo_negocio == TipoNegocio(pos.tipo_negocio),
+            Imovel.tipo_imovel == TipoImovel(pos.tipo_imovel),
+        )
+        .one()
+    )
+
+
+def _remover(db: Session, pos: PosicaoMapa) -> None:
+    for precisao in PRECISOES_MAPA:
+        celula = pos.geohash[:precisao]
+        chave = _chave(precisao, celula, pos)
+        linha = db.execute(
+            select(MapaCelula.quantidade, MapaCelula.preco_min, MapaCelula.preco_max)
+            .where(*chave)
+            .with_for_update()
+        ).first()
+        if linha is None:
+            # Célula ainda não agregada (backfill pendente); a reconstrução corrige
+            continue
+        if linha.quantidade <= 1:
+            db.execute(delete(MapaCelula).where(*chave))
+            continue
+
+        valores = {
+            "quantidade": MapaCelula.quantidade - 1,
+            "soma_lat": MapaCelula.soma_lat - pos.latitude,
+            "soma_lng": MapaCelula.soma_lng - pos.longitude,
+        }
+        # min/max não se desfazem por subtração: só recalcula se o preço removido era um extremo
+        if pos.preco is not None and pos.preco in (linha.preco_min, linha.preco_max):
+            valores["preco_min"], valores["preco_max"] = _faixa_de_precos(db, celula, pos)
+        db.execute(update(MapaCelula).where(*chave).values(**valores))
+
+
+def registrar(db: Session, anterior: Optional[PosicaoMapa], novo: Optional[PosicaoMapa]) -> None:
+    """
+    Move um imóvel entre células; None representa criação ou remoção
+
+    Deve ser chamado depois do flush da alteração do imóvel (o recálculo de
+    preços lê a tabela de imóveis). O commit fica com o chamador.
+    """
+    if anterior == novo:
+        return
+    if anterior is not None:
+        _remover(db, anterior)
+    if novo is not None:
+        _adicionar(db, novo)
+
+
+def reconstruir(db: Session) -> int:
+    """
+    Recalcula todos os agregados a partir dos imóveis (um INSERT ... SELECT por precisão)
+
+    Returns:
+        Quantidade de células gravadas
+    """
+    db.execute(delete(MapaCelula))
+    preco = preco_expr()
+    for precisao in PRECISOES_MAPA:
+        celula = func.substr(Imovel.geohash, 1, precisao)
+        tipo_negocio = cast(Imovel.tipo_negocio, String)
+        tipo_imovel = cast(Imovel.tipo_imovel, String)
+        agregados = (
+            select(
+                literal(precisao),
+                celula,
+                tipo_negocio,
+                tipo_imovel,
+                func.count(Imovel.id),
+                func.sum(Imovel.latitude),
+                func.sum(Imovel.longitude),
+                func.min(preco),
+                func.max(preco),
+            )
+            .where(
+                Imovel.geohash.isnot(None),
+                Imovel.latitude.isnot(None),
+                Imovel.longitude.isnot(None),
+            )
+            .group_by(celula, tipo_negocio, tipo_imovel)
+        )
+        db.execute(
+            MapaCelula.__table__.insert().from_select(
+                ["precisao", "celula", "tipo_negocio", "tipo_imovel", "quantidade",
+                 "soma_lat", "soma_lng", "preco_min", "preco_max"],
+                agregados,
+            )
+        )
+    db.commit()
+
+    total = db.query(func.count()).select_from(MapaCelula).scalar() or 0
+    logger.info(f"Agregados do mapa reconstruídos: {total} células")
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+def _montar_clusters(
+    linhas: Iterable,
+    lat_min: float, lng_min: float, lat_max: float, lng_max: float,
+) -> List[dict]:
+    """
+    Junta as linhas (celula, tipo_negocio, quantidade, soma_lat, soma_lng,
+    preco_min, preco_max) por célula e descarta centroides fora da área
+    """
+    celulas: Dict[str, dict] = {}
+    for celula, tipo_negocio, quantidade, soma_lat, soma_lng, preco_min, preco_max in linhas:
+        if not quantidade:
+            continue
+        cluster = celulas.setdefault(
+            celula, {"quantidade": 0, "soma_lat": 0.0, "soma_lng": 0.0, "precos": {}}
+        )
+        cluster["quantidade"] += quantidade
+        cluster["soma_lat"] += soma_lat
+        cluster["soma_lng"] += soma_lng
+
+        tipo_negocio = TipoNegocio(tipo_negocio).value
+        if preco_min is not None:
+            faixa = cluster["precos"].setdefault(tipo_negocio, {"min": preco_min, "max": preco_max})
+            faixa["min"] = min(faixa["min"], preco_min)
+            faixa["max"] = max(faixa["max"], preco_max)
+
+    clusters = []
+    for celula, cluster in sorted(celulas.items()):
+        latitude = cluster["soma_lat"] / cluster["quantidade"]
+        longitude = cluster["soma_lng"] / cluster["quantidade"]
+        if not (lat_min <= latitude <= lat_max and lng_min <= longitude <= lng_max):
+            continue
+        clusters.append({
+            "geohash": celula,
+            "latitude": round(latitude, 6),
+            "longitude": round(longitude, 6),
+            "quantidade": cluster["quantidade"],
+            "precos": cluster["precos"],
+        })
+    return clusters
+
+
+def clusters_agregados(
+    db: Session,
+    retangulo: Tuple[float, float, float, float],
+    precisao: int,
+    tipo_negocio: Optional[str] = None,
+    tipo_imovel: Optional[str] = None,
+) -> List[dict]:
+    """Clusters da área lidos de mapa_celulas (filtros só por tipo de negócio/imóvel)"""
+    celulas = geolocalizacao.celulas_cobertura(*retangulo, precisao_max=precisao)
+    query = db.query(
+        MapaCelula.celula,
+        MapaCelula.tipo_negocio,
+        MapaCelula.quantidade,
+        MapaCelula.soma_lat,
+        MapaCelula.soma_lng,
+        MapaCelula.preco_min,
+        MapaCelula.preco_max,
+    ).filter(MapaCelula.precisao == precisao)
+    if celulas:
+        query = query.filter(geolocalizacao.filtro_celulas(celulas, MapaCelula.celula))
+    if tipo_negocio:
+        query = query.filter(MapaCelula.tipo_negocio == tipo_negocio)
+    if tipo_imovel:
+        query = query.filter(MapaCelula.tipo_imovel == tipo_imovel)
+    return _montar_clusters(query.all(), *retangulo)
+
+
+def clusters_filtrados(
+    query: Query,
+    retangulo: Tuple[float, float, float, float],
+    precisao: int,
+) -> List[dict]:
+    """Clusters calculados na hora a partir de uma consulta de imóveis já filtrada"""
+    celula = func.substr(Imovel.geohash, 1, precisao)
+    preco = preco_expr()
+    linhas = (
+        query.filter(geolocalizacao.filtro_retangulo(*retangulo))
+        .with_entities(
+            celula,
+            Imovel.tipo_negocio,
+            func.count(Imovel.id),
+            func.sum(Imovel.latitude),
+            func.sum(Imovel.longitude),
+            func.min(preco),
+            func.max(preco),
+        )
+        .group_by(celula, Imovel.tipo_negocio)
+        .all()
+    )
+    return _montar_clusters(linhas, *retangulo)
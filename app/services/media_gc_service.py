@@ -0,0 +1,359 @@
+"""
+Coleta de mídias órfãs (arquivos locais e assets do Cloudinary sem linha em imovel_imagens)
+
+Os dois lados são percorridos em ordem de chave, sem carregar nenhum deles
+inteiro em memória:
+
+- armazenamento: diretórios de UPLOAD_DIR (media/, imoveis/, tmp/) em ordem
+  lexicográfica, ou a Search API do Cloudinary ordenada por public_id;
+- banco: as chaves referenciadas (storage_key, imagem_url local e URLs das
+  variantes) em uma única consulta ordenada, lida em lotes pelo cursor.
+
+Um merge dos dois fluxos aponta os objetos não referenciados. Objetos mais
+novos que `idade_minima` são preservados: um upload em andamento grava o
+arquivo antes de a linha ser commitada. Como a deduplicação compartilha
+objetos entre imóveis, só o que não é referenciado por nenhuma linha é
+removido.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Set
+import cloudinary.search
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.imovel import ImovelImagem
+from app.services.cloudinary_service import cloudinary_service
+from app.services.fake_storage import fake_uploader
+from app.services.image_processing import FORMATOS, VARIANTES
+from app.services.responsive_images import public_id_da_url
+import logging
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_URL_LOCAL = "/uploads/"
+
+# Subdiretórios de UPLOAD_DIR gerenciados pelo app
+DIRETORIOS_LOCAIS = ("imoveis", "media", "tmp")
+
+# Versões pré-comprimidas servidas por CachedStaticFiles ao lado do arquivo original
+SUFIXOS_PRECOMPRIMIDOS = (".br", ".gz")
+
+PREFIXO_CLOUDINARY = "imobiliaria/imoveis/"
+CLOUDINARY_PAGINA = 500
+
+
+@dataclass(frozen=True)
+class ObjetoArmazenado:
+    chave: str  # caminho relativo a UPLOAD_DIR ou public_id do Cloudinary
+    tamanho: int
+    modificado_em: float  # timestamp unix
+
+
+@dataclass
+class ResultadoColeta:
+    armazenamento: str
+    verificados: int = 0
+    orfaos: int = 0
+    bytes_orfaos: int = 0
+    removidos: int = 0
+    falhas: int = 0
+    exemplos: List[str] = field(default_factory=list)
+
+
+class LimitadorTaxa:
+    """Libera no máximo `por_segundo` operações por segundo entre todas as threads"""
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._proximo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            agora = time.monotonic()
+            espera = self._proximo - agora
+            self._proximo = max(self._proximo, agora) + self.intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+
+# ---------------------------------------------------------------------------
+# Listagem do armazenamento (em ordem de chave)
+# ---------------------------------------------------------------------------
+
+def _percorrer(diretorio: str, relativo: str) -> Iterator[ObjetoArmazenado]:
+    """
+    Percorre um diretório em profundidade na mesma ordem da comparação de strings
+
+    Subdiretórios são ordenados como "nome/" para que "a/x" fique depois de
+    "a-b", exatamente como "a/x" > "a-b" no merge.
+    """
+    try:
+        with os.scandir(diretorio) as it:
+            entradas = [(e.name + "/" if e.is_dir(follow_symlinks=False) else e.name, e) for e in it]
+    except FileNotFoundError:
+        return
+
+    for nome, entrada in sorted(entradas, key=lambda item: item[0]):
+        chave = f"{relativo}/{entrada.name}"
+        if nome.endswith("/"):
+            yield from _percorrer(entrada.path, chave)
+        elif entrada.is_file(follow_symlinks=False):
+            st = entrada.stat(follow_symlinks=False)
+            yield ObjetoArmazenado(chave, st.st_size, st.st_mtime)
+
+
+def listar_locais() -> Iterator[ObjetoArmazenado]:
+    for diretorio in sorted(DIRETORIOS_LOCAIS):
+        yield from _percorrer(os.path.join(settings.UPLOAD_DIR, diretorio), diretorio)
+
+
+def _timestamp_cloudinary(valor: Optional[str]) -> float:
+    if not valor:
+        return 0.0
+    return datetime.fromisoformat(valor.replace("Z", "+00:00")).timestamp()
+
+
+def listar_cloudinary(pagina: int = CLOUDINARY_PAGINA) -> Iterator[ObjetoArmazenado]:
+    """Assets da pasta dos imóveis, página a página, ordenados por public_id"""
+    if settings.CLOUDINARY_FAKE:
+        for public_id in sorted(fake_uploader.objects):
+            if public_id.startswith(PREFIXO_CLOUDINARY):
+                yield ObjetoArmazenado(public_id, len(fake_uploader.objects[public_id]), 0.0)
+        return
+
+    cursor = None
+    while True:
+        busca = (
+            cloudinary.search.Search()
+            .expression(f"resource_type:image AND public_id:{PREFIXO_CLOUDINARY}*")
+            .sort_by("public_id", "asc")
+            .fields(["public_id", "bytes", "created_at"])
+            .max_results(pagina)
+        )
+        if cursor:
+            busca = busca.next_cursor(cursor)
+        resposta = busca.execute()
+
+        for recurso in resposta.get("resources", []):
+            yield ObjetoArmazenado(
+                recurso["public_id"],
+                recurso.get("bytes") or 0,
+                _timestamp_cloudinary(recurso.get("created_at")),
+            )
+
+        cursor = resposta.get("next_cursor")
+        if not cursor:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Chaves referenciadas no banco (em ordem de chave)
+# ---------------------------------------------------------------------------
+
+def _sem_prefixo_local(coluna):
+    """URL /uploads/... convertida no caminho relativo a UPLOAD_DIR"""
+    return func.substr(coluna, len(PREFIXO_URL_LOCAL) + 1)
+
+
+def listar_referenciadas(db: Session, lote: int = 5000) -> Iterator[str]:
+    """
+    Todas as chaves usadas por imovel_imagens, sem repetição e em ordem binária
+
+    Uma consulta só (UNION das colunas), lida pelo cursor em lotes de `lote`.
+    """
+    consultas = [
+        select(ImovelImagem.storage_key.label("chave"))
+        .where(ImovelImagem.storage_key.isnot(None)),
+        select(_sem_prefixo_local(ImovelImagem.imagem_url).label("chave"))
+        .where(ImovelImagem.imagem_url.like(f"{PREFIXO_URL_LOCAL}%")),
+    ]
+    for nome in VARIANTES:
+        for formato in FORMATOS:
+            url = ImovelImagem.variantes[nome][formato].as_string()
+            consultas.append(
+                select(_sem_prefixo_local(url).label("chave"))
+                .where(url.like(f"{PREFIXO_URL_LOCAL}%"))
+            )
+
+    uniao = union(*consultas).subquery()
+    ordem = uniao.c.chave
+    if db.get_bind().dialect.name == "postgresql":
+        # Ordem byte a byte, igual à comparação de strings do Python
+        ordem = ordem.collate("C")
+
+    resultado = db.execute(
+        select(uniao.c.chave).order_by(ordem),
+        execution_options={"stream_results": True, "yield_per": lote},
+    )
+    for (chave,) in resultado:
+        yield chave
+
+
+def public_ids_legados(db: Session) -> Set[str]:
+    """
+    public_ids de imagens do Cloudinary gravadas antes de storage_key existir
+
+    Extraídos da URL em Python (não dá para ordenar no banco); o conjunto
+    só contém linhas antigas e não cresce.
+    """
+    urls = db.query(ImovelImagem.imagem_url).filter(
+        ImovelImagem.storage_key.is_(None),
+        ~ImovelImagem.imagem_url.like(f"{PREFIXO_URL_LOCAL}%"),
+    )
+    public_ids = {public_id_da_url(url) for (url,) in urls}
+    public_ids.discard(None)
+    return public_ids
+
+
+def nao_referenciados(
+    armazenados: Iterable[ObjetoArmazenado],
+    referenciadas: Iterable[str],
+    extras: Optional[Set[str]] = None,
+) -> Iterator[ObjetoArmazenado]:
+    """
+    Merge de dois fluxos ordenados: objetos armazenados sem referência
+
+    Falha se algum dos fluxos sair de ordem, em vez de arriscar apagar um
+    objeto referenciado (ex: collation diferente no banco).
+    """
+    extras = extras or set()
+    referenciadas = iter(referenciadas)
+    referencia = next(referenciadas, None)
+    anterior = None
+
+    for objeto in armazenados:
+        if anterior is not None and objeto.chave <= anterior:
+            raise RuntimeError(f"Listagem do armazenamento fora de ordem em '{objeto.chave}'")
+        anterior = objeto.chave
+
+        while referencia is not None and referencia < objeto.chave:
+            proxima = next(referenciadas, None)
+            if proxima is not None and proxima <= referencia:
+                raise RuntimeError(f"Chaves do banco fora de ordem em '{proxima}'")
+            referencia = proxima
+
+        if referencia == objeto.chave or objeto.chave in extras:
+            continue
+        yield objeto
+
+
+# ---------------------------------------------------------------------------
+# Remoção
+# ---------------------------------------------------------------------------
+
+def _base_precomprimida(chave: str) -> Optional[str]:
+    for sufixo in SUFIXOS_PRECOMPRIMIDOS:
+        if chave.endswith(sufixo):
+            return chave[: -len(sufixo)]
+    return None
+
+
+def remover_local(chave: str) -> bool:
+    path = os.path.join(settings.UPLOAD_DIR, *chave.split("/"))
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return True
+    # Remove o diretório se ficou vazio (ex: uploads/imoveis/{id})
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass
+    return True
+
+
+def remover_cloudinary(chave: str) -> bool:
+    return cloudinary_service.delete_image(chave)
+
+
+def coletar(
+    db: Session,
+    armazenamento: str,
+    executar: bool = False,
+    idade_minima: float = 24 * 3600,
+    workers: int = 4,
+    taxa: float = 10.0,
+    lote: int = 500,
+) -> ResultadoColeta:
+    """
+    Procura (e opcionalmente remove) as mídias órfãs de um armazenamento
+
+    Args:
+        armazenamento: "local" ou "cloudinary"
+        executar: Sem ele é só simulação (dry-run): nada é removido
+        idade_minima: Objetos modificados há menos segundos que isso são preservados
+        workers: Remoções em paralelo
+        taxa: Máximo de remoções por segundo (0 = sem limite)
+        lote: Órfãos acumulados antes de cada rodada de remoções
+    """
+    if armazenamento == "local":
+        armazenados = listar_locais()
+        remover: Callable[[str], bool] = remover_local
+        extras: Set[str] = set()
+    elif armazenamento == "cloudinary":
+        if not cloudinary_service.is_available():
+            raise RuntimeError("Cloudinary não está habilitado ou configurado")
+        armazenados = listar_cloudinary()
+        remover = remover_cloudinary
+        extras = public_ids_legados(db)
+    else:
+        raise ValueError(f"Armazenamento desconhecido: {armazenamento}")
+
+    resultado = ResultadoColeta(armazenamento)
+    limite = time.time() - idade_minima
+    limitador = LimitadorTaxa(taxa)
+
+    def _contar(objetos: Iterable[ObjetoArmazenado]) -> Iterator[ObjetoArmazenado]:
+        for objeto in objetos:
+            resultado.verificados += 1
+            yield objeto
+
+    def _remover(chave: str) -> bool:
+        limitador.aguardar()
+        try:
+            return remover(chave)
+        except Exception as e:
+            logger.error(f"Erro ao remover mídia órfã {chave}: {str(e)}")
+            return False
+
+    def _processar(pendentes: List[str]):
+        if executar and pendentes:
+            removidos = sum(executor.map(_remover, pendentes))
+            resultado.removidos += removidos
+            resultado.falhas += len(pendentes) - removidos
+        pendentes.clear()
+
+    pendentes: List[str] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media-gc") as executor:
+        for objeto in nao_referenciados(_contar(armazenados), listar_referenciadas(db), extras):
+            if objeto.modificado_em > limite:
+                continue
+            # .br/.gz só são órfãos quando o arquivo original não existe mais
+            base = _base_precomprimida(objeto.chave) if armazenamento == "local" else None
+            if base and os.path.exists(os.path.join(settings.UPLOAD_DIR, *base.split("/"))):
+                continue
+
+            resultado.orfaos += 1
+            resultado.bytes_orfaos += objeto.tamanho
+            if len(resultado.exemplos) < 20:
+                resultado.exemplos.append(objeto.chave)
+
+            pendentes.append(objeto.chave)
+            if len(pendentes) >= lote:
+                _processar(pendentes)
+        _processar(pendentes)
+
+    logger.info(
+        f"Coleta de mídias ({armazenamento}{'' if executar else ', simulação'}): "
+        f"{resultado.verificados} verificados, {resultado.orfaos} órfãos, "
+        f"{resultado.removidos} removidos, {resultado.falhas} falhas"
+    )
+    return resultado
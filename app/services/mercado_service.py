@@ -0,0 +1,383 @@
+"""
+Estatísticas de preço por m² por segmento de mercado
+
+Cada imóvel guarda preco_m2 (preço de venda ou aluguel / área total) e a
+tabela estatisticas_preco_m2 mantém quantidade, média e quantis por
+(cidade, bairro, tipo_negocio, tipo_imovel), além de uma linha para a
+cidade inteira (bairro = TODOS_BAIRROS).
+
+Quantidade e soma se desfazem por subtração: cada escrita aplica só a
+diferença do imóvel (antes e depois) com um upsert atômico por segmento,
+sem ler os outros imóveis da cidade dentro da transação. Quantis não:
+depois do commit os segmentos tocados são recalculados em uma thread,
+lendo os valores já ordenados pelo índice ix_imoveis_segmento_preco_m2.
+Cada escrita incrementa a versão da linha e o recálculo só grava se a
+versão ainda é a que leu; se outra escrita passou na frente, ela mesma
+agenda o próximo. Linhas com quantis_pendentes (processo que caiu antes de
+recalcular) são reagendadas pela consulta.
+"""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy import case, delete, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.models.estatistica_preco_m2 import EstatisticaPrecoM2
+from app.models.imovel import Imovel, TipoImovel, TipoNegocio
+from app.services.mapa_service import preco_expr
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Valor de bairro das linhas que agregam a cidade inteira
+TODOS_BAIRROS = "*"
+
+QUANTIS = {
+    "p10": 0.10,
+    "p25": 0.25,
+    "mediana": 0.50,
+    "p75": 0.75,
+    "p90": 0.90,
+}
+
+
+class Segmento(NamedTuple):
+    cidade: str
+    bairro: str
+    tipo_negocio: str
+    tipo_imovel: str
+
+
+@dataclass(frozen=True)
+class PosicaoMercado:
+    """O que um imóvel contribui para as estatísticas"""
+    cidade: str
+    bairro: str
+    tipo_negocio: str
+    tipo_imovel: str
+    preco_m2: float
+
+    def segmentos(self) -> List[Segmento]:
+        return [
+            Segmento(self.cidade, self.bairro, self.tipo_negocio, self.tipo_imovel),
+            Segmento(self.cidade, TODOS_BAIRROS, self.tipo_negocio, self.tipo_imovel),
+        ]
+
+
+def calcular_preco_m2(imovel: Imovel) -> None:
+    """Atualiza imovel.preco_m2 a partir do preço do negócio e da área total"""
+    tipo_negocio = TipoNegocio(imovel.tipo_negocio).value
+    preco = imovel.preco_venda if tipo_negocio == TipoNegocio.venda.value else imovel.valor_aluguel
+    if preco and imovel.area_total and imovel.area_total > 0:
+        imovel.preco_m2 = preco / imovel.area_total
+    else:
+        imovel.preco_m2 = None
+
+
+def preco_m2_expr():
+    """Mesma conta de calcular_preco_m2 como expressão SQL (backfill)"""
+    preco = preco_expr()
+    return case(
+        ((preco > 0) & (Imovel.area_total > 0), preco / Imovel.area_total),
+        else_=None,
+    )
+
+
+def posicao(imovel: Imovel) -> Optional[PosicaoMercado]:
+    """Estado atual do imóvel para as estatísticas; None se não tem preço por m²"""
+    if imovel.preco_m2 is None:
+        return None
+    return PosicaoMercado(
+        cidade=imovel.cidade,
+        bairro=imovel.bairro,
+        tipo_negocio=TipoNegocio(imovel.tipo_negocio).value,
+        tipo_imovel=TipoImovel(imovel.tipo_imovel).value,
+        preco_m2=imovel.preco_m2,
+    )
+
+
+def _quantil(ordenados: List[float], q: float) -> float:
+    """Quantil com interpolação linear entre vizinhos (percentile_cont)"""
+    posicao = q * (len(ordenados) - 1)
+    abaixo = math.floor(posicao)
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    return ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * (posicao - abaixo)
+
+
+def _resumo(ordenados: List[float]) -> dict:
+    soma = sum(ordenados)
+    return {
+        "quantidade": len(ordenados),
+        "soma": soma,
+        "media": soma / len(ordenados),
+        **{nome: round(_quantil(ordenados, q), 2) for nome, q in QUANTIS.items()},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Manutenção incremental
+# ---------------------------------------------------------------------------
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(EstatisticaPrecoM2)
+    if dialect == "sqlite":
+        return sqlite.insert(EstatisticaPrecoM2)
+    raise NotImplementedError(f"Estatísticas de mercado não suportam o banco '{dialect}'")
+
+
+def _chave(segmento: Segmento):
+    return (
+        EstatisticaPrecoM2.cidade == segmento.cidade,
+        EstatisticaPrecoM2.bairro == segmento.bairro,
+        EstatisticaPrecoM2.tipo_negocio == segmento.tipo_negocio,
+        EstatisticaPrecoM2.tipo_imovel == segmento.tipo_imovel,
+    )
+
+
+def _filtro_imoveis(segmento: Segmento):
+    condicoes = [
+        Imovel.cidade == segmento.cidade,
+        Imovel.tipo_negocio == TipoNegocio(segmento.tipo_negocio),
+        Imovel.tipo_imovel == TipoImovel(segmento.tipo_imovel),
+        Imovel.preco_m2.isnot(None),
+    ]
+    if segmento.bairro != TODOS_BAIRROS:
+        condicoes.append(Imovel.bairro == segmento.bairro)
+    return condicoes
+
+
+def _aplicar(db: Session, segmento: Segmento, quantidade: int, soma: float) -> None:
+    """Soma a diferença de um imóvel ao segmento em um único upsert (O(1), sem ler outros imóveis)"""
+    nova_quantidade = EstatisticaPrecoM2.quantidade + quantidade
+    nova_soma = EstatisticaPrecoM2.soma + soma
+    stmt = _upsert_insert(db).values(
+        **segmento._asdict(),
+        quantidade=quantidade,
+        soma=soma,
+        media=soma / quantidade if quantidade > 0 else None,
+        versao=1,
+        quantis_pendentes=True,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=list(segmento._fields),
+        set_={
+            "quantidade": nova_quantidade,
+            "soma": nova_soma,
+            "media": case((nova_quantidade > 0, nova_soma / nova_quantidade), else_=None),
+            "versao": EstatisticaPrecoM2.versao + 1,
+            "quantis_pendentes": True,
+            "atualizado_em": func.now(),
+        },
+    ))
+
+
+def registrar(
+    db: Session, anterior: Optional[PosicaoMercado], novo: Optional[PosicaoMercado]
+) -> List[Segmento]:
+    """
+    Aplica a uma escrita a diferença de quantidade e soma; None representa criação ou remoção
+
+    Deve ser chamado antes do commit da alteração do imóvel (o commit fica
+    com o chamador). Devolve os segmentos tocados, para agendar_quantis
+    depois do commit.
+    """
+    if anterior == novo:
+        return []
+    diferencas: Dict[Segmento, List] = {}
+    for posicao_imovel, sinal in ((anterior, -1), (novo, 1)):
+        if posicao_imovel is None:
+            continue
+        for segmento in posicao_imovel.segmentos():
+            diferenca = diferencas.setdefault(segmento, [0, 0.0])
+            diferenca[0] += sinal
+            diferenca[1] += sinal * posicao_imovel.preco_m2
+    # Ordem fixa de travamento entre transações concorrentes
+    segmentos = sorted(diferencas)
+    for segmento in segmentos:
+        quantidade, soma = diferencas[segmento]
+        _aplicar(db, segmento, quantidade, soma)
+    return segmentos
+
+
+def recalcular(db: Session, segmento: Segmento) -> bool:
+    """
+    Recalcula os quantis de um segmento a partir dos imóveis, com commit próprio
+
+    Não trava a linha: só grava se a versão não mudou desde a leitura.
+
+    Returns:
+        False se uma escrita concorrente passou na frente (ela agenda outro recálculo)
+    """
+    versao = db.query(EstatisticaPrecoM2.versao).filter(*_chave(segmento)).scalar()
+    if versao is None:
+        return True
+    valores = [
+        valor for (valor,) in
+        db.query(Imovel.preco_m2).filter(*_filtro_imoveis(segmento)).order_by(Imovel.preco_m2)
+    ]
+    condicoes = (*_chave(segmento), EstatisticaPrecoM2.versao == versao)
+    if valores:
+        resultado = db.execute(
+            update(EstatisticaPrecoM2).where(*condicoes).values(**_resumo(valores), quantis_pendentes=False)
+        )
+    else:
+        resultado = db.execute(delete(EstatisticaPrecoM2).where(*condicoes))
+    db.commit()
+    return resultado.rowcount > 0
+
+
+class RecalculoQuantis:
+    """Recalcula em uma thread, fora das transações de escrita, os quantis dos segmentos alterados"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pendentes: Set[Segmento] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quantis")
+        return self._executor
+
+    def agendar(self, segmentos: Iterable[Segmento]) -> None:
+        """Chamar depois do commit; segmentos já na fila não são agendados de novo"""
+        with self._lock:
+            novos = set(segmentos) - self._pendentes
+            if not novos:
+                return
+            self._pendentes.update(novos)
+            executor = self._get_executor()
+        for segmento in sorted(novos):
+            executor.submit(self._recalcular, segmento)
+
+    def _recalcular(self, segmento: Segmento):
+        # Sai da fila antes de ler: uma escrita durante o recálculo agenda outro
+        with self._lock:
+            self._pendentes.discard(segmento)
+        try:
+            with SessionLocal() as db:
+                recalcular(db, segmento)
+        except Exception as e:
+            logger.error(f"Erro ao recalcular quantis de {segmento}: {e}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+recalculo_quantis = RecalculoQuantis()
+
+
+def agendar_quantis(segmentos: Iterable[Segmento]) -> None:
+    recalculo_quantis.agendar(segmentos)
+
+
+def reconstruir(db: Session, lote: int = 1000) -> int:
+    """
+    Recalcula todos os segmentos em uma passada ordenada pelos imóveis
+
+    Returns:
+        Quantidade de segmentos gravados
+    """
+    db.execute(delete(EstatisticaPrecoM2))
+    linhas = (
+        db.query(Imovel.cidade, Imovel.tipo_negocio, Imovel.tipo_imovel, Imovel.bairro, Imovel.preco_m2)
+        .filter(Imovel.preco_m2.isnot(None))
+        .order_by(Imovel.cidade, Imovel.tipo_negocio, Imovel.tipo_imovel, Imovel.bairro, Imovel.preco_m2)
+        .yield_per(10000)
+    )
+
+    registros = []
+    total = 0
+    for (cidade, tipo_negocio, tipo_imovel), do_tipo in groupby(
+        linhas, key=lambda linha: (linha.cidade, linha.tipo_negocio, linha.tipo_imovel)
+    ):
+        tipo_negocio = TipoNegocio(tipo_negocio).value
+        tipo_imovel = TipoImovel(tipo_imovel).value
+        da_cidade = []
+        for bairro, do_bairro in groupby(do_tipo, key=lambda linha: linha.bairro):
+            valores = [linha.preco_m2 for linha in do_bairro]
+            registros.append({**Segmento(cidade, bairro, tipo_negocio, tipo_imovel)._asdict(), **_resumo(valores)})
+            da_cidade.extend(valores)
+        da_cidade.sort()
+        registros.append({**Segmento(cidade, TODOS_BAIRROS, tipo_negocio, tipo_imovel)._asdict(), **_resumo(da_cidade)})
+
+        if len(registros) >= lote:
+            db.execute(insert(EstatisticaPrecoM2), registros)
+            total += len(registros)
+            registros = []
+
+    if registros:
+        db.execute(insert(EstatisticaPrecoM2), registros)
+        total += len(registros)
+    db.commit()
+
+    logger.info(f"Estatísticas de preço por m² reconstruídas: {total} segmentos")
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+def consultar(
+    db: Session,
+    cidade: Optional[str] = None,
+    bairro: Optional[str] = None,
+    tipo_negocio: Optional[str] = None,
+    tipo_imovel: Optional[str] = None,
+    por_bairro: bool = False,
+) -> List[Dict]:
+    """
+    Estatísticas dos segmentos pedidos, lidas só da tabela materializada
+
+    Sem bairro e sem por_bairro, devolve as linhas da cidade inteira.
+    Cidade e bairro comparam sem diferenciar maiúsculas. Linhas com quantis
+    ainda pendentes saem com os anteriores e têm o recálculo reagendado.
+    """
+    query = db.query(EstatisticaPrecoM2).filter(EstatisticaPrecoM2.quantidade > 0)
+    if cidade:
+        query = query.filter(func.lower(EstatisticaPrecoM2.cidade) == cidade.lower())
+    if bairro:
+        query = query.filter(func.lower(EstatisticaPrecoM2.bairro) == bairro.lower())
+    elif por_bairro:
+        query = query.filter(EstatisticaPrecoM2.bairro != TODOS_BAIRROS)
+    else:
+        query = query.filter(EstatisticaPrecoM2.bairro == TODOS_BAIRROS)
+    if tipo_negocio:
+        query = query.filter(EstatisticaPrecoM2.tipo_negocio == tipo_negocio)
+    if tipo_imovel:
+        query = query.filter(EstatisticaPrecoM2.tipo_imovel == tipo_imovel)
+
+    linhas = query.order_by(
+        EstatisticaPrecoM2.cidade,
+        EstatisticaPrecoM2.bairro,
+        EstatisticaPrecoM2.tipo_negocio,
+        EstatisticaPrecoM2.tipo_imovel,
+    ).all()
+
+    agendar_quantis(
+        Segmento(linha.cidade, linha.bairro, linha.tipo_negocio, linha.tipo_imovel)
+        for linha in linhas if linha.quantis_pendentes
+    )
+
+    return [
+        {
+            "cidade": linha.cidade,
+            "bairro": None if linha.bairro == TODOS_BAIRROS else linha.bairro,
+            "tipo_negocio": linha.tipo_negocio,
+            "tipo_imovel": linha.tipo_imovel,
+            "quantidade": linha.quantidade,
+            "media": None if linha.media is None else round(linha.media, 2),
+            **{nome: getattr(linha, nome) for nome in QUANTIS},
+            "atualizado_em": linha.atualizado_em,
+        }
+        for linha in linhas
+    ]
@@ -0,0 +1,422 @@
+"""
+Notificações por e-mail, SMS e WhatsApp (transactional outbox)
+
+As requisições só gravam linhas na tabela notificacoes, na mesma transação
+do lead ou da visita: se o commit falha, nenhuma mensagem fica pendente, e
+SMTP ou HTTP lentos nunca seguram a resposta. O notificacoes_worker.py
+drena a tabela em lotes:
+
+1. reserva um lote de pendentes (FOR UPDATE SKIP LOCKED no PostgreSQL, para
+   vários workers não pegarem a mesma linha) empurrando disponivel_em para
+   o fim do prazo de reserva, e faz commit;
+2. envia fora da transação, com no máximo NOTIFICACOES_CONCORRENCIA envios
+   simultâneos;
+3. grava o resultado: enviada, nova tentativa com backoff exponencial ou
+   falhou (erro permanente ou tentativas esgotadas).
+
+Se o worker morre no meio do envio, a reserva expira e outro worker tenta
+de novo (entrega pelo menos uma vez).
+
+Os canais da imobiliária seguem os campos notificacao_email/sms/whatsapp
+de Configuracao (lidos do cache_configuracao). Os alertas das buscas
+salvas (alertas_busca) também viram e-mails aqui, agrupados por busca.
+"""
+import json
+import random
+import smtplib
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from itertools import groupby
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.busca_salva import AlertaBusca, BuscaSalva
+from app.models.imovel import Imovel, TipoNegocio
+from app.models.lead import Lead
+from app.models.notificacao import CanalNotificacao, Notificacao, StatusNotificacao
+from app.models.visita import Visita
+from app.services.configuracao_service import cache_configuracao
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Teto do intervalo entre tentativas
+BACKOFF_MAXIMO = timedelta(hours=1)
+
+# Mensagens de erro guardadas em ultimo_erro
+TAMANHO_MAXIMO_ERRO = 1000
+
+# Códigos HTTP dos webhooks que valem nova tentativa (os demais 4xx são permanentes)
+HTTP_TRANSITORIOS = (408, 425, 429)
+
+
+class ErroPermanente(Exception):
+    """Falha que não se resolve tentando de novo (destinatário recusado, 4xx)"""
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _prazo_reserva() -> timedelta:
+    # Folga sobre o timeout de um envio: a reserva não pode vencer com o envio em andamento
+    return timedelta(seconds=max(60.0, settings.NOTIFICACOES_TIMEOUT_SEGUNDOS * 4))
+
+
+def _formatar_preco(valor: Optional[float]) -> str:
+    if not valor:
+        return "sob consulta"
+    return "R$ " + f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _link_imovel(imovel_id: int) -> str:
+    base = (settings.FRONTEND_URL or "").rstrip("/")
+    return f"{base}/imoveis/{imovel_id}" if base else f"Imóvel #{imovel_id}"
+
+
+# ---------------------------------------------------------------------------
+# Gravação (dentro da transação do chamador)
+# ---------------------------------------------------------------------------
+
+def canal_configurado(canal: CanalNotificacao) -> bool:
+    if canal == CanalNotificacao.email:
+        return bool(settings.SMTP_HOST)
+    if canal == CanalNotificacao.sms:
+        return bool(settings.SMS_WEBHOOK_URL)
+    return bool(settings.WHATSAPP_WEBHOOK_URL)
+
+
+def enfileirar(
+    db: Session,
+    canal: CanalNotificacao,
+    destinatario: str,
+    corpo: str,
+    assunto: Optional[str] = None,
+    origem: Optional[str] = None,
+) -> Optional[Notificacao]:
+    """Grava uma mensagem pendente (o commit fica com o chamador); None se o canal não está configurado"""
+    if not destinatario or not canal_configurado(canal):
+        return None
+    notificacao = Notificacao(
+        canal=canal,
+        destinatario=destinatario,
+        assunto=assunto,
+        corpo=corpo,
+        origem=origem,
+        status=StatusNotificacao.pendente,
+        tentativas=0,
+        disponivel_em=_agora(),
+    )
+    db.add(notificacao)
+    return notificacao
+
+
+def _notificar_imobiliaria(db: Session, assunto: str, corpo: str, origem: str) -> int:
+    """Enfileira a mensagem nos canais ligados em Configuracao; retorna quantas foram gravadas"""
+    config = cache_configuracao.obter().admin
+    if not config:
+        return 0
+
+    destinos = []
+    if config.notificacao_email:
+        destinos.append((CanalNotificacao.email, config.email))
+    if config.notificacao_sms:
+        destinos.append((CanalNotificacao.sms, config.telefone))
+    if config.notificacao_whatsapp:
+        destinos.append((CanalNotificacao.whatsapp, config.whatsapp))
+
+    gravadas = 0
+    for canal, destinatario in destinos:
+        # SMS e WhatsApp levam só o resumo (a primeira linha)
+        texto = corpo if canal == CanalNotificacao.email else f"{assunto}\n{corpo.splitlines()[0]}"
+        if enfileirar(db, canal, destinatario, texto, assunto=assunto, origem=origem):
+            gravadas += 1
+    return gravadas
+
+
+def notificar_lead(db: Session, lead: Lead, repetido: bool = False) -> int:
+    """Avisa a imobiliária de um contato recebido (lead novo ou contato mesclado em um lead aberto)"""
+    db.flush()
+    if repetido:
+        assunto = f"Novo contato de {lead.nome} ({lead.quantidade_contatos}º)"
+    else:
+        assunto = f"Novo lead: {lead.nome}"
+    linhas = [
+        f"{lead.nome} - {lead.telefone} - {lead.email}",
+        f"Origem: {lead.origem or 'não informada'}",
+    ]
+    if lead.mensagem:
+        linhas += ["", lead.mensagem]
+    return _notificar_imobiliaria(db, assunto, "\n".join(linhas), f"lead:{lead.id}")
+
+
+def notificar_visita(db: Session, visita: Visita, imovel: Imovel) -> int:
+    """Avisa a imobiliária de uma visita agendada"""
+    db.flush()
+    assunto = f"Visita agendada: {visita.data_hora:%d/%m/%Y %H:%M}"
+    linhas = [
+        f"{visita.nome_cliente} - {visita.telefone_cliente} - {visita.email_cliente}",
+        f"Imóvel: {imovel.titulo} ({imovel.bairro}, {imovel.cidade})",
+        _link_imovel(imovel.id),
+    ]
+    if visita.observacoes:
+        linhas += ["", visita.observacoes]
+    return _notificar_imobiliaria(db, assunto, "\n".join(linhas), f"visita:{visita.id}")
+
+
+def transferir_alertas(db: Session, lote: int) -> int:
+    """
+    Converte alertas de buscas salvas pendentes em e-mails, um por busca, e faz commit
+
+    Returns:
+        Quantidade de alertas transferidos
+    """
+    linhas = (
+        db.query(AlertaBusca, BuscaSalva, Imovel)
+        .join(BuscaSalva, BuscaSalva.id == AlertaBusca.busca_id)
+        .join(Imovel, Imovel.id == AlertaBusca.imovel_id)
+        .filter(AlertaBusca.enviado_em.is_(None))
+        .order_by(AlertaBusca.created_at, AlertaBusca.id)
+        .limit(lote)
+        .with_for_update(skip_locked=True, of=AlertaBusca)
+        .all()
+    )
+    if not linhas:
+        return 0
+
+    agora = _agora()
+    linhas.sort(key=lambda linha: linha[1].id)
+    for _, do_grupo in groupby(linhas, key=lambda linha: linha[1].id):
+        do_grupo = list(do_grupo)
+        busca = do_grupo[0][1]
+        for alerta, _, _ in do_grupo:
+            alerta.enviado_em = agora
+        if not busca.ativa:
+            continue
+
+        imoveis = [imovel for _, _, imovel in do_grupo]
+        assunto = (
+            f"{len(imoveis)} novos imóveis para \"{busca.nome}\""
+            if len(imoveis) > 1 else f"Novo imóvel para \"{busca.nome}\""
+        )
+        corpo = [f"Encontramos imóveis que combinam com a sua busca \"{busca.nome}\":", ""]
+        for imovel in imoveis:
+            venda = TipoNegocio(imovel.tipo_negocio) == TipoNegocio.venda
+            preco = imovel.preco_venda if venda else imovel.valor_aluguel
+            corpo += [
+                f"- {imovel.titulo} ({imovel.bairro}, {imovel.cidade}): {_formatar_preco(preco)}",
+                f"  {_link_imovel(imovel.id)}",
+            ]
+        enfileirar(
+            db, CanalNotificacao.email, busca.email, "\n".join(corpo),
+            assunto=assunto, origem=f"busca:{busca.id}",
+        )
+
+    db.commit()
+    return len(linhas)
+
+
+# ---------------------------------------------------------------------------
+# Envio
+# ---------------------------------------------------------------------------
+
+class Mensagem(NamedTuple):
+    """Cópia de uma notificação reservada, usada pelas threads de envio (sem sessão)"""
+    id: int
+    canal: CanalNotificacao
+    destinatario: str
+    assunto: Optional[str]
+    corpo: str
+
+
+class _Conexoes(threading.local):
+    smtp: Optional[smtplib.SMTP] = None
+
+
+_conexoes = _Conexoes()
+# Todas as conexões abertas (de qualquer thread), para fechar no encerramento
+_abertas = set()
+_lock_abertas = threading.Lock()
+
+
+def _smtp() -> smtplib.SMTP:
+    """Conexão SMTP da thread, reaproveitada entre mensagens"""
+    if _conexoes.smtp is not None:
+        try:
+            if _conexoes.smtp.noop()[0] == 250:
+                return _conexoes.smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        _fechar_smtp(_conexoes.smtp)
+
+    conexao = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.NOTIFICACOES_TIMEOUT_SEGUNDOS)
+    if settings.SMTP_STARTTLS:
+        conexao.starttls()
+    if settings.SMTP_USER:
+        conexao.login(settings.SMTP_USER, settings.SMTP_PASSWORD or "")
+    _conexoes.smtp = conexao
+    with _lock_abertas:
+        _abertas.add(conexao)
+    return conexao
+
+
+def _fechar_smtp(conexao: Optional[smtplib.SMTP]):
+    if conexao is None:
+        return
+    if _conexoes.smtp is conexao:
+        _conexoes.smtp = None
+    with _lock_abertas:
+        _abertas.discard(conexao)
+    try:
+        conexao.quit()
+    except (smtplib.SMTPException, OSError):
+        conexao.close()
+
+
+def _enviar_email(mensagem: Mensagem):
+    email = EmailMessage()
+    email["From"] = settings.SMTP_REMETENTE
+    email["To"] = mensagem.destinatario
+    email["Subject"] = mensagem.assunto or settings.PROJECT_NAME
+    email.set_content(mensagem.corpo)
+    try:
+        _smtp().send_message(email)
+    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+        raise ErroPermanente(str(e)) from e
+    except (smtplib.SMTPException, OSError):
+        # Conexão em estado desconhecido: a próxima mensagem abre outra
+        _fechar_smtp(_conexoes.smtp)
+        raise
+
+
+def _enviar_webhook(url: str, mensagem: Mensagem):
+    corpo = json.dumps({
+        "canal": mensagem.canal.value,
+        "para": mensagem.destinatario,
+        "mensagem": mensagem.corpo,
+    }).encode()
+    requisicao = urllib.request.Request(url, data=corpo, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(requisicao, timeout=settings.NOTIFICACOES_TIMEOUT_SEGUNDOS):
+            pass
+    except urllib.error.HTTPError as e:
+        if 400 <= e.code < 500 and e.code not in HTTP_TRANSITORIOS:
+            raise ErroPermanente(f"HTTP {e.code}: {e.reason}") from e
+        raise
+
+
+def enviar(mensagem: Mensagem):
+    """Envia uma mensagem; levanta ErroPermanente ou qualquer outra exceção (transitória)"""
+    if mensagem.canal == CanalNotificacao.email:
+        _enviar_email(mensagem)
+    elif mensagem.canal == CanalNotificacao.sms:
+        _enviar_webhook(settings.SMS_WEBHOOK_URL, mensagem)
+    else:
+        _enviar_webhook(settings.WHATSAPP_WEBHOOK_URL, mensagem)
+
+
+def _backoff(tentativas: int) -> timedelta:
+    atraso = settings.NOTIFICACOES_RETRY_BACKOFF_SEGUNDOS * (2 ** (tentativas - 1))
+    # Jitter: falhas do mesmo lote não voltam todas no mesmo instante
+    atraso *= random.uniform(0.8, 1.2)
+    return min(timedelta(seconds=atraso), BACKOFF_MAXIMO)
+
+
+class Resultado(NamedTuple):
+    id: int
+    erro: Optional[str] = None
+    permanente: bool = False
+
+
+def _enviar_capturando(mensagem: Mensagem) -> Resultado:
+    try:
+        enviar(mensagem)
+        return Resultado(mensagem.id)
+    except ErroPermanente as e:
+        return Resultado(mensagem.id, str(e), permanente=True)
+    except Exception as e:
+        return Resultado(mensagem.id, f"{type(e).__name__}: {e}")
+
+
+class ResumoLote(NamedTuple):
+    enviadas: int = 0
+    reagendadas: int = 0
+    falhas: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.enviadas + self.reagendadas + self.falhas
+
+
+def _reservar(db: Session, lote: int) -> List[Mensagem]:
+    agora = _agora()
+    reservadas = (
+        db.query(Notificacao)
+        .filter(Notificacao.status == StatusNotificacao.pendente, Notificacao.disponivel_em <= agora)
+        .order_by(Notificacao.disponivel_em, Notificacao.id)
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    mensagens = []
+    for notificacao in reservadas:
+        notificacao.tentativas += 1
+        notificacao.disponivel_em = agora + _prazo_reserva()
+        mensagens.append(Mensagem(
+            notificacao.id,
+            CanalNotificacao(notificacao.canal),
+            notificacao.destinatario,
+            notificacao.assunto,
+            notificacao.corpo,
+        ))
+    db.commit()
+    return mensagens
+
+
+def processar_lote(db: Session, executor: ThreadPoolExecutor, lote: int) -> ResumoLote:
+    """Reserva, envia e registra o resultado de até `lote` notificações pendentes"""
+    mensagens = _reservar(db, lote)
+    if not mensagens:
+        return ResumoLote()
+
+    resultados: Dict[int, Resultado] = {
+        resultado.id: resultado for resultado in executor.map(_enviar_capturando, mensagens)
+    }
+
+    enviadas = reagendadas = falhas = 0
+    agora = _agora()
+    for notificacao in db.query(Notificacao).filter(Notificacao.id.in_(list(resultados))):
+        resultado = resultados[notificacao.id]
+        if resultado.erro is None:
+            notificacao.status = StatusNotificacao.enviada
+            notificacao.enviada_em = agora
+            notificacao.ultimo_erro = None
+            enviadas += 1
+            continue
+
+        notificacao.ultimo_erro = resultado.erro[:TAMANHO_MAXIMO_ERRO]
+        if resultado.permanente or notificacao.tentativas >= settings.NOTIFICACOES_MAX_TENTATIVAS:
+            notificacao.status = StatusNotificacao.falhou
+            falhas += 1
+            logger.warning(
+                f"Notificação {notificacao.id} ({notificacao.origem}) desistida após "
+                f"{notificacao.tentativas} tentativas: {resultado.erro}"
+            )
+        else:
+            notificacao.disponivel_em = agora + _backoff(notificacao.tentativas)
+            reagendadas += 1
+    db.commit()
+
+    return ResumoLote(enviadas, reagendadas, falhas)
+
+
+def encerrar_conexoes():
+    """Fecha as conexões SMTP abertas pelas threads de envio (chamar depois de parar o executor)"""
+    with _lock_abertas:
+        abertas = list(_abertas)
+    for conexao in abertas:
+        _fechar_smtp(conexao)
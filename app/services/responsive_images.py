@@ -0,0 +1,69 @@
+"""
+URLs responsivas (srcset) das imagens dos imóveis
+
+As URLs são montadas sem chamadas de rede: no Cloudinary por transformação
+de largura na própria URL; no armazenamento local a partir das variantes
+geradas no upload. As URLs do Cloudinary ficam em cache por imagem.
+"""
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from app.models.imovel import ImovelImagem
+from app.services.cloudinary_service import cloudinary_service
+from app.services.image_processing import VARIANTES
+
+# Mesmas larguras das variantes locais, para o front tratar os dois casos igual
+LARGURAS = tuple(sorted(VARIANTES.values()))
+
+# URL de entrega devolvida pelo upload: .../image/upload/v123/<public_id>.<ext>
+CLOUDINARY_URL = re.compile(
+    r"^https?://res\.cloudinary\.com/[^/]+/image/upload/(?:v\d+/)?(?P<public_id>.+?)(?:\.\w+)?$"
+)
+
+
+def public_id_da_url(url: str) -> Optional[str]:
+    """Extrai o public_id de uma URL do Cloudinary (imagens gravadas antes do storage_key)"""
+    match = CLOUDINARY_URL.match(url or "")
+    return match.group("public_id") if match else None
+
+
+@lru_cache(maxsize=8192)
+def _cloudinary_srcset(public_id: str, largura_original: Optional[int]) -> Tuple[Tuple[int, str], ...]:
+    larguras = [l for l in LARGURAS if not largura_original or l <= largura_original]
+    if largura_original and (not larguras or larguras[-1] < largura_original <= LARGURAS[-1]):
+        larguras.append(largura_original)
+    return tuple(
+        (largura, cloudinary_service.get_optimized_url(public_id, width=largura, crop="limit"))
+        for largura in larguras
+    )
+
+
+def get_srcset(imagem: ImovelImagem) -> List[dict]:
+    """
+    Lista [{"largura", "url"}] em ordem crescente de largura
+
+    Imagens sem variantes nem storage_key (legado) retornam só a original.
+    """
+    if imagem.variantes:
+        return [
+            {"largura": info["largura"], "url": info["webp"]}
+            for info in sorted(imagem.variantes.values(), key=lambda v: v["largura"])
+        ]
+
+    remota = not imagem.imagem_url.startswith("/uploads/")
+    public_id = remota and (imagem.storage_key or public_id_da_url(imagem.imagem_url))
+    if public_id and cloudinary_service.is_available():
+        return [
+            {"largura": largura, "url": url}
+            for largura, url in _cloudinary_srcset(public_id, imagem.largura)
+        ]
+
+    return [{"largura": imagem.largura, "url": imagem.imagem_url}]
+
+
+def srcset_attr(srcset: List[dict]) -> str:
+    """Formata a lista no atributo HTML srcset ("url 480w, url 1024w")"""
+    return ", ".join(
+        f"{item['url']} {item['largura']}w" if item["largura"] else item["url"]
+        for item in srcset
+    )
@@ -0,0 +1,191 @@
+"""
+Rollups diários de leads e visitas
+
+Cada escrita em leads/visitas ajusta a linha (metrica, dia, dimensao)
+correspondente na mesma transação. O endpoint de analytics lê apenas
+essa tabela, com custo proporcional ao intervalo consultado e não ao
+histórico. `backfill_rollups.py` recalcula um intervalo a partir das
+tabelas de origem.
+
+Os dias são calculados em UTC.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.estatistica_diaria import EstatisticaDiaria
+from app.models.lead import Lead, LeadStatus
+from app.models.visita import Visita, VisitaStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICA_LEADS = "leads"
+METRICA_VISITAS = "visitas"
+
+
+def dia_utc(momento: Optional[datetime]) -> date:
+    """Dia (UTC) de um timestamp; usa o momento atual quando ainda não há valor"""
+    if momento is None:
+        return datetime.now(timezone.utc).date()
+    if momento.tzinfo is None:
+        return momento.date()
+    return momento.astimezone(timezone.utc).date()
+
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(EstatisticaDiaria)
+    if dialect == "sqlite":
+        return sqlite.insert(EstatisticaDiaria)
+    raise NotImplementedError(f"Rollups não suportam o banco '{dialect}'")
+
+
+def ajustar(db: Session, metrica: str, dia: date, dimensao: str, delta: int) -> None:
+    """Soma `delta` ao agregado do dia (cria a linha se preciso); commit fica com o chamador"""
+    if not delta:
+        return
+
+    stmt = _upsert_insert(db).values(
+        metrica=metrica, dia=dia, dimensao=dimensao, valor=delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["metrica", "dia", "dimensao"],
+        set_={"valor": EstatisticaDiaria.valor + delta},
+    )
+    db.execute(stmt)
+
+
+def registrar_lead(
+    db: Session,
+    dia: date,
+    anterior: Optional[LeadStatus],
+    novo: Optional[LeadStatus],
+) -> None:
+    """Move um lead entre status no dia em que foi criado (funil por coorte)"""
+    if anterior == novo:
+        return
+    if anterior is not None:
+        ajustar(db, METRICA_LEADS, dia, LeadStatus(anterior).value, -1)
+    if novo is not None:
+        ajustar(db, METRICA_LEADS, dia, LeadStatus(novo).value, 1)
+
+
+def registrar_visita(
+    db: Session,
+    anterior: Optional[Tuple[date, VisitaStatus]],
+    novo: Optional[Tuple[date, VisitaStatus]],
+) -> None:
+    """Move uma visita entre (dia, status); None representa criação ou remoção"""
+    if anterior == novo:
+        return
+    if anterior is not None:
+        ajustar(db, METRICA_VISITAS, anterior[0], VisitaStatus(anterior[1]).value, -1)
+    if novo is not None:
+        ajustar(db, METRICA_VISITAS, novo[0], VisitaStatus(novo[1]).value, 1)
+
+
+def descontar_visitas_em_cascata(db: Session, filtro) -> None:
+    """Remove dos rollups as visitas que o banco vai apagar via ON DELETE CASCADE"""
+    for data_hora, status in db.query(Visita.data_hora, Visita.status).filter(filtro):
+        if status is not None:
+            registrar_visita(db, (dia_utc(data_hora), status), None)
+
+
+def calcular(db: Session, inicio: date, fim: date) -> Dict[Tuple[str, date, str], int]:
+    """Recalcula os agregados de um intervalo a partir das tabelas de origem"""
+    agregados = defaultdict(int)
+
+    inicio_dt = datetime.combine(inicio, datetime.min.time(), tzinfo=timezone.utc)
+    fim_dt = datetime.combine(fim, datetime.max.time(), tzinfo=timezone.utc)
+
+    leads = (
+        db.query(Lead.created_at, Lead.status)
+        .filter(Lead.created_at >= inicio_dt, Lead.created_at <= fim_dt)
+        .yield_per(5000)
+    )
+    for created_at, status in leads:
+        if status is not None:
+            agregados[(METRICA_LEADS, dia_utc(created_at), status.value)] += 1
+
+    visitas = (
+        db.query(Visita.data_hora, Visita.status)
+        .filter(Visita.data_hora >= inicio_dt, Visita.data_hora <= fim_dt)
+        .yield_per(5000)
+    )
+    for data_hora, status in visitas:
+        if status is not None:
+            agregados[(METRICA_VISITAS, dia_utc(data_hora), status.value)] += 1
+
+    return agregados
+
+
+def backfill(db: Session, inicio: date, fim: date) -> int:
+    """
+    Substitui os rollups do intervalo pelos valores recalculados
+
+    Returns:
+        Quantidade de linhas gravadas
+    """
+    agregados = calcular(db, inicio, fim)
+
+    db.query(EstatisticaDiaria).filter(
+        EstatisticaDiaria.dia >= inicio,
+        EstatisticaDiaria.dia <= fim,
+    ).delete(synchronize_session=False)
+
+    db.bulk_insert_mappings(
+        EstatisticaDiaria,
+        [
+            {"metrica": metrica, "dia": dia, "dimensao": dimensao, "valor": valor}
+            for (metrica, dia, dimensao), valor in agregados.items()
+        ],
+    )
+    db.commit()
+
+    logger.info(f"Rollups recalculados de {inicio} a {fim}: {len(agregados)} linhas")
+    return len(agregados)
+
+
+def consultar(db: Session, inicio: date, fim: date) -> dict:
+    """Monta séries diárias e o funil de leads a partir dos rollups do intervalo"""
+    linhas = (
+        db.query(
+            EstatisticaDiaria.metrica,
+            EstatisticaDiaria.dia,
+            EstatisticaDiaria.dimensao,
+            EstatisticaDiaria.valor,
+        )
+        .filter(
+            EstatisticaDiaria.metrica.in_([METRICA_LEADS, METRICA_VISITAS]),
+            EstatisticaDiaria.dia >= inicio,
+            EstatisticaDiaria.dia <= fim,
+        )
+        .order_by(EstatisticaDiaria.metrica, EstatisticaDiaria.dia)
+        .all()
+    )
+
+    leads_por_dia = defaultdict(int)
+    funil = {status.value: 0 for status in LeadStatus}
+    visitas_por_dia = defaultdict(lambda: {status.value: 0 for status in VisitaStatus})
+
+    for metrica, dia, dimensao, valor in linhas:
+        if metrica == METRICA_LEADS:
+            leads_por_dia[dia] += valor
+            funil[dimensao] = funil.get(dimensao, 0) + valor
+        else:
+            visitas_por_dia[dia][dimensao] = valor
+
+    return {
+        "data_inicio": inicio,
+        "data_fim": fim,
+        "leads_por_dia": [
+            {"dia": dia, "total": total} for dia, total in sorted(leads_por_dia.items())
+        ],
+        "funil_leads": funil,
+        "visitas_por_dia": [
+            {"dia": dia, **por_status} for dia, por_status in sorted(visitas_por_dia.items())
+        ],
+    }
@@ -0,0 +1,328 @@
+"""
+Imóveis semelhantes por k vizinhos mais próximos em memória (NumPy)
+
+Cada processo mantém uma matriz com um vetor de características por imóvel:
+preço (log, padronizado por tipo de negócio), área, quartos, banheiros,
+vagas, tipo de imóvel e de negócio (one-hot), localização (em km) e
+comodidades, já multiplicados pelos pesos. A busca é um produto
+matriz-vetor sobre a matriz inteira (||a-b||² = ||a||² - 2a·b + ||b||²).
+
+A matriz é montada no primeiro uso. Escritas feitas por este processo são
+aplicadas na hora; as dos outros workers chegam pela versão "imoveis"
+(versoes_service): quando ela muda, só as linhas alteradas desde a última
+sincronização são relidas.
+"""
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import DateTime, func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.imovel import Imovel, TipoImovel, TipoNegocio
+from app.services import versoes_service
+from app.services.geolocalizacao import KM_POR_GRAU
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIPOS_IMOVEL = [tipo.value for tipo in TipoImovel]
+TIPOS_NEGOCIO = [tipo.value for tipo in TipoNegocio]
+
+# Peso de cada grupo de características na distância
+PESOS = {
+    "preco": 2.0,
+    "area": 1.5,
+    "quartos": 1.0,
+    "banheiros": 0.7,
+    "vagas": 0.5,
+    "tipo_imovel": 1.5,
+    # Venda x aluguel quase nunca são comparáveis: domina a distância
+    "tipo_negocio": 10.0,
+    "localizacao": 2.0,
+    "comodidades": 0.5,
+}
+
+# Distância que vale uma unidade de característica (imóveis a 5km ~ 1 desvio de área)
+ESCALA_LOCALIZACAO_KM = 5.0
+
+# Margem ao reler alterações (relógio do banco x commits concorrentes)
+MARGEM_SINCRONIZACAO = timedelta(seconds=5)
+
+COLUNAS = (
+    Imovel.id,
+    Imovel.tipo_negocio,
+    Imovel.tipo_imovel,
+    Imovel.preco_venda,
+    Imovel.valor_aluguel,
+    Imovel.area_total,
+    Imovel.quartos,
+    Imovel.banheiros,
+    Imovel.vagas_garagem,
+    Imovel.latitude,
+    Imovel.longitude,
+    Imovel.piscina,
+    Imovel.aceita_pets,
+    Imovel.mobiliado,
+)
+
+NUMERICAS = ("area", "quartos", "banheiros", "vagas")
+DIMENSOES = 1 + len(NUMERICAS) + len(TIPOS_IMOVEL) + len(TIPOS_NEGOCIO) + 2 + 3
+
+
+def _agora_no_banco(db: Session) -> datetime:
+    """Relógio do banco (o mesmo que preenche criado_em/atualizado_em)"""
+    return db.query(func.now(type_=DateTime(timezone=True))).scalar()
+
+
+def _valor(enum_ou_str) -> str:
+    return getattr(enum_ou_str, "value", enum_ou_str)
+
+
+def _log_preco(linha) -> Optional[float]:
+    preco = linha.preco_venda if _valor(linha.tipo_negocio) == TipoNegocio.venda.value else linha.valor_aluguel
+    return math.log1p(preco) if preco else None
+
+
+def _numericas(linha) -> Dict[str, float]:
+    return {
+        "area": math.log1p(linha.area_total or 0),
+        "quartos": float(linha.quartos or 0),
+        "banheiros": float(linha.banheiros or 0),
+        "vagas": float(linha.vagas_garagem or 0),
+    }
+
+
+class Estatisticas:
+    """Médias e desvios usados na padronização (fixados na última reconstrução)"""
+
+    def __init__(self, linhas: list):
+        self.preco: Dict[str, Tuple[float, float]] = {}
+        for negocio in TIPOS_NEGOCIO:
+            precos = [_log_preco(l) for l in linhas if _valor(l.tipo_negocio) == negocio]
+            self.preco[negocio] = self._media_desvio([p for p in precos if p is not None])
+
+        numericas = [_numericas(l) for l in linhas]
+        self.numericas = {
+            nome: self._media_desvio([n[nome] for n in numericas]) for nome in NUMERICAS
+        }
+
+        coordenadas = [(l.latitude, l.longitude) for l in linhas if l.latitude is not None and l.longitude is not None]
+        self.lat_media = float(np.mean([c[0] for c in coordenadas])) if coordenadas else 0.0
+        self.lng_media = float(np.mean([c[1] for c in coordenadas])) if coordenadas else 0.0
+        self.km_por_grau_lng = KM_POR_GRAU * math.cos(math.radians(self.lat_media))
+
+    @staticmethod
+    def _media_desvio(valores: List[float]) -> Tuple[float, float]:
+        if not valores:
+            return 0.0, 1.0
+        desvio = float(np.std(valores))
+        return float(np.mean(valores)), desvio if desvio > 1e-9 else 1.0
+
+    def vetor(self, linha) -> np.ndarray:
+        vetor = np.zeros(DIMENSOES, dtype=np.float32)
+        negocio = _valor(linha.tipo_negocio)
+        i = 0
+
+        # Preço ausente fica na média do tipo de negócio
+        log_preco = _log_preco(linha)
+        media, desvio = self.preco.get(negocio, (0.0, 1.0))
+        vetor[i] = PESOS["preco"] * ((log_preco - media) / desvio if log_preco is not None else 0.0)
+        i += 1
+
+        for nome, valor in _numericas(linha).items():
+            media, desvio = self.numericas[nome]
+            vetor[i] = PESOS[nome] * (valor - media) / desvio
+            i += 1
+
+        vetor[i + TIPOS_IMOVEL.index(_valor(linha.tipo_imovel))] = PESOS["tipo_imovel"]
+        i += len(TIPOS_IMOVEL)
+        vetor[i + TIPOS_NEGOCIO.index(negocio)] = PESOS["tipo_negocio"]
+        i += len(TIPOS_NEGOCIO)
+
+        # Sem coordenadas: fica no centro (não aproxima nem afasta ninguém em especial)
+        if linha.latitude is not None and linha.longitude is not None:
+            escala = PESOS["localizacao"] / ESCALA_LOCALIZACAO_KM
+            vetor[i] = escala * (linha.latitude - self.lat_media) * KM_POR_GRAU
+            vetor[i + 1] = escala * (linha.longitude - self.lng_media) * self.km_por_grau_lng
+        i += 2
+
+        for comodidade in (linha.piscina, linha.aceita_pets, linha.mobiliado):
+            vetor[i] = PESOS["comodidades"] * float(bool(comodidade))
+            i += 1
+
+        return vetor
+
+
+class IndiceSimilares:
+    """Matriz de características com inserção/remoção em O(d) e busca vetorizada"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Serializa cargas e sincronizações: só uma thread relê o banco por vez
+        self._lock_carga = threading.Lock()
+        self._estatisticas: Optional[Estatisticas] = None
+        self._matriz = np.zeros((0, DIMENSOES), dtype=np.float32)
+        self._normas = np.zeros(0, dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._posicao: Dict[int, int] = {}
+        self._n = 0
+        self._versao: Optional[int] = None
+        self._sincronizado_em: Optional[datetime] = None
+        self._verificado_em = 0.0
+
+    # -- estrutura -----------------------------------------------------------
+
+    def _garantir_capacidade(self, n: int):
+        if n <= len(self._ids):
+            return
+        capacidade = max(n, 2 * len(self._ids), 64)
+        matriz = np.zeros((capacidade, DIMENSOES), dtype=np.float32)
+        normas = np.zeros(capacidade, dtype=np.float32)
+        ids = np.zeros(capacidade, dtype=np.int64)
+        matriz[:self._n] = self._matriz[:self._n]
+        normas[:self._n] = self._normas[:self._n]
+        ids[:self._n] = self._ids[:self._n]
+        self._matriz, self._normas, self._ids = matriz, normas, ids
+
+    def _gravar(self, linha):
+        posicao = self._posicao.get(linha.id)
+        if posicao is None:
+            self._garantir_capacidade(self._n + 1)
+            posicao = self._n
+            self._n += 1
+            self._posicao[linha.id] = posicao
+            self._ids[posicao] = linha.id
+        vetor = self._estatisticas.vetor(linha)
+        self._matriz[posicao] = vetor
+        self._normas[posicao] = vetor @ vetor
+
+    def _apagar(self, imovel_id: int):
+        posicao = self._posicao.pop(imovel_id, None)
+        if posicao is None:
+            return
+        ultima = self._n - 1
+        if posicao != ultima:
+            # Move a última linha para o buraco
+            self._matriz[posicao] = self._matriz[ultima]
+            self._normas[posicao] = self._normas[ultima]
+            self._ids[posicao] = self._ids[ultima]
+            self._posicao[int(self._ids[posicao])] = posicao
+        self._n = ultima
+
+    # -- carga e sincronização ------------------------------------------------
+
+    def reconstruir(self, db: Session):
+        """Relê todos os imóveis; quem chama segura _lock_carga"""
+        inicio = time.perf_counter()
+        versao = versoes_service.obter(db, versoes_service.IMOVEIS)
+        agora = _agora_no_banco(db)
+        linhas = db.query(*COLUNAS).yield_per(5000).all()
+
+        with self._lock:
+            self._estatisticas = Estatisticas(linhas)
+            self._matriz = np.zeros((0, DIMENSOES), dtype=np.float32)
+            self._normas = np.zeros(0, dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._posicao = {}
+            self._n = 0
+            self._garantir_capacidade(len(linhas))
+            for linha in linhas:
+                self._gravar(linha)
+            self._versao = versao
+            self._sincronizado_em = agora
+            self._verificado_em = time.monotonic()
+
+        logger.info(
+            f"Índice de similares montado: {len(linhas)} imóveis em "
+            f"{(time.perf_counter() - inicio) * 1000:.0f}ms"
+        )
+
+    def _sincronizar(self, db: Session):
+        """Aplica as escritas de outros processos (no máximo a cada SIMILARES_SYNC_SEGUNDOS)"""
+        if time.monotonic() - self._verificado_em < settings.SIMILARES_SYNC_SEGUNDOS:
+            return
+        self._verificado_em = time.monotonic()
+
+        versao = versoes_service.obter(db, versoes_service.IMOVEIS)
+        if versao == self._versao:
+            return
+
+        with self._lock_carga:
+            # Outra thread pode ter sincronizado enquanto esta esperava
+            versao = versoes_service.obter(db, versoes_service.IMOVEIS)
+            if versao == self._versao:
+                return
+
+            agora = _agora_no_banco(db)
+            desde = self._sincronizado_em - MARGEM_SINCRONIZACAO
+            alteradas = (
+                db.query(*COLUNAS)
+                .filter(or_(Imovel.criado_em >= desde, Imovel.atualizado_em >= desde))
+                .all()
+            )
+            total = db.query(func.count(Imovel.id)).scalar() or 0
+
+            with self._lock:
+                for linha in alteradas:
+                    self._gravar(linha)
+                sincronizado = self._n == total
+                if sincronizado:
+                    self._versao = versao
+                    self._sincronizado_em = agora
+
+            if not sincronizado:
+                # Remoções feitas por outro processo: não aparecem como linhas alteradas
+                self.reconstruir(db)
+
+    def atualizar(self, imovel: Imovel):
+        """Aplica uma escrita deste processo (chamar depois do commit)"""
+        with self._lock:
+            if self._estatisticas is not None:
+                self._gravar(imovel)
+
+    def remover(self, imovel_id: int):
+        with self._lock:
+            self._apagar(imovel_id)
+
+    # -- busca -----------------------------------------------------------------
+
+    def similares(self, db: Session, imovel_id: int, k: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        Os k imóveis mais próximos de imovel_id
+
+        Returns:
+            [(id, distância)] em ordem crescente; None se o imóvel não existe
+        """
+        if self._estatisticas is None:
+            with self._lock_carga:
+                if self._estatisticas is None:
+                    self.reconstruir(db)
+        else:
+            self._sincronizar(db)
+
+        with self._lock:
+            posicao = self._posicao.get(imovel_id)
+            if posicao is None:
+                return None
+            n = self._n
+            matriz = self._matriz[:n]
+            alvo = self._matriz[posicao]
+            distancias = self._normas[:n] - 2 * (matriz @ alvo) + self._normas[posicao]
+            distancias[posicao] = np.inf
+            ids = self._ids[:n]
+
+            k = min(k, n - 1)
+            if k <= 0:
+                return []
+            candidatos = np.argpartition(distancias, k - 1)[:k]
+            candidatos = candidatos[np.argsort(distancias[candidatos])]
+            return [
+                (int(ids[i]), float(np.sqrt(max(distancias[i], 0.0))))
+                for i in candidatos
+            ]
+
+
+indice_similares = IndiceSimilares()
@@ -0,0 +1,37 @@
+"""
+Versões de dados cacheados em memória por processo
+
+Com vários workers, uma escrita só atualiza o cache do processo que a fez.
+As escritas incrementam a versão da chave na própria transação e os outros
+processos descobrem que precisam recarregar com uma leitura por chave primária.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.versao import Versao
+
+IMOVEIS = "imoveis"
+BUSCAS_SALVAS = "buscas_salvas"
+CONFIGURACAO = "configuracao"
+
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(Versao)
+    if dialect == "sqlite":
+        return sqlite.insert(Versao)
+    raise NotImplementedError(f"Versões não suportam o banco '{dialect}'")
+
+
+def incrementar(db: Session, chave: str) -> None:
+    """Marca a chave como alterada; o commit fica com o chamador"""
+    stmt = _upsert_insert(db).values(chave=chave, valor=1)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["chave"],
+        set_={"valor": Versao.valor + 1},
+    ))
+
+
+def obter(db: Session, chave: str) -> int:
+    valor = db.query(Versao.valor).filter(Versao.chave == chave).scalar()
+    return valor or 0
@@ -0,0 +1,69 @@
+"""
+Script para preencher latitude, longitude e geohash dos imóveis já cadastrados
+Usage: python backfill_coordenadas.py [--lote N] [--todos]
+
+Sem --todos só processa imóveis sem geohash; com ele recalcula tudo a partir
+do CEP (sobrescrevendo coordenadas informadas manualmente). Ao final os
+agregados do mapa são reconstruídos.
+"""
+import argparse
+from app.db.session import SessionLocal
+from app.models.imovel import Imovel
+from app.services import mapa_service
+from app.services.geolocalizacao import coordenadas_do_cep, geohash
+
+
+def backfill_coordenadas(lote: int = 1000, todos: bool = False):
+    db = SessionLocal()
+    ultimo_id = 0
+    atualizados = sem_cep = 0
+
+    try:
+        while True:
+            query = db.query(Imovel.id, Imovel.cep, Imovel.latitude, Imovel.longitude).filter(
+                Imovel.id > ultimo_id
+            )
+            if not todos:
+                query = query.filter(Imovel.geohash.is_(None))
+            imoveis = query.order_by(Imovel.id).limit(lote).all()
+            if not imoveis:
+                break
+            ultimo_id = imoveis[-1].id
+
+            mapeamentos = []
+            for imovel in imoveis:
+                coordenadas = (imovel.latitude, imovel.longitude)
+                if todos or None in coordenadas:
+                    coordenadas = coordenadas_do_cep(imovel.cep)
+                if not coordenadas:
+                    sem_cep += 1
+                    continue
+                latitude, longitude = coordenadas
+                mapeamentos.append({
+                    "id": imovel.id,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "geohash": geohash(latitude, longitude),
+                })
+
+            if mapeamentos:
+                db.bulk_update_mappings(Imovel, mapeamentos)
+                db.commit()
+            atualizados += len(mapeamentos)
+            print(f"Processados até id {ultimo_id}: {atualizados} atualizados, {sem_cep} sem CEP na base")
+
+        if atualizados:
+            print(f"Agregados do mapa reconstruídos: {mapa_service.reconstruir(db)} células")
+    finally:
+        db.close()
+
+    print(f"\nConcluído: {atualizados} imóveis atualizados, {sem_cep} sem CEP na base")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche as coordenadas dos imóveis pelo CEP")
+    parser.add_argument("--lote", type=int, default=1000)
+    parser.add_argument("--todos", action="store_true", help="Recalcula também os que já têm coordenadas")
+    args = parser.parse_args()
+
+    backfill_coordenadas(args.lote, args.todos)
@@ -0,0 +1,83 @@
+"""
+Script para calcular os hashes de deduplicação das imagens já cadastradas
+Usage: python backfill_hashes.py [--workers N] [--lote N]
+
+O hash é calculado sobre o arquivo servido em imagem_url (o original enviado
+não é guardado no armazenamento local), então reenvios exatos de imagens
+antigas são reconhecidos principalmente pelo hash perceptual.
+"""
+import argparse
+import io
+import os
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.imovel import ImovelImagem
+from app.services.dedup_service import calcular_hashes
+
+TIMEOUT_DOWNLOAD = 15
+
+
+def hashes_da_url(url: str) -> Optional[dict]:
+    """Executado no pool: lê o arquivo local ou baixa a imagem e calcula os hashes"""
+    try:
+        if url.startswith("/uploads/"):
+            with open(os.path.join(settings.UPLOAD_DIR, url[len("/uploads/"):]), "rb") as f:
+                hashes = calcular_hashes(f)
+        else:
+            with urllib.request.urlopen(url, timeout=TIMEOUT_DOWNLOAD) as resposta:
+                hashes = calcular_hashes(io.BytesIO(resposta.read()))
+        return {"conteudo_hash": hashes["conteudo_hash"], "phash": hashes["phash"]}
+    except Exception as e:
+        print(f"  ✗ {url}: {e}")
+        return None
+
+
+def backfill_hashes(workers: int = 4, lote: int = 200):
+    db = SessionLocal()
+    ultimo_id = 0
+    atualizadas = falhas = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                imagens = (
+                    db.query(ImovelImagem.id, ImovelImagem.imagem_url)
+                    .filter(ImovelImagem.id > ultimo_id, ImovelImagem.conteudo_hash.is_(None))
+                    .order_by(ImovelImagem.id)
+                    .limit(lote)
+                    .all()
+                )
+                if not imagens:
+                    break
+                ultimo_id = imagens[-1].id
+
+                resultados = list(executor.map(hashes_da_url, [imagem.imagem_url for imagem in imagens]))
+
+                mapeamentos = [
+                    {"id": imagem.id, **resultado}
+                    for imagem, resultado in zip(imagens, resultados)
+                    if resultado is not None
+                ]
+                if mapeamentos:
+                    db.bulk_update_mappings(ImovelImagem, mapeamentos)
+                    db.commit()
+
+                atualizadas += len(mapeamentos)
+                falhas += len(imagens) - len(mapeamentos)
+                print(f"Processadas até id {ultimo_id}: {atualizadas} atualizadas, {falhas} falhas")
+    finally:
+        db.close()
+
+    print(f"\nConcluído: {atualizadas} imagens atualizadas, {falhas} falhas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula os hashes de deduplicação das imagens existentes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--lote", type=int, default=200)
+    args = parser.parse_args()
+
+    backfill_hashes(args.workers, args.lote)
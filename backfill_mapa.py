@@ -0,0 +1,20 @@
+"""
+Script para reconstruir os agregados do mapa (clusters) a partir dos imóveis
+Usage: python backfill_mapa.py
+"""
+from app.db.session import SessionLocal
+from app.services import mapa_service
+
+
+def backfill_mapa():
+    db = SessionLocal()
+    try:
+        print("Reconstruindo agregados do mapa...")
+        total = mapa_service.reconstruir(db)
+        print(f"✓ {total} células gravadas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill_mapa()
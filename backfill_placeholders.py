@@ -0,0 +1,98 @@
+"""
+Script para calcular placeholder e cor dominante das imagens já cadastradas
+Usage: python backfill_placeholders.py [--workers N] [--lote N] [--todas]
+
+As imagens são lidas em lotes (paginação por id) e analisadas em paralelo
+em um pool de processos; arquivos locais são lidos do disco e imagens
+remotas são baixadas já reduzidas quando estão no Cloudinary.
+"""
+import argparse
+import io
+import os
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.imovel import ImovelImagem
+from app.services.cloudinary_service import cloudinary_service
+from app.services.image_processing import analisar_imagem
+from app.services.responsive_images import public_id_da_url
+
+TIMEOUT_DOWNLOAD = 15
+
+
+def origem_da_imagem(imagem: ImovelImagem) -> str:
+    """Caminho local ou URL da menor versão disponível da imagem"""
+    if imagem.variantes and "gallery" in imagem.variantes:
+        url = imagem.variantes["gallery"]["jpeg"]
+    else:
+        url = imagem.imagem_url
+
+    if url.startswith("/uploads/"):
+        return os.path.join(settings.UPLOAD_DIR, url[len("/uploads/"):])
+
+    public_id = imagem.storage_key or public_id_da_url(url)
+    if public_id and cloudinary_service.is_available():
+        return cloudinary_service.get_optimized_url(public_id, width=128, crop="limit")
+    return url
+
+
+def analisar_origem(origem: str) -> Optional[dict]:
+    """Executado no pool: baixa (se remoto) e calcula placeholder e cor"""
+    try:
+        if origem.startswith(("http://", "https://")):
+            with urllib.request.urlopen(origem, timeout=TIMEOUT_DOWNLOAD) as resposta:
+                return analisar_imagem(io.BytesIO(resposta.read()))
+        return analisar_imagem(origem)
+    except Exception as e:
+        print(f"  ✗ {origem}: {e}")
+        return None
+
+
+def backfill_placeholders(workers: int = 4, lote: int = 200, todas: bool = False):
+    db = SessionLocal()
+    ultimo_id = 0
+    atualizadas = falhas = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                query = db.query(ImovelImagem).filter(ImovelImagem.id > ultimo_id)
+                if not todas:
+                    query = query.filter(ImovelImagem.placeholder.is_(None))
+                imagens = query.order_by(ImovelImagem.id).limit(lote).all()
+                if not imagens:
+                    break
+                ultimo_id = imagens[-1].id
+
+                origens = [origem_da_imagem(imagem) for imagem in imagens]
+                resultados = list(executor.map(analisar_origem, origens))
+
+                mapeamentos = [
+                    {"id": imagem.id, **resultado}
+                    for imagem, resultado in zip(imagens, resultados)
+                    if resultado is not None
+                ]
+                if mapeamentos:
+                    db.bulk_update_mappings(ImovelImagem, mapeamentos)
+                    db.commit()
+
+                atualizadas += len(mapeamentos)
+                falhas += len(imagens) - len(mapeamentos)
+                db.expunge_all()
+                print(f"Processadas até id {ultimo_id}: {atualizadas} atualizadas, {falhas} falhas")
+    finally:
+        db.close()
+
+    print(f"\nConcluído: {atualizadas} imagens atualizadas, {falhas} falhas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula placeholders das imagens existentes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--lote", type=int, default=200)
+    parser.add_argument("--todas", action="store_true", help="Recalcula também as que já têm placeholder")
+    args = parser.parse_args()
+
+    backfill_placeholders(args.workers, args.lote, args.todas)
@@ -0,0 +1,46 @@
+"""
+Script para preencher o preço por m² dos imóveis e reconstruir as estatísticas por segmento
+Usage: python backfill_preco_m2.py [--lote N] [--so-estatisticas]
+
+O preço por m² é gravado em lotes por faixa de id (um UPDATE por lote);
+ao final a tabela estatisticas_preco_m2 é recalculada do zero.
+"""
+import argparse
+from sqlalchemy import func, update
+from app.db.session import SessionLocal
+from app.models.imovel import Imovel
+from app.services import mercado_service
+
+
+def backfill_preco_m2(lote: int = 5000, so_estatisticas: bool = False):
+    db = SessionLocal()
+
+    try:
+        if not so_estatisticas:
+            ultimo_id = 0
+            maior_id = db.query(func.max(Imovel.id)).scalar() or 0
+            while ultimo_id < maior_id:
+                db.execute(
+                    update(Imovel)
+                    .where(Imovel.id > ultimo_id, Imovel.id <= ultimo_id + lote)
+                    .values(preco_m2=mercado_service.preco_m2_expr()),
+                    execution_options={"synchronize_session": False},
+                )
+                db.commit()
+                ultimo_id += lote
+                print(f"Preço por m² gravado até id {min(ultimo_id, maior_id)}")
+
+        print("Reconstruindo estatísticas de preço por m²...")
+        total = mercado_service.reconstruir(db)
+        print(f"✓ {total} segmentos gravados")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche o preço por m² e recalcula as estatísticas de mercado")
+    parser.add_argument("--lote", type=int, default=5000)
+    parser.add_argument("--so-estatisticas", action="store_true", help="Só recalcula a tabela de estatísticas")
+    args = parser.parse_args()
+
+    backfill_preco_m2(args.lote, args.so_estatisticas)
@@ -0,0 +1,52 @@
+"""
+Script para recalcular os rollups diários de leads e visitas
+Usage: python backfill_rollups.py [--desde AAAA-MM-DD] [--ate AAAA-MM-DD] [--dias-por-lote N]
+"""
+import argparse
+from datetime import date, timedelta
+from sqlalchemy import func
+from app.db.session import SessionLocal
+from app.models.lead import Lead
+from app.models.visita import Visita
+from app.services import rollups_service
+
+
+def primeiro_dia(db) -> date:
+    """Data mais antiga entre leads e visitas (início padrão do backfill)"""
+    datas = [
+        db.query(func.min(Lead.created_at)).scalar(),
+        db.query(func.min(Visita.data_hora)).scalar(),
+    ]
+    datas = [rollups_service.dia_utc(d) for d in datas if d is not None]
+    return min(datas) if datas else date.today()
+
+
+def backfill_rollups(desde=None, ate=None, dias_por_lote=30):
+    db = SessionLocal()
+    try:
+        desde = desde or primeiro_dia(db)
+        ate = ate or rollups_service.dia_utc(None) + timedelta(days=365)
+
+        print(f"Recalculando rollups de {desde} a {ate}...")
+
+        # Lotes de dias mantêm cada transação curta
+        total = 0
+        inicio = desde
+        while inicio <= ate:
+            fim = min(inicio + timedelta(days=dias_por_lote - 1), ate)
+            total += rollups_service.backfill(db, inicio, fim)
+            inicio = fim + timedelta(days=1)
+
+        print(f"Rollups recalculados: {total} linhas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula os rollups diários")
+    parser.add_argument("--desde", type=date.fromisoformat, default=None)
+    parser.add_argument("--ate", type=date.fromisoformat, default=None)
+    parser.add_argument("--dias-por-lote", type=int, default=30)
+    args = parser.parse_args()
+
+    backfill_rollups(args.desde, args.ate, args.dias_por_lote)
@@ -0,0 +1,62 @@
+"""
+Benchmark do tempo de inicialização a frio do app
+Usage: python benchmarks/startup_benchmark.py [--runs N] [--max-ms MS]
+
+Cada execução roda em um processo novo: importa `main` (como o uvicorn faz)
+e responde a um GET /health, sem servidor externo. Falha (exit 1) se a
+mediana passar de --max-ms, para uso em CI antes de mudar o startup.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = r"""
+import time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+t2 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.1f} {(t2 - t0) * 1000:.1f}")
+"""
+
+
+def medir(runs: int):
+    imports, healths = [], []
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "0"}
+    for _ in range(runs):
+        saida = subprocess.run(
+            [sys.executable, "-c", SNIPPET],
+            cwd=BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip().splitlines()[-1]
+        import_ms, health_ms = map(float, saida.split())
+        imports.append(import_ms)
+        healths.append(health_ms)
+    return imports, healths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo de startup do app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    imports, healths = medir(args.runs)
+    mediana = statistics.median(healths)
+
+    print(f"import main:        mediana {statistics.median(imports):.1f} ms (min {min(imports):.1f}, max {max(imports):.1f})")
+    print(f"até 1º /health 200: mediana {mediana:.1f} ms (min {min(healths):.1f}, max {max(healths):.1f})")
+
+    if args.max_ms is not None and mediana > args.max_ms:
+        print(f"Startup acima do limite de {args.max_ms:.0f} ms")
+        sys.exit(1)
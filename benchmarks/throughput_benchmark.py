@@ -0,0 +1,115 @@
+"""
+Benchmark de throughput do list_imoveis com 1..N workers do Gunicorn
+Usage: python benchmarks/throughput_benchmark.py [--workers 1,2,4] [--duration 10] [--clients 32]
+
+Sobe o servidor com gunicorn.conf.py (WEB_CONCURRENCY=N) em uma porta local,
+dispara requisições keep-alive a partir de processos clientes separados e
+reporta req/s e a eficiência de escala em relação a 1 worker.
+Requer banco configurado (DATABASE_URL) e populado (populate_db.py).
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH = "/api/imoveis/?limit=12"
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def aguardar_servidor(porta: int, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+
+def cliente(porta: int, fim: float, resultados):
+    conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=10)
+    total = erros = 0
+    while time.monotonic() < fim:
+        try:
+            conn.request("GET", PATH)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status == 200:
+                total += 1
+            else:
+                erros += 1
+        except (OSError, http.client.HTTPException):
+            erros += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=10)
+    resultados.put((total, erros))
+
+
+def medir(workers: int, duracao: float, clientes: int) -> float:
+    porta = porta_livre()
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(porta)}
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        aguardar_servidor(porta)
+
+        # Aquecimento: conexões do pool e caches de cada worker
+        aquecimento = time.monotonic() + 2
+        fila = multiprocessing.Queue()
+        cliente(porta, aquecimento, fila)
+        fila.get()
+
+        fim = time.monotonic() + duracao
+        processos = [
+            multiprocessing.Process(target=cliente, args=(porta, fim, fila))
+            for _ in range(clientes)
+        ]
+        for p in processos:
+            p.start()
+        totais = [fila.get() for _ in processos]
+        for p in processos:
+            p.join()
+
+        ok = sum(t for t, _ in totais)
+        erros = sum(e for _, e in totais)
+        if erros:
+            print(f"  aviso: {erros} requisições com erro")
+        return ok / duracao
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        servidor.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput do list_imoveis por número de workers")
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 1}")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=32)
+    args = parser.parse_args()
+
+    contagens = sorted({int(w) for w in args.workers.split(",")})
+    base = None
+    for n in contagens:
+        rps = medir(n, args.duration, args.clients)
+        base = base or rps / n
+        eficiencia = rps / (base * n) * 100
+        print(f"{n:>3} workers: {rps:8.1f} req/s  (escala {eficiencia:5.1f}% do linear)")
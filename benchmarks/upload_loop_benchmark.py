@@ -0,0 +1,77 @@
+"""
+Mede o bloqueio do event loop durante uploads (armazenamento falso)
+Usage: python benchmarks/upload_loop_benchmark.py [--uploads 8] [--latency 0.3]
+
+Dispara N uploads simultâneos pelo CloudinaryService usando o
+FakeCloudinaryUploader (que bloqueia a thread como o SDK real) enquanto
+uma corrotina mede o atraso do event loop a cada 10ms. Com os uploads
+fora do loop, o atraso máximo deve ficar na casa de poucos milissegundos
+em vez de `latency` segundos.
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["USE_CLOUDINARY"] = "true"
+os.environ["CLOUDINARY_FAKE"] = "true"
+
+from fastapi import UploadFile  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+from app.services.cloudinary_service import cloudinary_service  # noqa: E402
+from app.services.fake_storage import fake_uploader  # noqa: E402
+
+
+async def medir_atraso(parar: asyncio.Event, intervalo: float = 0.01):
+    maior = 0.0
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        maior = max(maior, time.perf_counter() - inicio - intervalo)
+    return maior
+
+
+def arquivo_falso(i: int, tamanho: int) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(os.urandom(tamanho)),
+        filename=f"foto_{i}.jpg",
+        headers=Headers({"content-type": "image/jpeg"}),
+    )
+
+
+async def main(uploads: int, latencia: float, tamanho: int):
+    fake_uploader.latency = latencia
+
+    parar = asyncio.Event()
+    monitor = asyncio.create_task(medir_atraso(parar))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[
+        cloudinary_service.upload_image(arquivo_falso(i, tamanho), folder="benchmark", public_id=f"foto_{i}")
+        for i in range(uploads)
+    ])
+    total = time.perf_counter() - inicio
+
+    parar.set()
+    atraso = await monitor
+    cloudinary_service.shutdown()
+
+    print(f"{uploads} uploads em {total:.2f}s (latência simulada {latencia:.2f}s cada)")
+    print(f"Maior atraso do event loop: {atraso * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bloqueio do event loop durante uploads")
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--size", type=int, default=512 * 1024)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.uploads, args.latency, args.size))
@@ -0,0 +1,77 @@
+"""
+Bootstrap do banco: aplica as migrações e cria os dados básicos
+Usage: python bootstrap.py [--skip-migrations] [--skip-seed]
+
+Executado uma única vez por deploy (preDeployCommand no Railway), antes
+dos workers subirem. O app em si não faz DDL nem seed na importação.
+"""
+import argparse
+import logging
+import os
+import sys
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from app.core.init_data import initialize_database
+from app.db.session import SessionLocal, engine
+from app.services import contadores_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("bootstrap")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Revisão equivalente ao schema do antigo create_all (init_db.py)
+BASELINE_REVISION = "0001"
+
+
+def is_unversioned_legacy_db() -> bool:
+    """Banco criado pelo create_all: tabelas do app presentes, sem alembic_version"""
+    tabelas = set(inspect(engine).get_table_names())
+    return "imoveis" in tabelas and "alembic_version" not in tabelas
+
+
+def run_migrations():
+    logger.info("Applying database migrations...")
+    alembic_cfg = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(BASE_DIR, "alembic"))
+    # Mantém o logging configurado acima (ver alembic/env.py)
+    alembic_cfg.attributes["configure_logger"] = False
+    if is_unversioned_legacy_db():
+        # Sem o stamp, a 0001 tentaria criar tabelas que já existem
+        logger.info(f"Legacy create_all schema found, stamping revision {BASELINE_REVISION}")
+        command.stamp(alembic_cfg, BASELINE_REVISION)
+    command.upgrade(alembic_cfg, "head")
+    logger.info("Migrations applied")
+
+
+def reconcile_counters():
+    db = SessionLocal()
+    try:
+        contadores_service.reconciliar(db)
+    finally:
+        db.close()
+
+
+def bootstrap(skip_migrations=False, skip_seed=False):
+    if not skip_migrations:
+        run_migrations()
+    if not skip_seed:
+        initialize_database()
+        reconcile_counters()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrações e dados iniciais do banco")
+    parser.add_argument("--skip-migrations", action="store_true")
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        bootstrap(args.skip_migrations, args.skip_seed)
+    except Exception:
+        logger.exception("Bootstrap failed")
+        sys.exit(1)
@@ -0,0 +1,110 @@
+"""
+Verifica via EXPLAIN se as consultas principais usam os índices esperados
+Usage: python check_indexes.py
+
+Requer PostgreSQL com as migrações aplicadas (alembic upgrade head).
+O seqscan é desabilitado na sessão para que o resultado não dependa do
+volume de dados: a checagem confirma que o índice *pode* atender a consulta.
+"""
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from app.db.session import engine, SessionLocal
+from app.models.imovel import Imovel, ImovelImagem, TipoImovel, TipoNegocio
+from app.models.lead import Lead, LeadStatus
+from app.models.visita import Visita, VisitaStatus
+
+
+def consultas_principais(db):
+    """(descrição, consulta, índice esperado) — espelham os endpoints"""
+    agora = datetime.now(timezone.utc)
+    return [
+        (
+            "list_imoveis (ordenação padrão)",
+            db.query(Imovel).order_by(Imovel.criado_em.desc()).limit(12),
+            "ix_imoveis_criado_em",
+        ),
+        (
+            "list_destaques",
+            db.query(Imovel)
+            .filter(Imovel.destaque == True)
+            .order_by(Imovel.criado_em.desc())
+            .limit(6),
+            "ix_imoveis_destaque_criado_em",
+        ),
+        (
+            "list_imoveis (negócio + tipo + preço)",
+            db.query(Imovel).filter(
+                Imovel.tipo_negocio == TipoNegocio.venda,
+                Imovel.tipo_imovel == TipoImovel.casa,
+                Imovel.preco_venda >= 300000,
+                Imovel.preco_venda <= 800000,
+            ),
+            "ix_imoveis_negocio_tipo_preco_venda",
+        ),
+        (
+            "imagens de um imóvel",
+            db.query(ImovelImagem).filter(ImovelImagem.imovel_id == 1),
+            "ix_imovel_imagens_imovel_id",
+        ),
+        (
+            "list_leads (status)",
+            db.query(Lead)
+            .filter(Lead.status == LeadStatus.novo)
+            .order_by(Lead.created_at.desc())
+            .limit(100),
+            "ix_leads_status_created_at",
+        ),
+        (
+            "list_visitas (status + período)",
+            db.query(Visita).filter(
+                Visita.status == VisitaStatus.agendada,
+                Visita.data_hora >= agora,
+                Visita.data_hora <= agora + timedelta(days=7),
+            ),
+            "ix_visitas_status_data_hora",
+        ),
+    ]
+
+
+def indices_do_plano(plano) -> set:
+    """Coleta recursivamente os nomes de índices usados em um plano JSON"""
+    encontrados = set()
+    if "Index Name" in plano:
+        encontrados.add(plano["Index Name"])
+    for filho in plano.get("Plans", []):
+        encontrados |= indices_do_plano(filho)
+    return encontrados
+
+
+def check_indexes() -> bool:
+    if engine.dialect.name != "postgresql":
+        print("A checagem de índices requer PostgreSQL")
+        return False
+
+    db = SessionLocal()
+    ok = True
+    try:
+        db.execute(text("SET enable_seqscan = off"))
+        for descricao, query, esperado in consultas_principais(db):
+            sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            resultado = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(resultado, str):
+                resultado = json.loads(resultado)
+            usados = indices_do_plano(resultado[0]["Plan"])
+
+            if esperado in usados:
+                print(f"✓ {descricao}: {esperado}")
+            else:
+                ok = False
+                print(f"✗ {descricao}: esperado {esperado}, plano usou {sorted(usados) or 'nenhum índice'}")
+    finally:
+        db.rollback()
+        db.close()
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_indexes() else 1)
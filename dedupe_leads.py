@@ -0,0 +1,155 @@
+"""
+Script para deduplicar o histórico de leads (mesmo e-mail ou telefone normalizado)
+Usage: python dedupe_leads.py [--executar] [--janela-dias N] [--lote N]
+
+Com --executar, primeiro preenche as chaves normalizadas dos leads que
+ainda não as têm (no dry-run elas são calculadas só em memória). Depois
+percorre os leads em ordem de criação: um lead cuja pessoa já tem um lead
+aberto com último contato até N dias antes é mesclado nele (mesma regra da
+entrada de contatos). Sem --executar apenas lista as mesclagens (dry-run)
+e nada é gravado.
+"""
+import argparse
+from datetime import timedelta
+from typing import Dict, Tuple
+from sqlalchemy import update
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.lead import Lead, LeadStatus
+from app.services import leads_service
+
+
+def preencher_chaves(db, lote: int) -> int:
+    ultimo_id = 0
+    atualizados = 0
+    while True:
+        leads = (
+            db.query(Lead.id, Lead.email, Lead.telefone)
+            .filter(Lead.id > ultimo_id, Lead.email_normalizado.is_(None))
+            .order_by(Lead.id)
+            .limit(lote)
+            .all()
+        )
+        if not leads:
+            break
+        ultimo_id = leads[-1].id
+        db.bulk_update_mappings(Lead, [
+            {
+                "id": lead.id,
+                "email_normalizado": leads_service.normalizar_email(lead.email),
+                "telefone_normalizado": leads_service.normalizar_telefone(lead.telefone),
+            }
+            for lead in leads
+        ])
+        db.commit()
+        atualizados += len(leads)
+
+    db.execute(
+        update(Lead)
+        .where(Lead.ultimo_contato_em.is_(None))
+        .values(ultimo_contato_em=Lead.created_at),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return atualizados
+
+
+def encontrar_mesclagens(db, janela: timedelta):
+    """
+    Pares (alvo_id, duplicado_id) em ordem de criação, numa passada só
+
+    Guarda por chave o lead mais recente que a representa, com o status e
+    o último contato que ele terá depois das mesclagens anteriores.
+    """
+    por_chave: Dict[Tuple[str, str], int] = {}
+    alvos: Dict[int, dict] = {}
+
+    linhas = (
+        db.query(
+            Lead.id,
+            Lead.email,
+            Lead.telefone,
+            Lead.email_normalizado,
+            Lead.telefone_normalizado,
+            Lead.status,
+            Lead.created_at,
+            leads_service.ultimo_contato_expr(),
+        )
+        .order_by(Lead.created_at, Lead.id)
+        .yield_per(5000)
+    )
+    for lead_id, email_bruto, telefone_bruto, email, telefone, status, criado_em, ultimo_contato in linhas:
+        # Leads ainda sem chaves (dry-run antes do preenchimento)
+        email = email or leads_service.normalizar_email(email_bruto)
+        telefone = telefone or leads_service.normalizar_telefone(telefone_bruto)
+        chaves = [chave for chave in (("email", email), ("telefone", telefone)) if chave[1]]
+
+        alvo = None
+        for chave in chaves:
+            candidato = alvos.get(por_chave.get(chave))
+            if (
+                candidato
+                and candidato["status"] in leads_service.STATUS_ABERTOS
+                and criado_em - candidato["ultimo_contato"] <= janela
+            ):
+                alvo = candidato
+                break
+
+        if alvo is None:
+            alvos[lead_id] = {"id": lead_id, "status": LeadStatus(status), "ultimo_contato": ultimo_contato}
+            for chave in chaves:
+                por_chave[chave] = lead_id
+            continue
+
+        yield alvo["id"], lead_id
+        alvo["ultimo_contato"] = max(alvo["ultimo_contato"], ultimo_contato)
+        if leads_service.ORDEM_FUNIL[LeadStatus(status)] > leads_service.ORDEM_FUNIL[alvo["status"]]:
+            alvo["status"] = LeadStatus(status)
+        # Chaves novas do duplicado (ex.: outro telefone) passam a apontar para o alvo
+        for chave in chaves:
+            por_chave[chave] = alvo["id"]
+
+
+def dedupe_leads(executar: bool = False, janela_dias: int = 30, lote: int = 500):
+    db = SessionLocal()
+    mesclados = 0
+
+    try:
+        if executar:
+            print(f"Chaves normalizadas preenchidas: {preencher_chaves(db, lote)} leads")
+
+        pares = list(encontrar_mesclagens(db, timedelta(days=janela_dias)))
+        print(f"{len(pares)} leads duplicados encontrados (janela de {janela_dias} dias)")
+
+        for inicio in range(0, len(pares), lote):
+            bloco = pares[inicio:inicio + lote]
+            ids = {lead_id for par in bloco for lead_id in par}
+            leads = {lead.id: lead for lead in db.query(Lead).filter(Lead.id.in_(ids))}
+            for alvo_id, duplicado_id in bloco:
+                alvo, duplicado = leads[alvo_id], leads[duplicado_id]
+                if not executar:
+                    print(f"  lead {duplicado_id} ({duplicado.email}) -> lead {alvo_id}")
+                    continue
+                leads_service.mesclar_leads(db, alvo, duplicado)
+                db.flush()
+                mesclados += 1
+            if executar:
+                db.commit()
+                print(f"  {mesclados} leads mesclados")
+    finally:
+        db.close()
+
+    if executar:
+        print(f"\nConcluído: {mesclados} leads mesclados")
+    else:
+        print("\nDry-run: nada foi alterado (use --executar)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mescla leads repetidos da mesma pessoa")
+    parser.add_argument("--executar", action="store_true", help="Aplica as mesclagens (padrão: só lista)")
+    parser.add_argument("--janela-dias", type=int, default=settings.LEAD_DEDUP_JANELA_DIAS)
+    parser.add_argument("--lote", type=int, default=500)
+    args = parser.parse_args()
+
+    dedupe_leads(args.executar, args.janela_dias, args.lote)
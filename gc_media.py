@@ -0,0 +1,70 @@
+"""
+Script para encontrar e remover mídias órfãs (sem linha em imovel_imagens)
+Usage: python gc_media.py [--executar] [--armazenamento local|cloudinary|todos]
+                          [--idade-minima-horas N] [--workers N] [--taxa N] [--lote N]
+
+Sem --executar apenas lista o que seria removido (dry-run).
+"""
+import argparse
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import media_gc_service
+
+
+def formatar_bytes(total: int) -> str:
+    for unidade in ("B", "KB", "MB", "GB"):
+        if total < 1024:
+            return f"{total:.1f} {unidade}"
+        total /= 1024
+    return f"{total:.1f} TB"
+
+
+def gc_media(armazenamentos, executar=False, idade_minima_horas=24.0, workers=4, taxa=10.0, lote=500):
+    db = SessionLocal()
+    try:
+        for armazenamento in armazenamentos:
+            print(f"\nVerificando armazenamento {armazenamento}...")
+            resultado = media_gc_service.coletar(
+                db,
+                armazenamento,
+                executar=executar,
+                idade_minima=idade_minima_horas * 3600,
+                workers=workers,
+                taxa=taxa,
+                lote=lote,
+            )
+
+            for chave in resultado.exemplos:
+                print(f"  - {chave}")
+            if resultado.orfaos > len(resultado.exemplos):
+                print(f"  ... e mais {resultado.orfaos - len(resultado.exemplos)}")
+
+            print(
+                f"✓ {resultado.verificados} objetos verificados, {resultado.orfaos} órfãos "
+                f"({formatar_bytes(resultado.bytes_orfaos)})"
+            )
+            if executar:
+                print(f"✓ {resultado.removidos} removidos, {resultado.falhas} falhas")
+            else:
+                print("  Simulação: nada foi removido (use --executar)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove mídias sem referência em imovel_imagens")
+    parser.add_argument("--executar", action="store_true", help="Remove de fato (padrão: só lista)")
+    parser.add_argument(
+        "--armazenamento",
+        choices=["local", "cloudinary", "todos"],
+        default="cloudinary" if settings.USE_CLOUDINARY else "local",
+    )
+    parser.add_argument("--idade-minima-horas", type=float, default=24.0,
+                        help="Preserva objetos mais novos que isso (uploads em andamento)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--taxa", type=float, default=10.0, help="Remoções por segundo (0 = sem limite)")
+    parser.add_argument("--lote", type=int, default=500)
+    args = parser.parse_args()
+
+    armazenamentos = ["local", "cloudinary"] if args.armazenamento == "todos" else [args.armazenamento]
+    gc_media(armazenamentos, args.executar, args.idade_minima_horas, args.workers, args.taxa, args.lote)
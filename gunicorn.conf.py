@@ -0,0 +1,64 @@
+"""
+Configuração do Gunicorn para produção (workers Uvicorn)
+Usage: gunicorn main:app -c gunicorn.conf.py
+
+- Um worker por CPU disponível (respeita affinity e limite de CPU do cgroup);
+  WEB_CONCURRENCY sobrescreve.
+- preload_app: o app é importado uma vez no master e compartilhado por
+  copy-on-write; gc.freeze() evita que o GC suje essas páginas nos workers.
+- Cada worker descarta o pool de conexões herdado do master (SQLAlchemy não
+  pode compartilhar conexões entre processos).
+- max_requests + jitter reciclam workers aos poucos, sem derrubar todos juntos.
+"""
+import gc
+import math
+import os
+
+
+def _cpus_disponiveis() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Limite de CPU do container (cgroup v2), ex: "200000 100000" = 2 CPUs
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, periodo = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(periodo))))
+    except (OSError, ValueError):
+        pass
+
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", _cpus_disponiveis()))
+
+preload_app = True
+
+# Reciclagem gradual dos workers
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Chamado no master após o preload e antes do fork dos workers
+    gc.freeze()
+    server.log.info(f"Objetos do app congelados para copy-on-write ({workers} workers)")
+
+
+def post_fork(server, worker):
+    from app.db.session import engine
+
+    # close=False: não fecha as conexões do master, só deixa de usá-las neste processo
+    engine.dispose(close=False)
@@ -1,22 +1,18 @@
 """
 Script para inicializar o banco de dados
 Usage: python init_db.py
+
+Aplica as migrações do Alembic (o mesmo passo do bootstrap.py, sem os
+dados iniciais). O schema não é mais criado com create_all: um banco
+sem alembic_version seria confundido pelo bootstrap com o schema legado.
 """
-from app.db.session import engine, Base
-from app.models import User, Imovel, ImovelImagem, Lead, Visita, Configuracao
+from bootstrap import run_migrations
 
 
 def init_database():
-    print("Criando tabelas no banco de dados...")
-    Base.metadata.create_all(bind=engine)
-    print("Tabelas criadas com sucesso!")
-    print("\nTabelas criadas:")
-    print("- users")
-    print("- imoveis")
-    print("- imovel_imagens")
-    print("- leads")
-    print("- visitas")
-    print("- configuracoes")
+    print("Aplicando migrações no banco de dados...")
+    run_migrations()
+    print("Banco de dados na última revisão!")
     print("\nAgora execute: python create_user.py para criar um usuário admin")
 
 
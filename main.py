@@ -1,11 +1,17 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.v1.router import api_router
-from app.db.session import engine, Base
-from app.core.init_data import initialize_database
+from app.core.security import password_hasher
+from app.core.uploads import UploadSizeLimitMiddleware
+from app.core.static import CachedStaticFiles
+from app.services.cloudinary_service import cloudinary_service
+from app.services.image_processing import image_pipeline
+from app.db.session import SessionLocal
+from app.services import contadores_service, mercado_service
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
 import logging
 import traceback
@@ -33,17 +39,8 @@ if settings.CLOUDINARY_API_SECRET:
 else:
     logger.warning("CLOUDINARY_API_SECRET não está configurado!")
 
-# Cria tabelas do banco de dados
-try:
-    logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-
-    # Inicializa dados básicos (admin user, etc)
-    initialize_database()
-except Exception as e:
-    logger.error(f"Error during database initialization: {str(e)}")
-    logger.error(traceback.format_exc())
+# Schema e dados iniciais ficam com `python bootstrap.py` (uma vez por deploy).
+# Importar este módulo só monta o app; o engine conecta no primeiro uso.
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -69,6 +66,9 @@ async def log_requests(request: Request, call_next):
             content={"detail": "Internal server error"}
         )
 
+# Limite do corpo multipart; registrado antes do CORS para que o 413 também leve os headers CORS
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Configuração CORS
 # Permitir origens específicas e usar regex para wildcards como *.vercel.app
 origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",") if not origin.strip().startswith("https://*.")]
@@ -89,8 +89,8 @@ app.add_middleware(
 # Cria diretório de uploads se não existir
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
-# Monta diretório estático para uploads
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+# Monta diretório estático para uploads (ETag forte, cache immutable para nomes por hash, Range)
+app.mount("/uploads", CachedStaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Inclui rotas da API
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -105,6 +105,38 @@ def root():
     }
 
 
+def reconciliar_contadores():
+    db = SessionLocal()
+    try:
+        contadores_service.reconciliar(db)
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar contadores: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def reconciliar_contadores_periodicamente():
+    # Espera o primeiro intervalo: o bootstrap já reconcilia no deploy
+    while True:
+        await asyncio.sleep(settings.CONTADORES_RECONCILIACAO_SEGUNDOS)
+        await run_in_threadpool(reconciliar_contadores)
+
+
+@app.on_event("startup")
+async def start_reconciliacao_contadores():
+    if settings.CONTADORES_RECONCILIACAO_SEGUNDOS > 0:
+        app.state.reconciliacao_task = asyncio.create_task(reconciliar_contadores_periodicamente())
+
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    password_hasher.shutdown()
+    cloudinary_service.shutdown()
+    image_pipeline.shutdown()
+    mercado_service.recalculo_quantis.shutdown()
+
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
@@ -0,0 +1,77 @@
+"""
+Worker que envia as notificações pendentes (e-mail, SMS, WhatsApp)
+Usage: python notificacoes_worker.py [--uma-vez] [--lote N] [--concorrencia N] [--intervalo S]
+
+Processo separado da API (no Railway, um serviço com este comando). A cada
+volta compara os imóveis gravados (alertas_pendentes) com as buscas salvas,
+transfere os alertas de buscas para a fila de notificações e envia um lote; com a fila vazia espera --intervalo segundos.
+Vários workers podem rodar juntos no PostgreSQL (FOR UPDATE SKIP LOCKED).
+SIGTERM/SIGINT terminam o lote em andamento antes de sair.
+"""
+import argparse
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import notificacoes_service
+from app.services.buscas_service import ProcessadorAlertas
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("notificacoes_worker")
+
+
+def executar(uma_vez: bool = False, lote: int = 50, concorrencia: int = 4, intervalo: float = 2.0):
+    parar = threading.Event()
+
+    def ao_sinal(signum, frame):
+        logger.info("Encerrando depois do lote atual...")
+        parar.set()
+
+    signal.signal(signal.SIGTERM, ao_sinal)
+    signal.signal(signal.SIGINT, ao_sinal)
+
+    processador = ProcessadorAlertas()
+    executor = ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="notificacoes")
+    try:
+        while not parar.is_set():
+            db = SessionLocal()
+            try:
+                imoveis = processador.processar_lote(db, lote)
+                alertas = notificacoes_service.transferir_alertas(db, lote)
+                resumo = notificacoes_service.processar_lote(db, executor, lote)
+            except Exception as e:
+                logger.error(f"Erro ao processar notificações: {e}")
+                db.rollback()
+                imoveis, alertas, resumo = 0, 0, notificacoes_service.ResumoLote()
+            finally:
+                db.close()
+
+            if imoveis or alertas or resumo.total:
+                logger.info(
+                    f"{imoveis} imóveis comparados com as buscas; {alertas} alertas transferidos; "
+                    f"{resumo.enviadas} enviadas, {resumo.reagendadas} reagendadas, {resumo.falhas} desistidas"
+                )
+            if uma_vez:
+                break
+            # Lote cheio: provavelmente há mais na fila, segue sem esperar
+            if max(imoveis, alertas, resumo.total) < lote:
+                parar.wait(intervalo)
+    finally:
+        executor.shutdown(wait=True)
+        notificacoes_service.encerrar_conexoes()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envia as notificações pendentes")
+    parser.add_argument("--uma-vez", action="store_true", help="Processa um lote e sai")
+    parser.add_argument("--lote", type=int, default=settings.NOTIFICACOES_LOTE)
+    parser.add_argument("--concorrencia", type=int, default=settings.NOTIFICACOES_CONCORRENCIA)
+    parser.add_argument("--intervalo", type=float, default=settings.NOTIFICACOES_INTERVALO_SEGUNDOS)
+    args = parser.parse_args()
+
+    executar(args.uma_vez, args.lote, args.concorrencia, args.intervalo)
@@ -3,16 +3,19 @@ Script para popular o banco de dados com dados de exemplo
 """
 import sys
 from sqlalchemy.orm import Session
-from app.db.session import engine, Base
+from app.db.session import engine
 from app.models.imovel import Imovel, TipoImovel, TipoNegocio, ImovelImagem
 from app.models.lead import Lead, LeadStatus
 from app.models.visita import Visita, VisitaStatus
 from app.models.configuracao import Configuracao
+from app.services.geolocalizacao import atualizar_localizacao
+from app.services.mercado_service import calcular_preco_m2
+from app.services.leads_service import atualizar_chaves
+from app.services import versoes_service
 from datetime import datetime, timedelta
 import random
+from bootstrap import run_migrations
 
-# Criar todas as tabelas
-Base.metadata.create_all(bind=engine)
 
 def criar_imoveis(db: Session):
     """Cria imóveis de exemplo"""
@@ -203,6 +206,8 @@ def criar_imoveis(db: Session):
     imoveis_criados = []
     for imovel_data in imoveis_data:
         imovel = Imovel(**imovel_data)
+        atualizar_localizacao(imovel)
+        calcular_preco_m2(imovel)
         db.add(imovel)
         db.flush()
         imoveis_criados.append(imovel)
@@ -261,6 +266,7 @@ def criar_leads(db: Session):
 
     for lead_data in leads_data:
         lead = Lead(**lead_data)
+        atualizar_chaves(lead)
         db.add(lead)
 
     db.commit()
@@ -342,6 +348,8 @@ def criar_configuracao(db: Session):
     )
 
     db.add(config)
+    # Workers já no ar guardaram "sem configuração" em cache
+    versoes_service.incrementar(db, versoes_service.CONFIGURACAO)
     db.commit()
     print("✓ Configuração criada!")
 
@@ -352,6 +360,8 @@ def main():
     print("POPULANDO BANCO DE DADOS")
     print("="*50 + "\n")
 
+    # Schema pelas migrações (create_all deixaria o banco sem alembic_version)
+    run_migrations()
     db = Session(bind=engine)
 
     try:
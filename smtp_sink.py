@@ -0,0 +1,96 @@
+"""
+Servidor SMTP local que só guarda as mensagens recebidas (desenvolvimento e testes)
+Usage: python smtp_sink.py [--host 127.0.0.1] [--porta 1025] [--diretorio emails]
+
+Aceita qualquer remetente e destinatário, grava cada mensagem como .eml no
+diretório e mostra o assunto no terminal. Com SMTP_HOST=localhost e
+SMTP_PORT=1025, o notificacoes_worker.py entrega aqui.
+"""
+import argparse
+import os
+import socketserver
+import time
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+
+class SessaoSMTP(socketserver.StreamRequestHandler):
+    diretorio = "emails"
+
+    def responder(self, linha: str):
+        self.wfile.write(f"{linha}\r\n".encode())
+
+    def handle(self):
+        self.responder("220 smtp_sink pronto")
+        remetente, destinatarios = None, []
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode("utf-8", "replace").strip()
+            verbo = comando[:4].upper()
+
+            if verbo == "EHLO":
+                self.responder("250-smtp_sink")
+                self.responder("250 8BITMIME")
+            elif verbo == "HELO":
+                self.responder("250 smtp_sink")
+            elif verbo == "MAIL":
+                remetente, destinatarios = comando.split(":", 1)[1].strip(), []
+                self.responder("250 OK")
+            elif verbo == "RCPT":
+                destinatarios.append(comando.split(":", 1)[1].strip())
+                self.responder("250 OK")
+            elif verbo == "DATA":
+                self.responder("354 Termine com <CRLF>.<CRLF>")
+                self.guardar(remetente, destinatarios, self.ler_dados())
+                remetente, destinatarios = None, []
+                self.responder("250 OK")
+            elif verbo == "RSET":
+                remetente, destinatarios = None, []
+                self.responder("250 OK")
+            elif verbo == "NOOP":
+                self.responder("250 OK")
+            elif verbo == "QUIT":
+                self.responder("221 Tchau")
+                return
+            else:
+                self.responder("502 Comando não implementado")
+
+    def ler_dados(self) -> bytes:
+        linhas = []
+        while True:
+            linha = self.rfile.readline()
+            if not linha or linha in (b".\r\n", b".\n"):
+                return b"".join(linhas)
+            # Dot-stuffing (RFC 5321, 4.5.2)
+            linhas.append(linha[1:] if linha.startswith(b"..") else linha)
+
+    def guardar(self, remetente, destinatarios, dados: bytes):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = os.path.join(self.diretorio, f"{time.time_ns()}.eml")
+        with open(caminho, "wb") as f:
+            f.write(dados)
+        assunto = str(make_header(decode_header(message_from_bytes(dados).get("Subject", ""))))
+        print(f"{remetente} -> {', '.join(destinatarios)}: {assunto} ({caminho})", flush=True)
+
+
+class Servidor(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recebe e-mails localmente sem entregá-los")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=1025)
+    parser.add_argument("--diretorio", default="emails")
+    args = parser.parse_args()
+
+    SessaoSMTP.diretorio = args.diretorio
+    with Servidor((args.host, args.porta), SessaoSMTP) as servidor:
+        print(f"SMTP local em {args.host}:{args.porta}, gravando em {args.diretorio}/")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,154 @@
+"""
+Uploads pelo CloudinaryService com o armazenamento falso (CLOUDINARY_FAKE)
+
+O FakeCloudinaryUploader bloqueia a thread pelo tempo de latência, como o
+SDK real: os testes verificam que o event loop continua livre, que
+UPLOAD_MAX_CONCURRENCY limita as chamadas simultâneas e que o timeout
+responde sem deixar a thread presa nem a vaga do semáforo ocupada.
+"""
+import asyncio
+import io
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.services.cloudinary_service import CloudinaryService
+from app.services.fake_storage import fake_uploader
+
+# Atraso máximo aceitável do event loop com uploads de LATENCIA segundos em andamento
+LATENCIA = 0.3
+ATRASO_MAXIMO = 0.1
+
+
+@pytest.fixture
+def servico(monkeypatch):
+    monkeypatch.setattr(settings, "USE_CLOUDINARY", True)
+    monkeypatch.setattr(settings, "CLOUDINARY_FAKE", True)
+    monkeypatch.setattr(settings, "UPLOAD_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "UPLOAD_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "UPLOAD_MAX_RETRIES", 0)
+    monkeypatch.setattr(fake_uploader, "latency", LATENCIA)
+    monkeypatch.setattr(fake_uploader, "failures", 0)
+    servico = CloudinaryService()
+    yield servico
+    servico.shutdown()
+
+
+def arquivo_falso(i: int) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(os.urandom(1024)),
+        filename=f"foto_{i}.jpg",
+        headers=Headers({"content-type": "image/jpeg"}),
+    )
+
+
+async def medir_atraso(parar: asyncio.Event, intervalo: float = 0.01) -> float:
+    maior = 0.0
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        maior = max(maior, time.perf_counter() - inicio - intervalo)
+    return maior
+
+
+def test_uploads_simultaneos_nao_bloqueiam_o_event_loop(servico):
+    async def cenario():
+        parar = asyncio.Event()
+        monitor = asyncio.create_task(medir_atraso(parar))
+        resultados = await asyncio.gather(*[
+            servico.upload_image(arquivo_falso(i), folder="teste", public_id=f"foto_{i}")
+            for i in range(6)
+        ])
+        parar.set()
+        return resultados, await monitor
+
+    resultados, atraso = asyncio.run(cenario())
+
+    assert [r["public_id"] for r in resultados] == [f"teste/foto_{i}" for i in range(6)]
+    assert atraso < ATRASO_MAXIMO
+
+
+def test_semaforo_limita_chamadas_simultaneas(servico):
+    lock = threading.Lock()
+    ativas = 0
+    maximo = 0
+
+    def chamada_bloqueante():
+        nonlocal ativas, maximo
+        with lock:
+            ativas += 1
+            maximo = max(maximo, ativas)
+        time.sleep(0.05)
+        with lock:
+            ativas -= 1
+
+    async def cenario():
+        await asyncio.gather(*[servico._run_blocking(chamada_bloqueante) for _ in range(8)])
+
+    asyncio.run(cenario())
+
+    assert maximo == settings.UPLOAD_MAX_CONCURRENCY
+
+
+def test_timeout_responde_erro_e_libera_a_thread(servico, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_TIMEOUT_SECONDS", 0.1)
+
+    async def cenario():
+        inicio = time.perf_counter()
+        with pytest.raises(HTTPException) as erro:
+            await servico.upload_image(arquivo_falso(0), folder="teste", public_id="lento")
+        decorrido = time.perf_counter() - inicio
+
+        # A vaga continua ocupada enquanto a thread ainda roda a chamada
+        assert servico._semaphore._value == settings.UPLOAD_MAX_CONCURRENCY - 1
+        await asyncio.sleep(LATENCIA + 0.1)
+        return erro.value, decorrido
+
+    erro, decorrido = asyncio.run(cenario())
+
+    assert erro.status_code == 504
+    assert decorrido < LATENCIA
+    # A thread terminou a chamada e devolveu a vaga
+    assert servico._semaphore._value == settings.UPLOAD_MAX_CONCURRENCY
+    threads = [t for t in threading.enumerate() if t.name.startswith("cloudinary")]
+    assert len(threads) <= settings.UPLOAD_MAX_CONCURRENCY
+
+
+def test_retry_espera_a_tentativa_que_estourou_o_timeout(servico, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_TIMEOUT_SECONDS", 0.1)
+    monkeypatch.setattr(settings, "UPLOAD_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "UPLOAD_RETRY_BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(fake_uploader, "calls", 0)
+
+    lock = threading.Lock()
+    ativas = 0
+    maximo = 0
+    upload_original = fake_uploader.upload
+
+    def upload_contando(file, **options):
+        nonlocal ativas, maximo
+        with lock:
+            ativas += 1
+            maximo = max(maximo, ativas)
+        try:
+            return upload_original(file, **options)
+        finally:
+            with lock:
+                ativas -= 1
+
+    monkeypatch.setattr(fake_uploader, "upload", upload_contando)
+    arquivo = arquivo_falso(0)
+    conteudo = arquivo.file.getvalue()
+
+    resultado = asyncio.run(servico.upload_image(arquivo, folder="teste", public_id="lento"))
+
+    # Nenhuma segunda leitura concorrente do arquivo; a tentativa atrasada é aproveitada
+    assert maximo == 1
+    assert fake_uploader.calls == 1
+    assert resultado["public_id"] == "teste/lento"
+    assert fake_uploader.objects["teste/lento"] == conteudo